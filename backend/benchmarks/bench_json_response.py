@@ -0,0 +1,99 @@
+"""
+Microbenchmark: cost of turning one 100-message history page into response bytes.
+
+Runs FastAPI's own response serialization (`serialize_response`) followed by
+the response class's `render`, for:
+  - the previous path: string id fields with `uuid_to_str` validators,
+    rendered by the stdlib-based JSONResponse
+  - the current path: UUID id fields, rendered by ORJSONResponse
+
+Rows are plain objects read through `from_attributes`, like the ORM rows the
+history endpoint returns.
+
+Usage (from backend/):
+    python -m benchmarks.bench_json_response --messages 100 --rounds 2000
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List, Optional
+from uuid import UUID, uuid4
+import argparse
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel, field_validator
+
+from schema.message_schema import DirectMessagePage
+
+
+class LegacyDirectMessageResponse(BaseModel):
+    message_id: str
+    sender_id: str
+    receiver_id: str
+    content: str
+    is_read: bool
+    sent_at: datetime
+
+    class Config:
+        from_attributes = True
+
+    @field_validator('message_id', 'sender_id', 'receiver_id', mode="before")
+    def uuid_to_str(cls, v):
+        if isinstance(v, UUID):
+            return str(v)
+        return v
+
+
+class LegacyDirectMessagePage(BaseModel):
+    messages: List[LegacyDirectMessageResponse]
+    before_cursor: Optional[str]
+    after_cursor: Optional[str]
+
+
+def build_page(messages: int):
+    me, contact = uuid4(), uuid4()
+    now = datetime.utcnow()
+    rows = [
+        SimpleNamespace(
+            message_id=uuid4(),
+            sender_id=me if i % 2 else contact,
+            receiver_id=contact if i % 2 else me,
+            content="Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 2,
+            is_read=bool(i % 3),
+            sent_at=now - timedelta(seconds=i),
+        )
+        for i in range(messages)
+    ]
+    return {"messages": rows, "before_cursor": "MjAyNi0xMC0xNlQwMDowMDowMHxhYmM", "after_cursor": None}
+
+
+async def measure(model, response_class, page, rounds: int) -> float:
+    field = create_model_field(name="Response_bench", type_=model, mode="serialization")
+    start = time.perf_counter()
+    for _ in range(rounds):
+        content = await serialize_response(field=field, response_content=page)
+        response_class(content)
+    return time.perf_counter() - start
+
+
+async def run(messages: int, rounds: int):
+    page = build_page(messages)
+
+    legacy = await measure(LegacyDirectMessagePage, JSONResponse, page, rounds)
+    current = await measure(DirectMessagePage, ORJSONResponse, page, rounds)
+
+    print(f"messages={messages} rounds={rounds}")
+    print(f"  str ids + JSONResponse    : {legacy / rounds * 1e6:9.1f} us/page")
+    print(f"  UUID ids + ORJSONResponse : {current / rounds * 1e6:9.1f} us/page")
+    print(f"  speedup                   : {legacy / current:9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.rounds))
@@ -0,0 +1,146 @@
+"""
+Benchmark: message search over a synthetic corpus, ILIKE vs tsvector + GIN.
+
+Builds an UNLOGGED scratch table shaped like direct_messages (same generated
+search_vector column and the same indexes), fills it with random messages
+drawn from a Zipf-like vocabulary, then times the same user-scoped search
+both ways for rare, medium and common words:
+  - ILIKE '%word%' ordered by recency, as a naive implementation would
+  - search_vector @@ prefix tsquery ordered by ts_rank_cd, as /messages/search does
+
+Needs the database from the app config (the scratch table is dropped at the
+end unless --keep is given; a kept table is reused by the next run).
+
+Usage (from backend/):
+    python -m benchmarks.bench_message_search --messages 2000000 --users 1000 --queries 20
+"""
+from uuid import UUID
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import asyncpg
+
+from database.database import DATABASE_URL
+from database.models import SEARCH_CONFIG
+
+TABLE = "bench_search_messages"
+VOCABULARY = 20000
+BATCH = 200000
+
+NAIVE_QUERY = f"""
+    SELECT message_id, content, sent_at FROM {TABLE}
+    WHERE (sender_id = $1 OR receiver_id = $1) AND content ILIKE '%' || $2 || '%'
+    ORDER BY sent_at DESC, message_id DESC LIMIT 20
+"""
+
+SEARCH_QUERY = f"""
+    SELECT message_id, content, sent_at, ts_rank_cd(search_vector, query) AS rank
+    FROM {TABLE}, to_tsquery('{SEARCH_CONFIG}', $2 || ':*') AS query
+    WHERE search_vector @@ query AND (sender_id = $1 OR receiver_id = $1)
+    ORDER BY rank DESC, sent_at DESC, message_id DESC LIMIT 20
+"""
+
+
+def word(n: int) -> str:
+    # The trailing 'z' keeps one word from being a prefix of another (w1z vs w10z)
+    return f"w{n}z"
+
+
+def word_sql(column: str) -> str:
+    return f"'w' || {column} || 'z'"
+
+
+def user_id(n: int) -> UUID:
+    return UUID(f"00000000-0000-0000-0000-{n:012d}")
+
+
+async def build_corpus(conn, messages: int, users: int):
+    if await conn.fetchval("SELECT to_regclass($1)", TABLE) is not None:
+        count = await conn.fetchval(f"SELECT count(*) FROM {TABLE}")
+        print(f"reusing {TABLE} ({count} messages)")
+        return
+
+    await conn.execute(f"""
+        CREATE UNLOGGED TABLE {TABLE} (
+            message_id uuid PRIMARY KEY,
+            sender_id uuid NOT NULL,
+            receiver_id uuid NOT NULL,
+            content varchar NOT NULL,
+            sent_at timestamp NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', content)) STORED
+        )
+    """)
+    # Word n is drawn with probability ~ 1/n: a few very common words, a long tail of rare ones
+    await conn.execute(f"""
+        CREATE TEMP TABLE bench_vocabulary AS
+        SELECT n, {word_sql("n")} AS word FROM generate_series(1, {VOCABULARY}) AS n
+    """)
+
+    start = time.perf_counter()
+    for offset in range(0, messages, BATCH):
+        size = min(BATCH, messages - offset)
+        await conn.execute(f"""
+            INSERT INTO {TABLE} (message_id, sender_id, receiver_id, content, sent_at)
+            SELECT md5(random()::text || g)::uuid,
+                   ('00000000-0000-0000-0000-' || lpad((1 + (random() * ({users} - 1))::int)::text, 12, '0'))::uuid,
+                   ('00000000-0000-0000-0000-' || lpad((1 + (random() * ({users} - 1))::int)::text, 12, '0'))::uuid,
+                   (SELECT string_agg(v.word, ' ')
+                    FROM (SELECT greatest(1, floor(exp(random() * ln({VOCABULARY}))))::int AS n
+                          FROM generate_series(1, 4 + (g % 12)) WHERE g IS NOT NULL) AS picks
+                    JOIN bench_vocabulary v USING (n)),
+                   now() - (random() * interval '365 days')
+            FROM generate_series({offset + 1}, {offset + size}) AS g
+        """)
+        print(f"  inserted {offset + size}/{messages} ({time.perf_counter() - start:.0f}s)")
+
+    await conn.execute(f"""
+        CREATE INDEX ON {TABLE} (least(sender_id, receiver_id), greatest(sender_id, receiver_id), sent_at, message_id)
+    """)
+    await conn.execute(f"CREATE INDEX ON {TABLE} USING gin (search_vector)")
+    await conn.execute(f"ANALYZE {TABLE}")
+    print(f"corpus ready in {time.perf_counter() - start:.0f}s")
+
+
+async def time_query(conn, sql: str, user: UUID, term: str) -> float:
+    start = time.perf_counter()
+    await conn.fetch(sql, user, term)
+    return (time.perf_counter() - start) * 1000
+
+
+async def run(messages: int, users: int, queries: int, keep: bool):
+    conn = await asyncpg.connect(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1))
+    try:
+        await build_corpus(conn, messages, users)
+        words = {
+            "common": [word(n) for n in range(1, 10)],
+            "medium": [word(n) for n in range(100, 1000, 100)],
+            "rare": [word(n) for n in range(10000, 20000, 1000)],
+        }
+        print(f"queries={queries} per case, user-scoped, 20 results (ms)")
+        print(f"  {'words':8} {'ILIKE p50':>10} {'ILIKE p95':>10} {'FTS p50':>10} {'FTS p95':>10}")
+        for label, candidates in words.items():
+            naive, search = [], []
+            for _ in range(queries):
+                user, term = user_id(random.randint(1, users)), random.choice(candidates)
+                naive.append(await time_query(conn, NAIVE_QUERY, user, term))
+                search.append(await time_query(conn, SEARCH_QUERY, user, term))
+            p95 = lambda samples: statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+            print(f"  {label:8} {statistics.median(naive):10.1f} {p95(naive):10.1f} "
+                  f"{statistics.median(search):10.1f} {p95(search):10.1f}")
+    finally:
+        if not keep:
+            await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table for later runs")
+    args = parser.parse_args()
+    asyncio.run(run(args.messages, args.users, args.queries, args.keep))
@@ -0,0 +1,279 @@
+"""
+Benchmark: REST endpoint latency and throughput as the message tables grow.
+
+Runs the FastAPI app in process (ASGI calls, no server or HTTP client in
+between) against the configured Postgres database, seeded by
+benchmarks.dataset. For each dataset size the tables are grown to that many
+messages, then every endpoint is hit `--requests` times by `--concurrency`
+concurrent clients acting as random viewers:
+
+  direct_history   GET  /messages/direct/{contact_id}
+  group_history    GET  /messages/groups/{group_id}/messages
+  unread_count     GET  /messages/unread/count
+  contacts         GET  /contacts/
+  login            POST /authentication/login   (bcrypt bound, fewer requests)
+
+and p50/p95/p99 latency and throughput are printed and written to a JSON file,
+so runs can be compared with --compare.
+
+Needs a scratch database migrated with `alembic upgrade head` (see
+benchmarks.dataset). Sizes only grow: a run at 10M messages takes a while to
+seed the first time, later runs reuse the data.
+
+Usage (from backend/):
+    python -m benchmarks.bench_rest_endpoints --sizes 10000,1000000,10000000
+    python -m benchmarks.bench_rest_endpoints --sizes 10000 --compare benchmarks/results/rest-<previous>.json
+"""
+import os
+
+# Benchmarks hammer login from a few accounts: lift the per-account rate limits
+# before the app reads its settings
+os.environ.setdefault("rate_limit_login", "1000000/second")
+os.environ.setdefault("rate_limit_send", "1000000/second")
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import subprocess
+import time
+
+import orjson
+
+from benchmarks import dataset
+from main import app
+from utilities.password_hasher import password_hasher
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Endpoints timed at each size; login gets fewer requests since it runs bcrypt
+ENDPOINTS = ("direct_history", "group_history", "unread_count", "contacts", "login")
+LOGIN_SHARE = 0.1
+
+
+class InProcessClient:
+    """Calls the ASGI app directly, the way a server would, and returns (status, body)."""
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, query: Optional[dict] = None,
+                      token: Optional[str] = None, form: Optional[dict] = None) -> Tuple[int, bytes]:
+        headers = [(b"host", b"bench")]
+        body = b""
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        if form is not None:
+            body = urlencode(form).encode()
+            headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+            headers.append((b"content-length", str(len(body)).encode()))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": urlencode(query or {}).encode(), "root_path": "",
+            "headers": headers, "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+        sent = False
+        status = 0
+        chunks: List[bytes] = []
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                return {"type": "http.disconnect"}
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+
+class Viewer:
+    """A benchmark user with a session token, a contact and the groups they belong to."""
+    def __init__(self, n: int, token: str, contact: int, groups: list):
+        self.n = n
+        self.token = token
+        self.contact = contact
+        self.groups = groups
+
+
+async def login(client: InProcessClient, n: int) -> Tuple[int, bytes]:
+    return await client.request(
+        "POST", "/authentication/login", form={"username": dataset.email(n), "password": dataset.PASSWORD}
+    )
+
+
+async def make_viewers(client: InProcessClient, conn, count: int, users: int) -> List[Viewer]:
+    viewers = []
+    for n in range(1, count + 1):
+        status, body = await login(client, n)
+        if status != 200:
+            raise SystemExit(f"Login of {dataset.email(n)} failed ({status}): {body[:200]!r}")
+        groups = await dataset.groups_of(conn, n)
+        if not groups:
+            raise SystemExit(f"{dataset.email(n)} is in no group: use more --members or fewer --groups")
+        viewers.append(Viewer(n, orjson.loads(body)["access_token"], n % users + 1, groups))
+    return viewers
+
+
+def build_request(endpoint: str, viewer: Viewer, users: int) -> dict:
+    if endpoint == "direct_history":
+        return {"method": "GET", "path": f"/messages/direct/{dataset.user_id(viewer.contact)}",
+                "query": {"limit": 50}, "token": viewer.token}
+    if endpoint == "group_history":
+        return {"method": "GET", "path": f"/messages/groups/{random.choice(viewer.groups)}/messages",
+                "query": {"limit": 50}, "token": viewer.token}
+    if endpoint == "unread_count":
+        return {"method": "GET", "path": "/messages/unread/count", "token": viewer.token}
+    if endpoint == "contacts":
+        return {"method": "GET", "path": "/contacts/", "token": viewer.token}
+    n = random.randint(1, users)
+    return {"method": "POST", "path": "/authentication/login",
+            "form": {"username": dataset.email(n), "password": dataset.PASSWORD}}
+
+
+def percentile(samples: List[float], p: int) -> float:
+    if len(samples) < 2:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method="inclusive")[p - 1]
+
+
+async def measure(client: InProcessClient, endpoint: str, viewers: List[Viewer], users: int,
+                  requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            request = build_request(endpoint, random.choice(viewers), users)
+            start = time.perf_counter()
+            status, _ = await client.request(**request)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "endpoint": endpoint,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(messages: int, result: dict, previous: Optional[dict]):
+    change = ""
+    if previous:
+        delta = (result["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100 if previous["p95_ms"] else 0.0
+        change = f" {delta:+7.1f}%"
+    errors = sum(result["errors"].values())
+    print(f"  {messages:>10} {result['endpoint']:15} {result['throughput_rps']:9.1f} "
+          f"{result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {errors:6}{change}")
+
+
+def load_previous(path: Optional[str]) -> Dict[Tuple[int, str], dict]:
+    if not path:
+        return {}
+    with open(path) as f:
+        previous = json.load(f)
+    return {(row["messages"], row["endpoint"]): row for row in previous["results"]}
+
+
+async def run(args):
+    conn = await dataset.connect()
+    try:
+        if args.reset:
+            await dataset.reset(conn)
+        await dataset.check_scratch(conn)
+        await dataset.seed_people(conn, args.users, args.contacts, args.groups, args.members,
+                                  await password_hasher.hash(dataset.PASSWORD))
+
+        previous = load_previous(args.compare)
+        client = InProcessClient(app)
+        results = []
+        async with app.router.lifespan_context(app):
+            viewers = await make_viewers(client, conn, args.viewers, args.users)
+            print(f"concurrency={args.concurrency}, {args.requests} requests per endpoint "
+                  f"({int(args.requests * LOGIN_SHARE)} for login), latency in ms"
+                  + (f", p95 change vs {args.compare}" if previous else ""))
+            print(f"  {'messages':>10} {'endpoint':15} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>6}")
+            for size in args.sizes:
+                await dataset.grow_messages(conn, size, args.users, args.contacts, args.groups, args.members)
+                messages = await dataset.message_count(conn)
+                for endpoint in ENDPOINTS:
+                    requests = max(1, int(args.requests * LOGIN_SHARE)) if endpoint == "login" else args.requests
+                    # Warm caches and the connection pool so the first size is not penalised
+                    await measure(client, endpoint, viewers, args.users, min(requests, args.concurrency * 2),
+                                  args.concurrency)
+                    result = await measure(client, endpoint, viewers, args.users, requests, args.concurrency)
+                    result["messages"] = messages
+                    results.append(result)
+                    print_row(messages, result, previous.get((size, endpoint)) or previous.get((messages, endpoint)))
+    finally:
+        await conn.close()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump({
+            "benchmark": "rest_endpoints",
+            "started_at": args.started_at,
+            "revision": git_revision(),
+            "parameters": {
+                "users": args.users, "contacts": args.contacts, "groups": args.groups, "members": args.members,
+                "viewers": args.viewers, "requests": args.requests, "concurrency": args.concurrency,
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,1000000,10000000",
+                        help="Comma-separated total message counts, measured in increasing order")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--contacts", type=int, default=20, help="Ring contacts on each side of every user")
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--members", type=int, default=50)
+    parser.add_argument("--viewers", type=int, default=50, help="Users the requests are made as")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per endpoint and size")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/rest-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous JSON results to show p95 changes against")
+    parser.add_argument("--reset", action="store_true", help="Empty the scratch database first")
+    args = parser.parse_args()
+
+    args.sizes = sorted(int(size) for size in args.sizes.split(","))
+    args.started_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    args.output = args.output or os.path.join(RESULTS_DIR, f"rest-{args.started_at}.json")
+    # Per-request query logs would dominate the output and the timings
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(run(args))
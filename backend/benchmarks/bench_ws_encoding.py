@@ -0,0 +1,93 @@
+"""
+Microbenchmark: cost per recipient of fanning one WebSocket event out to a group.
+
+Compares the previous path (`send_json` per socket, i.e. one `json.dumps` per
+recipient) with the current one (encode once, enqueue the same frame on every
+socket through ConnectionManager).
+
+Usage (from backend/):
+    python -m benchmarks.bench_ws_encoding --members 500 --rounds 200
+"""
+from datetime import datetime
+from uuid import uuid4
+import argparse
+import asyncio
+import json
+import time
+
+from utilities.event_bus import InProcessEventBus
+from utilities.websocket_manager import ConnectionManager
+
+
+class NullWebSocket:
+    """WebSocket stand-in that discards frames, mimicking Starlette's send_json encoding."""
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+    async def send_text(self, data):
+        pass
+
+    async def close(self, code=1000):
+        pass
+
+
+def build_payload():
+    return {
+        "event": "new_group_message",
+        "data": {
+            "message_id": str(uuid4()),
+            "group_id": str(uuid4()),
+            "sender_id": str(uuid4()),
+            "sender_name": "benchmark",
+            "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "sent_at": datetime.utcnow().isoformat(),
+        },
+    }
+
+
+async def legacy_fanout(sockets, payload):
+    # Previous behaviour: one send_json (and so one json.dumps) per socket
+    for socket in sockets:
+        await socket.send_json(payload)
+
+
+async def run(members: int, rounds: int):
+    payload = build_payload()
+    user_ids = [str(uuid4()) for _ in range(members)]
+
+    sockets = [NullWebSocket() for _ in user_ids]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await legacy_fanout(sockets, payload)
+    legacy = time.perf_counter() - start
+
+    manager = ConnectionManager(InProcessEventBus(), max_queue=rounds + 1)
+    await manager.start()
+    for user_id in user_ids:
+        await manager.connect(NullWebSocket(), user_id)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await manager.send_to_users(payload, user_ids)
+    # Let the writer tasks drain every queue so socket writes are included
+    while any(c.queue.qsize() for conns in manager.active_connections.values() for c in conns):
+        await asyncio.sleep(0)
+    current = time.perf_counter() - start
+    await manager.stop()
+
+    deliveries = members * rounds
+    print(f"members={members} rounds={rounds}")
+    print(f"  send_json per socket : {legacy / deliveries * 1e6:8.2f} us/recipient")
+    print(f"  encode once + queue  : {current / deliveries * 1e6:8.2f} us/recipient")
+    print(f"  speedup              : {legacy / current:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.members, args.rounds))
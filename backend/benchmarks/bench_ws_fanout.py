@@ -0,0 +1,486 @@
+"""
+Benchmark: WebSocket connection density and group fan-out of one worker.
+
+Opens `--clients` real WebSocket clients against /ws (valid session tokens,
+minted straight into the scratch database), then sends group messages over
+the socket to groups of several sizes whose members are all connected, and
+reports:
+
+  - server memory per open connection (RSS growth of the worker / sockets)
+  - end-to-end delivery latency: send_group frame written by the sender until
+    the new_group_message event is read by each member (p50/p95/p99/max)
+  - delivery rate and completeness (delivered / expected)
+  - event-loop lag of the server (from pinge_event_loop_lag_seconds on
+    /metrics) and of the benchmark client itself; when the client's lag is
+    high the client, not the server, is the bottleneck
+
+Results are written to JSON. With --compare, p99 latency, server lag and
+memory per connection are checked against a previous run and the benchmark
+exits with status 1 when any of them regressed by more than --tolerance.
+
+By default a single uvicorn worker is started on --port with rate limits
+lifted, output in benchmarks/results/ws-server-<timestamp>.log. To measure an
+already running server pass --url (and --server-pid for memory); it must use
+the same `secret_key` as this process, or the minted tokens are rejected.
+
+Needs a scratch database migrated with `alembic upgrade head` (see
+benchmarks.dataset). Tens of thousands of sockets need a high open file
+limit (`ulimit -n`), and one client address can open at most ~28k sockets to
+one server port (ephemeral port range).
+
+Usage (from backend/):
+    python -m benchmarks.bench_ws_fanout --clients 20000 --group-sizes 10,100,1000,10000
+"""
+import os
+import secrets
+
+# The server started here and the tokens minted here must share the JWT key
+os.environ.setdefault("secret_key", secrets.token_urlsafe(32))
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import orjson
+from websockets.asyncio.client import connect
+
+from benchmarks import dataset
+from utilities.authentication_service import create_access_token
+from utilities.password_hasher import password_hasher
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fan-out groups are numbered after the group size, clear of dataset.seed_groups numbers
+FANOUT_GROUP_BASE = 900000000
+
+# Clients send a frame this often so the server does not close them as idle
+HEARTBEAT_INTERVAL = 20.0
+
+LAG_INTERVAL = 0.05
+
+
+class FanoutStats:
+    """Sent messages and their deliveries for one group size."""
+    def __init__(self):
+        self.sent_at: Dict[str, float] = {}
+        self.latencies: List[float] = []
+        self.errors: Dict[str, int] = {}
+        self.last_delivery = 0.0
+
+    def delivered(self, key: str, now: float):
+        sent = self.sent_at.get(key)
+        if sent is not None:
+            self.latencies.append((now - sent) * 1000)
+            self.last_delivery = now
+
+
+class Client:
+    """One benchmark user's socket; counts what it reads for the current fan-out."""
+    def __init__(self, n: int, socket):
+        self.n = n
+        self.socket = socket
+
+    async def read(self, bench: "Bench"):
+        try:
+            async for raw in self.socket:
+                now = time.perf_counter()
+                # Cheap substring checks first: most frames are not interesting
+                if '"new_group_message"' in raw:
+                    content = orjson.loads(raw)["data"]["content"]
+                    if bench.stats is not None:
+                        bench.stats.delivered(content.split(" ", 1)[1], now)
+                elif '"event":"error"' in raw and bench.stats is not None:
+                    detail = str(orjson.loads(raw)["data"]["detail"])
+                    bench.stats.errors[detail] = bench.stats.errors.get(detail, 0) + 1
+        except Exception:
+            bench.dropped += 1
+
+
+class Bench:
+    def __init__(self, args):
+        self.args = args
+        self.clients: Dict[int, Client] = {}
+        self.stats: Optional[FanoutStats] = None
+        self.dropped = 0
+        self.connect_latencies: List[float] = []
+        self.connect_failures: Dict[str, int] = {}
+        self.client_lag: List[float] = []
+
+    async def connect_all(self, tokens: Dict[int, str]):
+        pace = 1.0 / self.args.connect_rate
+        semaphore = asyncio.Semaphore(self.args.connect_concurrency)
+
+        async def open_socket(n: int):
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    socket = await connect(
+                        f"{self.args.url}/ws?token={tokens[n]}",
+                        compression=None, ping_interval=None, max_size=None, open_timeout=60
+                    )
+                    await socket.recv()  # session frame: the server registered the socket
+                except Exception as e:
+                    reason = type(e).__name__
+                    self.connect_failures[reason] = self.connect_failures.get(reason, 0) + 1
+                    return
+                self.connect_latencies.append((time.perf_counter() - start) * 1000)
+                client = self.clients[n] = Client(n, socket)
+                asyncio.get_running_loop().create_task(client.read(self))
+
+        tasks = []
+        for n in sorted(tokens):
+            tasks.append(asyncio.get_running_loop().create_task(open_socket(n)))
+            await asyncio.sleep(pace)
+            if n % 5000 == 0:
+                print(f"  opened {len(self.clients)}/{n} sockets")
+        await asyncio.gather(*tasks)
+
+    async def heartbeat(self):
+        frame = orjson.dumps({"type": "ack"}).decode()
+        while True:
+            clients = list(self.clients.values())
+            pause = HEARTBEAT_INTERVAL / max(1, len(clients))
+            for client in clients:
+                try:
+                    await client.socket.send(frame)
+                except Exception:
+                    pass
+                await asyncio.sleep(pause)
+
+    async def measure_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.client_lag.append((time.perf_counter() - start - LAG_INTERVAL) * 1000)
+
+    def members_online(self, size: int) -> List[int]:
+        return [n for n in range(1, size + 1) if n in self.clients]
+
+    async def fan_out(self, group: str, size: int) -> FanoutStats:
+        stats = self.stats = FanoutStats()
+        senders = self.members_online(size)
+        if not senders:
+            raise SystemExit(f"No member of the {size} group is connected")
+        for i in range(self.args.messages):
+            sender = self.clients[senders[i % len(senders)]]
+            key = uuid4().hex
+            frame = orjson.dumps({
+                "type": "send_group", "id": key,
+                "payload": {"group_id": group, "content": f"bench {key}"}
+            }).decode()
+            stats.sent_at[key] = time.perf_counter()
+            await sender.socket.send(frame)
+            await asyncio.sleep(self.args.interval)
+
+        expected = self.args.messages * (len(senders) - 1)
+        deadline = time.perf_counter() + self.args.timeout
+        while len(stats.latencies) < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.1)
+        self.stats = None
+        return stats
+
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    if len(samples) < 2:
+        samples = samples * 2
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": round(cuts[49], 2), "p95": round(cuts[94], 2), "p99": round(cuts[98], 2),
+            "max": round(max(samples), 2)}
+
+
+def read_rss_kb(pid: Optional[int]) -> Optional[int]:
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def scrape_lag_buckets(http_url: str) -> Optional[Dict[float, int]]:
+    """Cumulative pinge_event_loop_lag_seconds buckets of the server, or None without /metrics."""
+    try:
+        with urllib.request.urlopen(f"{http_url}/metrics", timeout=10) as response:
+            text = response.read().decode()
+    except OSError:
+        return None
+    buckets = {}
+    for line in text.splitlines():
+        if line.startswith("pinge_event_loop_lag_seconds_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets[float(bound)] = int(float(line.rsplit(" ", 1)[1]))
+    return buckets
+
+
+def lag_quantiles(before: Optional[Dict[float, int]], after: Optional[Dict[float, int]]) -> dict:
+    """
+    Server lag between two scrapes, as bucket upper bounds in ms: p50/p99 are
+    "at most this much", like Prometheus' histogram_quantile without interpolation.
+    """
+    if not before or not after:
+        return {"samples": 0, "p50_le": None, "p99_le": None}
+    bounds = sorted(after)
+    counts = [after[bound] - before.get(bound, 0) for bound in bounds]
+    total = counts[-1]
+    result = {"samples": total}
+    for name, q in (("p50_le", 0.5), ("p99_le", 0.99)):
+        bound = next((b for b, count in zip(bounds, counts) if total and count >= q * total), None)
+        result[name] = None if bound is None else (bound * 1000 if bound != float("inf") else "inf")
+    return result
+
+
+async def wait_for_server(http_url: str, server: Optional[subprocess.Popen]):
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        if server is not None and server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode}, see its log")
+        try:
+            with urllib.request.urlopen(f"{http_url}/health", timeout=2):
+                return
+        except OSError:
+            await asyncio.sleep(0.5)
+    raise SystemExit(f"Server at {http_url} did not become healthy")
+
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "rate_limit_send": "1000000/second",
+        "rate_limit_ws_frames": "1000000/second",
+        "auth_cache_size": str(args.clients * 2),
+        "event_bus": "memory",
+        "metrics_enabled": "true",
+        "metrics_token": "",
+    })
+    log = open(args.server_log, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def prepare_database(args) -> Dict[int, str]:
+    """Seed users and fan-out groups, and mint one session token per client."""
+    conn = await dataset.connect()
+    try:
+        if args.reset:
+            await dataset.reset(conn)
+        await dataset.check_scratch(conn)
+        await dataset.seed_people(conn, args.clients, 0, 0, 0, await password_hasher.hash(dataset.PASSWORD))
+
+        for size in args.group_sizes:
+            group = dataset.group_id(FANOUT_GROUP_BASE + size)
+            await conn.execute(
+                "INSERT INTO group_chats (group_id, name, created_by, is_active, created_at, updated_at) "
+                "VALUES ($1, $2, $3, true, now(), now()) ON CONFLICT DO NOTHING",
+                group, f"fan-out {size}", dataset.user_id(1)
+            )
+            await conn.execute(f"""
+                INSERT INTO group_members (id, group_id, user_id, role, joined_at, last_read_at,
+                                           is_active, created_at, updated_at)
+                SELECT gen_random_uuid(), $1, {dataset.user_id_sql("n")}, 'Member', now(), now(), true, now(), now()
+                FROM generate_series(1, {size}) AS n
+                ON CONFLICT DO NOTHING
+            """, group)
+
+        # Tokens signed like login's, with an active session row each
+        await conn.execute("DELETE FROM user_sessions")
+        tokens = {
+            n: create_access_token({"sub": str(dataset.user_id(n)), "username": f"bench{n}", "email": dataset.email(n)})
+            for n in range(1, args.clients + 1)
+        }
+        now = datetime.utcnow()
+        await conn.copy_records_to_table(
+            "user_sessions",
+            columns=["session_id", "user_id", "access_token", "is_active", "created_at", "updated_at"],
+            records=[(uuid4(), dataset.user_id(n), token, True, now, now) for n, token in tokens.items()]
+        )
+        return tokens
+    finally:
+        await conn.close()
+
+
+def raise_file_limit(needed: int):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        if target < needed:
+            print(f"warning: open file limit is {target}, {needed} needed (raise `ulimit -n`)")
+
+
+def check_regressions(result: dict, previous_path: Optional[str], tolerance: float) -> List[str]:
+    """Metrics worse than the previous run by more than `tolerance` (a fraction)."""
+    if not previous_path:
+        return []
+    with open(previous_path) as f:
+        previous = json.load(f)
+    regressions = []
+
+    def compare(label: str, now, before):
+        if isinstance(now, (int, float)) and isinstance(before, (int, float)) and before > 0:
+            change = (now - before) / before
+            if change > tolerance:
+                regressions.append(f"{label}: {before} -> {now} (+{change:.0%})")
+
+    compare("memory per connection (KiB)", result["connections"]["rss_per_connection_kib"],
+            previous["connections"]["rss_per_connection_kib"])
+    earlier = {row["group_size"]: row for row in previous["fanout"]}
+    for row in result["fanout"]:
+        before = earlier.get(row["group_size"])
+        if before:
+            compare(f"group {row['group_size']} p99 latency (ms)", row["latency_ms"]["p99"], before["latency_ms"]["p99"])
+            compare(f"group {row['group_size']} server lag p99 (ms)", row["server_lag_ms"]["p99_le"],
+                    before["server_lag_ms"]["p99_le"])
+    return regressions
+
+
+async def run(args) -> int:
+    raise_file_limit(args.clients + 1024)
+    tokens = await prepare_database(args)
+    password_hasher.shutdown()
+
+    server = None
+    if args.url is None:
+        args.url = f"ws://127.0.0.1:{args.port}"
+        server = start_server(args)
+    http_url = "http" + args.url[2:]
+    server_pid = server.pid if server is not None else args.server_pid
+
+    bench = Bench(args)
+    lag_task = asyncio.get_running_loop().create_task(bench.measure_lag())
+    heartbeat_task = None
+    try:
+        await wait_for_server(http_url, server)
+        await asyncio.sleep(1.0)
+        rss_before = read_rss_kb(server_pid)
+
+        started = time.perf_counter()
+        await bench.connect_all(tokens)
+        connect_seconds = time.perf_counter() - started
+        heartbeat_task = asyncio.get_running_loop().create_task(bench.heartbeat())
+        await asyncio.sleep(2.0)
+        rss_after = read_rss_kb(server_pid)
+        connected = len(bench.clients)
+        per_connection = None
+        if rss_before is not None and rss_after is not None and connected:
+            per_connection = round((rss_after - rss_before) / connected, 2)
+
+        connections = {
+            "requested": args.clients,
+            "connected": connected,
+            "failures": bench.connect_failures,
+            "connect_seconds": round(connect_seconds, 1),
+            "connect_latency_ms": percentiles(bench.connect_latencies),
+            "server_rss_before_kib": rss_before,
+            "server_rss_after_kib": rss_after,
+            "rss_per_connection_kib": per_connection,
+        }
+        print(f"connected {connected}/{args.clients} sockets in {connect_seconds:.1f}s, "
+              f"server memory {per_connection if per_connection is not None else 'n/a'} KiB per connection")
+
+        print(f"{args.messages} messages per group, latency in ms (server lag: bucket upper bound)")
+        print(f"  {'group':>7} {'delivered':>15} {'deliv/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} "
+              f"{'srv lag p99':>11} {'cli lag p99':>11}")
+        fanout = []
+        for size in args.group_sizes:
+            lag_before = scrape_lag_buckets(http_url)
+            bench.client_lag.clear()
+            stats = await bench.fan_out(str(dataset.group_id(FANOUT_GROUP_BASE + size)), size)
+            server_lag = lag_quantiles(lag_before, scrape_lag_buckets(http_url))
+            # Only connected members can receive; the sender never gets its own message
+            expected = args.messages * (len(bench.members_online(size)) - 1)
+            first_send = min(stats.sent_at.values())
+            rate = len(stats.latencies) / (stats.last_delivery - first_send) if stats.latencies else 0.0
+            latency = percentiles(stats.latencies)
+            client_lag = percentiles(bench.client_lag)
+            fanout.append({
+                "group_size": size,
+                "messages": args.messages,
+                "expected": expected,
+                "delivered": len(stats.latencies),
+                "errors": stats.errors,
+                "deliveries_per_second": round(rate, 1),
+                "latency_ms": latency,
+                "server_lag_ms": server_lag,
+                "client_lag_ms": client_lag,
+            })
+            print(f"  {size:>7} {len(stats.latencies):>7}/{expected:<7} {rate:9.0f} {latency['p50'] or 0:8.1f} "
+                  f"{latency['p95'] or 0:8.1f} {latency['p99'] or 0:8.1f} {latency['max'] or 0:8.1f} "
+                  f"{str(server_lag['p99_le']):>11} {client_lag['p99'] or 0:11.1f}"
+                  + (f"  errors: {stats.errors}" if stats.errors else ""))
+    finally:
+        lag_task.cancel()
+        if heartbeat_task:
+            heartbeat_task.cancel()
+        await asyncio.gather(*(client.socket.close() for client in bench.clients.values()), return_exceptions=True)
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    result = {
+        "benchmark": "ws_fanout",
+        "started_at": args.started_at,
+        "revision": subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None,
+        "parameters": {"clients": args.clients, "group_sizes": args.group_sizes, "messages": args.messages,
+                       "interval": args.interval, "connect_rate": args.connect_rate},
+        "connections": connections,
+        "fanout": fanout,
+        "sockets_dropped": bench.dropped,
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if bench.dropped:
+        print(f"warning: {bench.dropped} sockets were closed during the run (slow consumer or idle eviction?)")
+    regressions = check_regressions(result, args.compare, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=20000)
+    parser.add_argument("--group-sizes", default="10,100,1000,10000",
+                        help="Comma-separated group sizes (members are the first N clients)")
+    parser.add_argument("--messages", type=int, default=20, help="Messages sent to each group")
+    parser.add_argument("--interval", type=float, default=0.25, help="Seconds between messages to a group")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a group's deliveries")
+    parser.add_argument("--connect-rate", type=float, default=1000.0, help="New sockets per second")
+    parser.add_argument("--connect-concurrency", type=int, default=500, help="Handshakes in flight")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server started by the benchmark")
+    parser.add_argument("--url", help="ws:// base URL of an already running server (default: start one)")
+    parser.add_argument("--server-pid", type=int, help="Pid of the --url server worker, for memory figures")
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/ws-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous JSON results; exit 1 on regressions beyond --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction (0.2 = 20%%)")
+    parser.add_argument("--reset", action="store_true", help="Empty the scratch database first")
+    args = parser.parse_args()
+
+    args.group_sizes = sorted({min(int(size), args.clients) for size in args.group_sizes.split(",")})
+    args.started_at = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    args.output = args.output or os.path.join(RESULTS_DIR, f"ws-{args.started_at}.json")
+    args.server_log = os.path.join(RESULTS_DIR, f"ws-server-{args.started_at}.log")
+    logging.getLogger().setLevel(logging.WARNING)
+    sys.exit(asyncio.run(run(args)))
@@ -0,0 +1,223 @@
+"""
+Synthetic dataset for the benchmarks that run against the app's database.
+
+Everything is generated in SQL (asyncpg, no ORM) so millions of rows load in
+minutes, and it is deterministic where it matters: user n always has the
+same id and email, contacts form a ring (user n is a contact of the next and
+previous `contacts` users) and group g holds `members` consecutive users.
+Messages are random but can be grown in steps (10k, then 1M, ...) on top of
+what is already there, which is how the scaling runs reuse one database.
+
+The benchmarks write to the configured database: use a scratch database
+migrated with `alembic upgrade head`. `check_scratch` refuses to run when the
+database holds users that were not created here.
+"""
+from uuid import UUID
+import time
+
+import asyncpg
+
+from database.database import DATABASE_URL
+
+EMAIL_DOMAIN = "bench.pinge.invalid"
+PASSWORD = "BenchPassw0rd!"
+BATCH = 200000
+
+# Share of generated messages that are direct (the rest are group messages)
+DIRECT_SHARE = 0.7
+
+TABLES = (
+    "conversations", "group_messages", "group_members", "group_chats", "direct_messages",
+    "contacts", "contact_requests", "user_sessions", "user_records",
+)
+
+
+def user_id(n: int) -> UUID:
+    return UUID(f"be0c0000-0000-4000-8000-{n:012d}")
+
+
+def group_id(n: int) -> UUID:
+    return UUID(f"be0c0000-0000-4000-9000-{n:012d}")
+
+
+def email(n: int) -> str:
+    return f"bench{n}@{EMAIL_DOMAIN}"
+
+
+def user_id_sql(column: str) -> str:
+    return f"('be0c0000-0000-4000-8000-' || lpad(({column})::text, 12, '0'))::uuid"
+
+
+def group_id_sql(column: str) -> str:
+    return f"('be0c0000-0000-4000-9000-' || lpad(({column})::text, 12, '0'))::uuid"
+
+
+async def connect():
+    return await asyncpg.connect(DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1))
+
+
+async def check_scratch(conn):
+    """Abort unless every user in the database is a benchmark user."""
+    others = await conn.fetchval(
+        "SELECT count(*) FROM user_records WHERE email NOT LIKE '%@' || $1", EMAIL_DOMAIN
+    )
+    if others:
+        raise SystemExit(
+            f"The configured database has {others} non-benchmark users. "
+            "Point 'config' at a scratch database (alembic upgrade head) before running benchmarks."
+        )
+
+
+async def reset(conn):
+    await check_scratch(conn)
+    await conn.execute(f"TRUNCATE {', '.join(TABLES)}")
+
+
+async def seed_people(conn, users: int, contacts: int, groups: int, members: int, password_hash: str):
+    """
+    Create users, their contact ring and groups, unless they already exist.
+    Every user's password is PASSWORD (stored as `password_hash`).
+    """
+    existing = await conn.fetchval("SELECT count(*) FROM user_records")
+    if existing:
+        if existing != users:
+            raise SystemExit(f"Database already holds {existing} benchmark users, not {users}: use --reset")
+        return
+
+    start = time.perf_counter()
+    await conn.execute(f"""
+        INSERT INTO user_records (user_id, email, username, password, gender, country, is_active, created_at, updated_at)
+        SELECT {user_id_sql("n")}, 'bench' || n || '@{EMAIL_DOMAIN}', 'bench' || n, $1,
+               'Male', 'Benchland', true, now(), now()
+        FROM generate_series(1, {users}) AS n
+    """, password_hash)
+    # Both directions of every ring edge (n, n + d)
+    await conn.execute(f"""
+        INSERT INTO contacts (id, user_id, contact_id, is_active, created_at, updated_at)
+        SELECT gen_random_uuid(), {user_id_sql("a")}, {user_id_sql("b")}, true, now(), now()
+        FROM generate_series(1, {users}) AS n,
+             generate_series(1, {contacts}) AS d,
+             LATERAL (VALUES (n, (n - 1 + d) % {users} + 1), ((n - 1 + d) % {users} + 1, n)) AS edge(a, b)
+        ON CONFLICT DO NOTHING
+    """)
+    if groups:
+        await seed_groups(conn, users, groups, members)
+    print(f"seeded {users} users, {contacts} ring contacts each, {groups} groups of {members} "
+          f"({time.perf_counter() - start:.0f}s)")
+
+
+async def seed_groups(conn, users: int, groups: int, members: int):
+    """Group g holds `members` consecutive users, starting `users // groups` users after group g - 1."""
+    stride = max(1, users // groups)
+    await conn.execute(f"""
+        INSERT INTO group_chats (group_id, name, description, created_by, is_active, created_at, updated_at)
+        SELECT {group_id_sql("g")}, 'bench group ' || g, NULL, {user_id_sql(f"(g - 1) * {stride} % {users} + 1")},
+               true, now(), now()
+        FROM generate_series(1, {groups}) AS g
+    """)
+    await conn.execute(f"""
+        INSERT INTO group_members (id, group_id, user_id, role, joined_at, last_read_at, is_active, created_at, updated_at)
+        SELECT gen_random_uuid(), {group_id_sql("g")}, {user_id_sql(f"((g - 1) * {stride} + j) % {users} + 1")},
+               CASE WHEN j = 0 THEN 'Admin'::group_role ELSE 'Member'::group_role END,
+               now() - interval '400 days', now() - interval '400 days', true, now(), now()
+        FROM generate_series(1, {groups}) AS g, generate_series(0, {members - 1}) AS j
+        ON CONFLICT DO NOTHING
+    """)
+
+
+async def message_count(conn) -> int:
+    return await conn.fetchval(
+        "SELECT (SELECT count(*) FROM direct_messages) + (SELECT count(*) FROM group_messages)"
+    )
+
+
+async def grow_messages(conn, target: int, users: int, contacts: int, groups: int, members: int):
+    """
+    Add random direct (between ring contacts) and group messages until the
+    database holds `target` messages in total, then refresh the conversation
+    rows and planner statistics.
+    """
+    current = await message_count(conn)
+    if current >= target:
+        return
+    missing = target - current
+    direct = int(missing * DIRECT_SHARE)
+    stride = max(1, users // groups)
+    start = time.perf_counter()
+
+    for offset in range(0, direct, BATCH):
+        size = min(BATCH, direct - offset)
+        await conn.execute(f"""
+            INSERT INTO direct_messages (message_id, sender_id, receiver_id, content, is_read, sent_at,
+                                         is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), {user_id_sql("a")}, {user_id_sql(f"(a - 1 + d) % {users} + 1")},
+                   'bench message ' || md5(random()::text), random() > 0.1,
+                   now() - random() * interval '365 days', true, now(), now()
+            FROM (SELECT 1 + floor(random() * {users})::int AS a, 1 + floor(random() * {contacts})::int AS d
+                  FROM generate_series(1, {size})) AS pick
+        """)
+        print(f"  direct messages +{offset + size}/{direct} ({time.perf_counter() - start:.0f}s)")
+
+    grouped = missing - direct
+    for offset in range(0, grouped, BATCH):
+        size = min(BATCH, grouped - offset)
+        await conn.execute(f"""
+            INSERT INTO group_messages (message_id, group_id, sender_id, content, sent_at,
+                                        is_active, created_at, updated_at)
+            SELECT gen_random_uuid(), {group_id_sql("g")}, {user_id_sql(f"((g - 1) * {stride} + j) % {users} + 1")},
+                   'bench message ' || md5(random()::text),
+                   now() - random() * interval '365 days', true, now(), now()
+            FROM (SELECT 1 + floor(random() * {groups})::int AS g, floor(random() * {members})::int AS j
+                  FROM generate_series(1, {size})) AS pick
+        """)
+        print(f"  group messages +{offset + size}/{grouped} ({time.perf_counter() - start:.0f}s)")
+
+    await refresh_conversations(conn)
+    await conn.execute("ANALYZE")
+    print(f"grew to {target} messages ({time.perf_counter() - start:.0f}s)")
+
+
+async def refresh_conversations(conn):
+    """Rebuild every conversation row from the messages (same rules as migration 0005)."""
+    await conn.execute("TRUNCATE conversations")
+    await conn.execute("""
+        WITH latest AS (
+            SELECT DISTINCT ON (least(sender_id, receiver_id), greatest(sender_id, receiver_id))
+                   message_id, sender_id, receiver_id, content, sent_at
+            FROM direct_messages
+            ORDER BY least(sender_id, receiver_id), greatest(sender_id, receiver_id), sent_at DESC, message_id DESC
+        ),
+        unread AS (
+            SELECT receiver_id, sender_id, count(*) AS unread_count
+            FROM direct_messages WHERE is_read = false
+            GROUP BY receiver_id, sender_id
+        )
+        INSERT INTO conversations (user_id, conversation_type, conversation_id, unread_count,
+                                   last_message_id, last_sender_id, last_message_preview, last_message_at)
+        SELECT side.user_id, 'Direct'::conversation_type, side.other_id, coalesce(u.unread_count, 0),
+               l.message_id, l.sender_id, left(l.content, 100), l.sent_at
+        FROM latest l
+        CROSS JOIN LATERAL (
+            VALUES (l.sender_id, l.receiver_id) UNION VALUES (l.receiver_id, l.sender_id)
+        ) AS side(user_id, other_id)
+        LEFT JOIN unread u ON u.receiver_id = side.user_id AND u.sender_id = side.other_id
+    """)
+    await conn.execute("""
+        INSERT INTO conversations (user_id, conversation_type, conversation_id, unread_count,
+                                   last_message_id, last_sender_id, last_message_preview, last_message_at)
+        SELECT gm.user_id, 'Group'::conversation_type, gm.group_id, 0,
+               l.message_id, l.sender_id, left(l.content, 100), coalesce(l.sent_at, gm.joined_at)
+        FROM group_members gm
+        LEFT JOIN LATERAL (
+            SELECT message_id, sender_id, content, sent_at
+            FROM group_messages m
+            WHERE m.group_id = gm.group_id
+            ORDER BY sent_at DESC, message_id DESC
+            LIMIT 1
+        ) l ON true
+    """)
+
+
+async def groups_of(conn, n: int) -> list:
+    rows = await conn.fetch("SELECT group_id FROM group_members WHERE user_id = $1", user_id(n))
+    return [row["group_id"] for row in rows]
@@ -1,4 +1,5 @@
 import json
+from typing import Dict
 from pydantic_settings import BaseSettings
 import secrets
 
@@ -11,12 +12,74 @@ class Settings(BaseSettings):
         config (str): JSON string or other configuration data loaded from env.
         secret_key (str): Secret key for JWT encoding/decoding
         algorithm (str): JWT algorithm to use
+        event_bus (str): Pub/sub backend for cross-worker WebSocket delivery ('memory', 'postgres', 'redis')
+        redis_url (str): Redis connection URL, used when event_bus or rate_limit_backend is 'redis'
+        ws_send_queue_size (int): Max outbound messages buffered per WebSocket
+        ws_slow_consumer_timeout (float): Seconds a WebSocket queue may stay full before eviction
+        ws_replay_buffer_size (int): Events kept per user for replay on reconnect
+        ws_replay_retention (float): Seconds a user's replay buffer is kept after their last socket closes
+        auth_cache_size (int): Max number of authenticated tokens kept in the principal cache
+        auth_cache_ttl (float): Seconds a cached token is trusted before the session is re-checked
+        group_cache_size (int): Max number of groups whose members and roles are cached
+        group_cache_ttl (float): Seconds a cached group membership is kept without an invalidation
+        contact_cache_size (int): Max number of users whose contact ids are cached
+        contact_cache_ttl (float): Seconds a user's cached contacts are kept without an invalidation
+        bcrypt_rounds (int): bcrypt cost factor; stored hashes with another cost are rehashed at login
+        password_hash_workers (int): Threads dedicated to password hashing
+        password_hash_max_pending (int): Max queued or running hash operations before requests get 503
+        presence_heartbeat_interval (float): Seconds between heartbeats; clients send a frame and workers re-announce their users this often
+        presence_timeout (float): Seconds without a heartbeat before a socket is closed and a user counts as offline
+        presence_debounce (float): Seconds a user must stay disconnected before contacts are told they went offline
+        presence_last_seen_retention (float): Seconds an offline user's last_seen is remembered before it is dropped from memory
+        typing_throttle (float): Min seconds between relayed typing_start events per sender and conversation
+        typing_timeout (float): Seconds a typing indicator lasts without a refresh
+        rate_limit_backend (str): Where rate limit buckets are kept ('memory' per worker, 'redis' shared)
+        rate_limit_send (str): Messages a user may send over HTTP and WebSocket, e.g. "60/minute"
+        rate_limit_login (str): Login attempts allowed per client IP and account email
+        rate_limit_ws_frames (str): Inbound WebSocket frames allowed per user
+        metrics_enabled (bool): Serve Prometheus metrics at /metrics (off by default: they expose internals)
+        metrics_token (str): When set, /metrics requires "Authorization: Bearer <metrics_token>"
+        query_budget (int): Max SQL statements per request before the budget is exceeded
+        query_budgets (dict): Per-route overrides of query_budget, keyed by "METHOD /route/template"
+        query_budget_mode (str): On an exceeded budget: 'warn' logs a warning, 'raise' fails the request (tests), 'off'
+        query_repeat_threshold (int): Runs of the same statement in one request that get logged as a likely N+1
     """
 
     environment: str = "dev"       # default to 'dev' if not set
     config: str                    # expected to be JSON string or similar
     secret_key: str = secrets.token_urlsafe(32)  # Generate default if not set
     algorithm: str = "HS256"
+    event_bus: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    ws_send_queue_size: int = 256
+    ws_slow_consumer_timeout: float = 5.0
+    ws_replay_buffer_size: int = 100
+    ws_replay_retention: float = 120.0
+    auth_cache_size: int = 10000
+    auth_cache_ttl: float = 60.0
+    group_cache_size: int = 5000
+    group_cache_ttl: float = 300.0
+    contact_cache_size: int = 10000
+    contact_cache_ttl: float = 300.0
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    presence_heartbeat_interval: float = 25.0
+    presence_timeout: float = 60.0
+    presence_debounce: float = 10.0
+    presence_last_seen_retention: float = 86400.0
+    typing_throttle: float = 3.0
+    typing_timeout: float = 6.0
+    rate_limit_backend: str = "memory"
+    rate_limit_send: str = "60/minute"
+    rate_limit_login: str = "10/minute"
+    rate_limit_ws_frames: str = "20/second"
+    metrics_enabled: bool = False
+    metrics_token: str = ""
+    query_budget: int = 20
+    query_budgets: Dict[str, int] = {}
+    query_budget_mode: str = "warn"
+    query_repeat_threshold: int = 3
 
     class Config:
         env_file = ".env"
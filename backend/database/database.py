@@ -1,8 +1,15 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import os
+import time
 
 from config import config
+from utilities.metrics import Histogram
+from utilities.query_stats import instrument_engine
 
 # Extract DB credentials
 username = config["DataBase"]["username"]
@@ -14,15 +21,37 @@ database_name = config["DataBase"]["database_name"]
 # Async DB connection string (using asyncpg driver)
 DATABASE_URL = f"postgresql+asyncpg://{username}:{password}@{ip_address}:{port}/{database_name}"
 
+pool_wait = Histogram(
+    "pinge_db_pool_wait_seconds",
+    "Seconds spent acquiring a connection from the pool (queue wait, plus connect for new connections)"
+)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    The default asyncio queue pool, recording how long each checkout waited.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait.observe(time.perf_counter() - start)
+
+
 # Create async engine with connection pool config
 engine = create_async_engine(
     DATABASE_URL,
+    poolclass=TimedQueuePool,
     pool_size=10,
     max_overflow=20,
     pool_pre_ping=True,
     echo=False,  # Set to True for SQL debug logging
 )
 
+# Per-request statement counts, DB time and N+1 detection (see QueryAccountingMiddleware)
+instrument_engine(engine)
+
 # Base class for your models
 Base = declarative_base()
 
@@ -48,3 +77,29 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def get_migration_head() -> str:
+    """
+    Latest revision shipped in migrations/versions.
+    """
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(Config(ALEMBIC_INI)).get_current_head()
+
+
+async def get_schema_revision() -> Optional[str]:
+    """
+    Revision the database is currently migrated to (None if never migrated).
+    Read-only: the schema itself is owned by Alembic (`alembic upgrade head`).
+    """
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+        except ProgrammingError:
+            return None
+        return result.scalar_one_or_none()
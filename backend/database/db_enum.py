@@ -12,4 +12,8 @@ class ContactRequestStatus(Enum):
 
 class GroupRole(Enum):
     Admin = "Admin"
-    Member = "Member"
\ No newline at end of file
+    Member = "Member"
+
+class ConversationType(Enum):
+    Direct = "Direct"
+    Group = "Group"
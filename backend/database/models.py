@@ -1,9 +1,13 @@
 import uuid
-from sqlalchemy import Column, DateTime, func, String, Enum as SQLAEnum, Boolean, ForeignKey, UniqueConstraint
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Column, DateTime, func, String, Enum as SQLAEnum, Boolean, ForeignKey, UniqueConstraint, Index, Integer, text, Computed
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from database.database import Base
-from database.db_enum import GenderEnum, ContactRequestStatus, GroupRole
-from sqlalchemy.orm import relationship
+from database.db_enum import GenderEnum, ContactRequestStatus, GroupRole, ConversationType
+from sqlalchemy.orm import relationship, deferred
+
+# Text search configuration of message search vectors. 'simple' only lowercases,
+# so it works the same for every language and prefix queries match as typed.
+SEARCH_CONFIG = "simple"
 
 
 class BaseModel(Base):
@@ -47,6 +51,7 @@ class ContactRequest(BaseModel):
     __tablename__ = "contact_requests"
     __table_args__ = (
         UniqueConstraint('sender_id', 'receiver_id', name='unique_friend_request'),
+        Index('ix_contact_requests_receiver_status', 'receiver_id', 'status'),
         {"extend_existing": True}
     )
 
@@ -76,7 +81,11 @@ class Contact(BaseModel):
 
 class DirectMessage(BaseModel):
     __tablename__ = "direct_messages"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index('ix_direct_messages_unread', 'receiver_id', 'sender_id', 'sent_at', postgresql_where=text('is_read = false')),
+        Index('ix_direct_messages_search', 'search_vector', postgresql_using='gin'),
+        {"extend_existing": True}
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("user_records.user_id"), nullable=False)
@@ -84,11 +93,24 @@ class DirectMessage(BaseModel):
     content = Column(String, nullable=False)
     is_read = Column(Boolean, default=False)
     sent_at = Column(DateTime, default=func.now(), nullable=False)
+    # Maintained by Postgres on insert/update; deferred so history queries never load it
+    search_vector = deferred(Column(TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True)))
 
     sender = relationship("UserRecords", foreign_keys=[sender_id])
     receiver = relationship("UserRecords", foreign_keys=[receiver_id])
 
 
+# Keyset index for a conversation's history regardless of direction:
+# (least(a, b), greatest(a, b)) identifies the pair, (sent_at, message_id) the position
+Index(
+    'ix_direct_messages_pair_keyset',
+    func.least(DirectMessage.sender_id, DirectMessage.receiver_id),
+    func.greatest(DirectMessage.sender_id, DirectMessage.receiver_id),
+    DirectMessage.sent_at,
+    DirectMessage.message_id,
+)
+
+
 class GroupChat(BaseModel):
     __tablename__ = "group_chats"
     __table_args__ = {"extend_existing": True}
@@ -106,6 +128,7 @@ class GroupMember(BaseModel):
     __tablename__ = "group_members"
     __table_args__ = (
         UniqueConstraint('group_id', 'user_id', name='unique_group_member'),
+        Index('ix_group_members_user_id', 'user_id'),
         {"extend_existing": True}
     )
 
@@ -122,14 +145,62 @@ class GroupMember(BaseModel):
 
 class GroupMessage(BaseModel):
     __tablename__ = "group_messages"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index('ix_group_messages_keyset', 'group_id', 'sent_at', 'message_id'),
+        Index('ix_group_messages_search', 'search_vector', postgresql_using='gin'),
+        {"extend_existing": True}
+    )
 
     message_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, unique=True, nullable=False)
     group_id = Column(UUID(as_uuid=True), ForeignKey("group_chats.group_id"), nullable=False)
     sender_id = Column(UUID(as_uuid=True), ForeignKey("user_records.user_id"), nullable=False)
     content = Column(String, nullable=False)
     sent_at = Column(DateTime, default=func.now(), nullable=False)
+    search_vector = deferred(Column(TSVECTOR, Computed(f"to_tsvector('{SEARCH_CONFIG}', content)", persisted=True)))
 
     group = relationship("GroupChat", back_populates="messages")
     sender = relationship("UserRecords")
 
+
+class Conversation(Base):
+    """
+    One row per user per conversation, maintained by the send and mark-read
+    paths in the same transaction as the message rows: last message preview,
+    last activity and the user's unread count. Powers the conversation list and
+    unread badges without touching the message tables.
+    conversation_id is the other user's id for Direct and the group_id for Group.
+    Hot, write-heavy rows: no audit columns.
+    """
+    __tablename__ = "conversations"
+    __table_args__ = (
+        # Conversation list: one user's rows by activity, newest first
+        Index('ix_conversations_activity', 'user_id', 'last_message_at', 'conversation_id'),
+        {"extend_existing": True}
+    )
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user_records.user_id"), primary_key=True)
+    conversation_type = Column(SQLAEnum(ConversationType, name="conversation_type"), primary_key=True)
+    conversation_id = Column(UUID(as_uuid=True), primary_key=True)
+    unread_count = Column(Integer, default=0, nullable=False)
+    last_message_id = Column(UUID(as_uuid=True), nullable=True)
+    last_sender_id = Column(UUID(as_uuid=True), nullable=True)
+    last_message_preview = Column(String, nullable=True)
+    last_message_at = Column(DateTime, default=func.now(), nullable=False)  # last activity
+
+
+class EventBusPayload(Base):
+    """
+    Bodies of event bus messages too large for a Postgres NOTIFY payload; the
+    notification carries the row id instead (see PostgresEventBus). Rows are
+    transient and pruned after a few minutes, so the table is UNLOGGED.
+    """
+    __tablename__ = "event_bus_payloads"
+    __table_args__ = (
+        Index('ix_event_bus_payloads_created_at', 'created_at'),
+        {"prefixes": ["UNLOGGED"], "extend_existing": True}
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    channel = Column(String, nullable=False)
+    payload = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
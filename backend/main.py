@@ -1,8 +1,15 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from config import config, environment
-from database.database import engine
-from database.models import Base
+from fastapi.responses import ORJSONResponse
+from config import config, environment, settings
+from database.database import engine, get_schema_revision, get_migration_head
+from utilities.websocket_manager import manager
+from utilities.principal_cache import principal_cache
+from utilities.group_cache import group_cache
+from utilities.contact_cache import contact_cache
+from utilities.password_hasher import password_hasher
+from utilities.presence import presence_tracker
+from utilities.metrics import loop_lag_monitor
 import logging
 
 # Configure logging
@@ -19,20 +26,35 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events.
     Replaces deprecated @app.on_event decorators.
     """
-    # Startup: Create database tables
+    # Startup: Verify the schema revision. DDL is applied by `alembic upgrade head`, never here.
     logger.info("Starting up Pinge application...")
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info("Database tables created successfully")
+        current, head = await get_schema_revision(), get_migration_head()
     except Exception as e:
-        logger.error(f"Failed to create database tables: {e}")
+        logger.error(f"Failed to read database schema revision: {e}")
         raise
+    if current != head:
+        logger.warning(f"Database schema at revision {current}, expected {head}. Run 'alembic upgrade head'.")
+    else:
+        logger.info(f"Database schema at revision {current}")
+
+    # Startup: Connect the WebSocket event bus
+    await manager.start()
+    await principal_cache.attach()
+    await group_cache.attach()
+    await contact_cache.attach()
+    await presence_tracker.start()
+    await loop_lag_monitor.start()
+    logger.info(f"WebSocket event bus started ({type(manager.bus).__name__})")
     
     yield  # Application runs here
     
     # Shutdown: Cleanup resources
     logger.info("Shutting down Pinge application...")
+    await loop_lag_monitor.stop()
+    await presence_tracker.stop()
+    await manager.stop()
+    password_hasher.shutdown()
     await engine.dispose()
     logger.info("Database connections closed")
 
@@ -46,14 +68,18 @@ app = FastAPI(
     redoc_url="/redoc" if environment.lower() == "dev" else None,
     openapi_url="/openapi.json" if environment.lower() == "dev" else None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson encodes UUIDs and datetimes natively
     swagger_ui_parameters={
         "persistAuthorization": True,
     }
 )
 
 # Add middleware
-from utilities.middleware import WrapSuccessResponseMiddleware
+from utilities.middleware import WrapSuccessResponseMiddleware, RequestMetricsMiddleware, QueryAccountingMiddleware
+app.add_middleware(QueryAccountingMiddleware)
 app.add_middleware(WrapSuccessResponseMiddleware)
+# Added after the envelope middleware so it wraps (and times) it
+app.add_middleware(RequestMetricsMiddleware)
 
 # Add exception handlers
 from utilities.exception_handler import universal_exception_handler
@@ -66,6 +92,9 @@ app.include_router(authentication_api.router)
 app.include_router(contact_api.router)
 app.include_router(message_api.router)
 app.include_router(websocket_api.router)
+if settings.metrics_enabled:
+    from routers import metrics_api
+    app.include_router(metrics_api.router)
 
 # CORS Middleware
 from fastapi.middleware.cors import CORSMiddleware
@@ -80,14 +109,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Rate Limiting
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from utilities.generic import limiter
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -0,0 +1,143 @@
+"""Initial schema
+
+Tables as previously created by `Base.metadata.create_all` at startup.
+Databases created that way can be adopted with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def audit_columns():
+    return [
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    gender_enum = sa.Enum("Male", "Female", "Others", name="gender_enum")
+    contact_request_status = sa.Enum("Pending", "Accepted", "Rejected", name="contact_request_status")
+    group_role = sa.Enum("Admin", "Member", name="group_role")
+
+    op.create_table(
+        "user_records",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("gender", gender_enum, nullable=False),
+        sa.Column("country", sa.String(), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("user_id"),
+        sa.UniqueConstraint("email"),
+    )
+
+    op.create_table(
+        "user_sessions",
+        sa.Column("session_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("access_token", sa.String(), nullable=False),
+        sa.Column("ip_address", sa.String(), nullable=True),
+        sa.Column("user_agent", sa.String(), nullable=True),
+        sa.Column("location", sa.String(), nullable=True),
+        sa.Column("device_info", sa.String(), nullable=True),
+        *audit_columns(),
+        sa.UniqueConstraint("session_id"),
+        sa.UniqueConstraint("access_token"),
+    )
+
+    op.create_table(
+        "contact_requests",
+        sa.Column("request_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("sender_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("receiver_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("status", contact_request_status, nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("request_id"),
+        sa.UniqueConstraint("sender_id", "receiver_id", name="unique_friend_request"),
+    )
+
+    op.create_table(
+        "contacts",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("contact_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("id"),
+        sa.UniqueConstraint("user_id", "contact_id", name="unique_contact"),
+    )
+
+    op.create_table(
+        "direct_messages",
+        sa.Column("message_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("sender_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("receiver_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("message_id"),
+    )
+
+    op.create_table(
+        "group_chats",
+        sa.Column("group_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("created_by", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("group_id"),
+    )
+
+    op.create_table(
+        "group_members",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("group_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("group_chats.group_id"), nullable=False),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("role", group_role, nullable=False),
+        sa.Column("joined_at", sa.DateTime(), nullable=False),
+        sa.Column("last_read_at", sa.DateTime(), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("id"),
+        sa.UniqueConstraint("group_id", "user_id", name="unique_group_member"),
+    )
+
+    op.create_table(
+        "group_messages",
+        sa.Column("message_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("group_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("group_chats.group_id"), nullable=False),
+        sa.Column("sender_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("content", sa.String(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=False),
+        *audit_columns(),
+        sa.UniqueConstraint("message_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("group_messages")
+    op.drop_table("group_members")
+    op.drop_table("group_chats")
+    op.drop_table("direct_messages")
+    op.drop_table("contacts")
+    op.drop_table("contact_requests")
+    op.drop_table("user_sessions")
+    op.drop_table("user_records")
+    sa.Enum(name="group_role").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="contact_request_status").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="gender_enum").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,70 @@
+"""Hot path indexes
+
+Indexes matching the history, unread and membership queries in
+message_service.py and contact_service.py. Built CONCURRENTLY so they can be
+applied to a live database without blocking writes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Direct message history between two users, newest first
+        op.create_index(
+            "ix_direct_messages_conversation",
+            "direct_messages",
+            ["sender_id", "receiver_id", "sent_at"],
+            postgresql_concurrently=True,
+        )
+        # Unread lists, per-contact unread counts and mark-all-from-contact
+        op.create_index(
+            "ix_direct_messages_unread",
+            "direct_messages",
+            ["receiver_id", "sender_id", "sent_at"],
+            postgresql_where=sa.text("is_read = false"),
+            postgresql_concurrently=True,
+        )
+        # Group history and messages after last_read_at
+        op.create_index(
+            "ix_group_messages_group_sent_at",
+            "group_messages",
+            ["group_id", "sent_at"],
+            postgresql_concurrently=True,
+        )
+        # Groups of a user (group_id lookups use unique_group_member)
+        op.create_index(
+            "ix_group_members_user_id",
+            "group_members",
+            ["user_id"],
+            postgresql_concurrently=True,
+        )
+        # Pending requests received by a user
+        op.create_index(
+            "ix_contact_requests_receiver_status",
+            "contact_requests",
+            ["receiver_id", "status"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_contact_requests_receiver_status", table_name="contact_requests", postgresql_concurrently=True)
+        op.drop_index("ix_group_members_user_id", table_name="group_members", postgresql_concurrently=True)
+        op.drop_index("ix_group_messages_group_sent_at", table_name="group_messages", postgresql_concurrently=True)
+        op.drop_index("ix_direct_messages_unread", table_name="direct_messages", postgresql_concurrently=True)
+        op.drop_index("ix_direct_messages_conversation", table_name="direct_messages", postgresql_concurrently=True)
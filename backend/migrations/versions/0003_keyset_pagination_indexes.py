@@ -0,0 +1,63 @@
+"""Keyset pagination indexes
+
+Replaces the (sender, receiver, sent_at) and (group_id, sent_at) indexes with
+indexes ending in (sent_at, message_id), the cursor used by message history.
+Direct messages are keyed by the unordered user pair so both directions of a
+conversation are read with a single range scan.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_direct_messages_pair_keyset",
+            "direct_messages",
+            [
+                sa.text("least(sender_id, receiver_id)"),
+                sa.text("greatest(sender_id, receiver_id)"),
+                "sent_at",
+                "message_id",
+            ],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_group_messages_keyset",
+            "group_messages",
+            ["group_id", "sent_at", "message_id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_direct_messages_conversation", table_name="direct_messages", postgresql_concurrently=True)
+        op.drop_index("ix_group_messages_group_sent_at", table_name="group_messages", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_group_messages_group_sent_at",
+            "group_messages",
+            ["group_id", "sent_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_direct_messages_conversation",
+            "direct_messages",
+            ["sender_id", "receiver_id", "sent_at"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_group_messages_keyset", table_name="group_messages", postgresql_concurrently=True)
+        op.drop_index("ix_direct_messages_pair_keyset", table_name="direct_messages", postgresql_concurrently=True)
@@ -0,0 +1,56 @@
+"""Unread counters
+
+Per-user, per-conversation unread counts, backfilled from is_read (direct
+messages) and last_read_at (groups).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "unread_counters",
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("user_records.user_id"), nullable=False),
+        sa.Column("conversation_type", sa.Enum("Direct", "Group", name="conversation_type"), nullable=False),
+        sa.Column("conversation_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("unread_count", sa.Integer(), nullable=False),
+        sa.Column("last_message_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "conversation_type", "conversation_id"),
+    )
+
+    op.execute("""
+        INSERT INTO unread_counters (user_id, conversation_type, conversation_id, unread_count, last_message_at)
+        SELECT receiver_id, 'Direct', sender_id, count(*), max(sent_at)
+        FROM direct_messages
+        WHERE is_read = false
+        GROUP BY receiver_id, sender_id
+    """)
+    op.execute("""
+        INSERT INTO unread_counters (user_id, conversation_type, conversation_id, unread_count, last_message_at)
+        SELECT gm.user_id, 'Group', gm.group_id, count(m.message_id), max(m.sent_at)
+        FROM group_members gm
+        JOIN group_messages m
+          ON m.group_id = gm.group_id
+         AND m.sent_at > gm.last_read_at
+         AND m.sender_id <> gm.user_id
+        GROUP BY gm.user_id, gm.group_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("unread_counters")
+    sa.Enum(name="conversation_type").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,91 @@
+"""Conversations summary
+
+Turns unread_counters into conversations: one row per user per conversation
+with the last message preview and last activity next to the unread count.
+Rows are backfilled for both sides of every direct conversation and for every
+group member.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.rename_table("unread_counters", "conversations")
+    op.execute("ALTER TABLE conversations RENAME CONSTRAINT unread_counters_pkey TO conversations_pkey")
+    op.add_column("conversations", sa.Column("last_message_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column("conversations", sa.Column("last_sender_id", postgresql.UUID(as_uuid=True), nullable=True))
+    op.add_column("conversations", sa.Column("last_message_preview", sa.String(), nullable=True))
+
+    # Direct: latest message of each pair, recorded for both participants
+    op.execute("""
+        WITH latest AS (
+            SELECT DISTINCT ON (least(sender_id, receiver_id), greatest(sender_id, receiver_id))
+                   message_id, sender_id, receiver_id, content, sent_at
+            FROM direct_messages
+            ORDER BY least(sender_id, receiver_id), greatest(sender_id, receiver_id), sent_at DESC, message_id DESC
+        )
+        INSERT INTO conversations (user_id, conversation_type, conversation_id, unread_count,
+                                   last_message_id, last_sender_id, last_message_preview, last_message_at)
+        SELECT side.user_id, 'Direct'::conversation_type, side.other_id, 0,
+               l.message_id, l.sender_id, left(l.content, 100), l.sent_at
+        FROM latest l
+        CROSS JOIN LATERAL (
+            VALUES (l.sender_id, l.receiver_id) UNION VALUES (l.receiver_id, l.sender_id)
+        ) AS side(user_id, other_id)
+        ON CONFLICT (user_id, conversation_type, conversation_id) DO UPDATE SET
+            last_message_id = excluded.last_message_id,
+            last_sender_id = excluded.last_sender_id,
+            last_message_preview = excluded.last_message_preview,
+            last_message_at = excluded.last_message_at
+    """)
+    # Group: latest group message for every member, or the join time of an empty group
+    op.execute("""
+        INSERT INTO conversations (user_id, conversation_type, conversation_id, unread_count,
+                                   last_message_id, last_sender_id, last_message_preview, last_message_at)
+        SELECT gm.user_id, 'Group'::conversation_type, gm.group_id, 0,
+               l.message_id, l.sender_id, left(l.content, 100), coalesce(l.sent_at, gm.joined_at)
+        FROM group_members gm
+        LEFT JOIN LATERAL (
+            SELECT message_id, sender_id, content, sent_at
+            FROM group_messages m
+            WHERE m.group_id = gm.group_id
+            ORDER BY sent_at DESC, message_id DESC
+            LIMIT 1
+        ) l ON true
+        ON CONFLICT (user_id, conversation_type, conversation_id) DO UPDATE SET
+            last_message_id = excluded.last_message_id,
+            last_sender_id = excluded.last_sender_id,
+            last_message_preview = excluded.last_message_preview,
+            last_message_at = excluded.last_message_at
+    """)
+
+    op.alter_column("conversations", "last_message_at", existing_type=sa.DateTime(), nullable=False)
+    op.create_index(
+        "ix_conversations_activity",
+        "conversations",
+        ["user_id", "last_message_at", "conversation_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_conversations_activity", table_name="conversations")
+    op.alter_column("conversations", "last_message_at", existing_type=sa.DateTime(), nullable=True)
+    op.drop_column("conversations", "last_message_preview")
+    op.drop_column("conversations", "last_sender_id")
+    op.drop_column("conversations", "last_message_id")
+    op.execute("ALTER TABLE conversations RENAME CONSTRAINT conversations_pkey TO unread_counters_pkey")
+    op.rename_table("conversations", "unread_counters")
@@ -0,0 +1,62 @@
+"""Message search
+
+Adds a stored tsvector generated from the content of direct and group
+messages, so Postgres keeps it current on every insert, with a GIN index per
+table for full-text and prefix search.
+
+Adding a stored generated column rewrites the table under an exclusive lock;
+on large tables run this migration in a maintenance window. The indexes are
+then built concurrently.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("direct_messages", "group_messages"):
+        op.add_column(
+            table,
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed("to_tsvector('simple', content)", persisted=True),
+                nullable=True,
+            ),
+        )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_direct_messages_search",
+            "direct_messages",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_group_messages_search",
+            "group_messages",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_group_messages_search", table_name="group_messages", postgresql_concurrently=True)
+        op.drop_index("ix_direct_messages_search", table_name="direct_messages", postgresql_concurrently=True)
+    op.drop_column("group_messages", "search_vector")
+    op.drop_column("direct_messages", "search_vector")
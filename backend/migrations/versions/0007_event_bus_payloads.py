@@ -0,0 +1,38 @@
+"""Event bus payloads
+
+Unlogged table holding event bus messages larger than the Postgres NOTIFY
+payload limit; the notification carries the row id and listeners read the
+body from here. Rows are pruned by the publishers after a few minutes.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_bus_payloads",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("channel", sa.String(), nullable=False),
+        sa.Column("payload", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index("ix_event_bus_payloads_created_at", "event_bus_payloads", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_bus_payloads_created_at", table_name="event_bus_payloads")
+    op.drop_table("event_bus_payloads")
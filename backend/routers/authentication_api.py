@@ -15,6 +15,7 @@ from utilities.authentication_service import (
     get_current_active_user
 )
 from fastapi.security import OAuth2PasswordRequestForm
+from utilities.rate_limiter import rate_limiter, login_identity
 
 router = APIRouter(
     prefix="/authentication",
@@ -73,6 +74,10 @@ async def login(
     Returns a JWT access token valid for 7 days.
     """
     ip_address = request.client.host if request.client else None
+
+    # Limit attempts per client and account before any password hashing is spent on them.
+    # Keyed on both, so throttling one client never locks the account owner out elsewhere.
+    await rate_limiter.check("login", login_identity(ip_address, form_data.username))
     user_agent = request.headers.get("user-agent")
     location = request.headers.get("x-location")  # example custom header from frontend
     device_info = request.headers.get("x-device-info")  # example custom header from frontend
@@ -1,18 +1,23 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, Query
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from database.database import get_db
 from database.models import UserRecords
+from database.db_enum import ConversationType
 from utilities.authentication_service import get_current_active_user
 from schema.message_schema import (
     SendDirectMessage, 
     DirectMessageResponse, 
+    DirectMessagePage,
     CreateGroup, 
     GroupResponse, 
     SendGroupMessage,
     GroupMessageResponse,
+    GroupMessagePage,
     UnreadMessageCount,
     UnreadSummary,
+    ConversationPage,
+    MessageSearchPage,
     MarkAsReadRequest,
     AddGroupMembers,
     RemoveGroupMember,
@@ -40,13 +45,22 @@ from utilities.message_service import (
     get_group_members_service,
     update_group_info_service
 )
+from utilities.conversation_service import get_conversations_service
+from utilities.search_service import search_messages_service
+from utilities.rate_limiter import rate_limiter
 
 router = APIRouter(
     prefix="/messages",
     tags=["Messages"]
 )
 
-@router.post("/direct", response_model=DirectMessageResponse, status_code=status.HTTP_201_CREATED)
+def single_cursor(before: Optional[str], after: Optional[str], around: Optional[str]):
+    """Reject requests combining more than one of before/after/around."""
+    if sum(value is not None for value in (before, after, around)) > 1:
+        raise HTTPException(status_code=400, detail="Use only one of 'before', 'after' or 'around'")
+
+@router.post("/direct", response_model=DirectMessageResponse, status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(rate_limiter.limit("send"))])
 async def send_direct_message(
     payload: SendDirectMessage,
     current_user: UserRecords = Depends(get_current_active_user),
@@ -57,18 +71,22 @@ async def send_direct_message(
     """
     return await send_direct_message_service(payload, current_user, db)
 
-@router.get("/direct/{contact_id}", response_model=List[DirectMessageResponse])
+@router.get("/direct/{contact_id}", response_model=DirectMessagePage)
 async def get_direct_messages(
     contact_id: str,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None, description="Cursor: messages older than this position"),
+    after: Optional[str] = Query(None, description="Cursor: messages newer than this position"),
+    around: Optional[str] = Query(None, description="Message ID: messages surrounding this message"),
     current_user: UserRecords = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get chat history with a specific contact.
+    Get chat history with a specific contact, newest first.
+    Follow before_cursor / after_cursor from the response to scroll.
     """
-    return await get_direct_messages_service(contact_id, current_user, db, limit, offset)
+    single_cursor(before, after, around)
+    return await get_direct_messages_service(contact_id, current_user, db, limit, before, after, around)
 
 @router.post("/groups", response_model=GroupResponse, status_code=status.HTTP_201_CREATED)
 async def create_group(
@@ -91,7 +109,8 @@ async def get_user_groups(
     """
     return await get_user_groups_service(current_user, db)
 
-@router.post("/groups/{group_id}/messages", response_model=GroupMessageResponse)
+@router.post("/groups/{group_id}/messages", response_model=GroupMessageResponse,
+             dependencies=[Depends(rate_limiter.limit("send"))])
 async def send_group_message(
     group_id: str,
     payload: SendGroupMessage,
@@ -103,18 +122,22 @@ async def send_group_message(
     """
     return await send_group_message_service(group_id, payload, current_user, db)
 
-@router.get("/groups/{group_id}/messages", response_model=List[GroupMessageResponse])
+@router.get("/groups/{group_id}/messages", response_model=GroupMessagePage)
 async def get_group_messages(
     group_id: str,
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None, description="Cursor: messages older than this position"),
+    after: Optional[str] = Query(None, description="Cursor: messages newer than this position"),
+    around: Optional[str] = Query(None, description="Message ID: messages surrounding this message"),
     current_user: UserRecords = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get messages from a group chat.
+    Get messages from a group chat, newest first.
+    Follow before_cursor / after_cursor from the response to scroll.
     """
-    return await get_group_messages_service(group_id, current_user, db, limit, offset)
+    single_cursor(before, after, around)
+    return await get_group_messages_service(group_id, current_user, db, limit, before, after, around)
 
 @router.get("/unread", response_model=List[DirectMessageResponse])
 async def get_unread_messages(
@@ -138,6 +161,40 @@ async def get_unread_count(
     """
     return await get_unread_count_service(current_user, db)
 
+@router.get("/conversations", response_model=ConversationPage)
+async def get_conversations(
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = Query(None, description="Cursor: conversations with older activity than this position"),
+    current_user: UserRecords = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get your direct and group conversations, most recent activity first,
+    with the last message preview and unread count of each.
+    Follow before_cursor from the response to load more.
+    """
+    return await get_conversations_service(current_user, db, limit, before)
+
+@router.get("/search", response_model=MessageSearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find; the last one also matches as a prefix"),
+    order: Literal["relevance", "recent"] = Query("relevance"),
+    conversation_type: Optional[ConversationType] = Query(None, description="Only Direct or only Group messages"),
+    contact_id: Optional[str] = Query(None, description="Only the conversation with this contact"),
+    group_id: Optional[str] = Query(None, description="Only this group"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    current_user: UserRecords = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search your direct and group messages.
+    Follow next_cursor from the response to load more.
+    """
+    return await search_messages_service(
+        current_user, db, q, limit, cursor, order, conversation_type, contact_id, group_id
+    )
+
 @router.post("/mark-read")
 async def mark_messages_as_read(
     payload: MarkAsReadRequest,
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from config import settings
+from database.database import engine
+from utilities.metrics import registry, Counter, Gauge, CONTENT_TYPE
+from utilities.websocket_manager import manager
+from utilities.principal_cache import principal_cache
+from utilities.group_cache import group_cache
+from utilities.contact_cache import contact_cache
+from utilities.password_hasher import password_hasher
+from utilities.typing_indicator import typing_relay
+from utilities.rate_limiter import rate_limiter
+import secrets
+
+router = APIRouter(tags=["Monitoring"])
+
+# Values below are read from their owners when scraped, nothing is tracked twice
+
+Gauge(
+    "pinge_db_pool_connections", "Connections of the database pool by state", ["state"]
+).set_function(lambda: {
+    ("checked_out",): engine.pool.checkedout(),
+    ("idle",): engine.pool.checkedin(),
+    ("overflow",): max(engine.pool.overflow(), 0),
+})
+Gauge("pinge_db_pool_size", "Configured size of the database pool").set_function(engine.pool.size)
+
+Gauge(
+    "pinge_ws_connections", "Open WebSocket connections on this worker"
+).set_function(manager.connection_count)
+Gauge(
+    "pinge_ws_connected_users", "Users with at least one WebSocket on this worker"
+).set_function(lambda: len(manager.active_connections))
+Gauge(
+    "pinge_ws_replay_streams", "Users whose events are numbered and buffered on this worker"
+).set_function(lambda: len(manager.streams))
+
+CACHES = {"principal": principal_cache, "group": group_cache, "contact": contact_cache}
+Gauge("pinge_cache_entries", "Entries held by each cache", ["cache"]).set_function(
+    lambda: {(name,): cache.stats()["size"] for name, cache in CACHES.items()}
+)
+Counter("pinge_cache_hits_total", "Cache lookups served from memory", ["cache"]).set_function(
+    lambda: {(name,): cache.hits for name, cache in CACHES.items()}
+)
+Counter("pinge_cache_misses_total", "Cache lookups that went to the database", ["cache"]).set_function(
+    lambda: {(name,): cache.misses for name, cache in CACHES.items()}
+)
+
+Gauge(
+    "pinge_password_hash_pending", "Password hash operations queued or running"
+).set_function(lambda: password_hasher.pending)
+Counter(
+    "pinge_password_hash_completed_total", "Password hash operations completed successfully"
+).set_function(lambda: password_hasher.completed)
+Counter(
+    "pinge_password_hash_failed_total", "Password hash operations that raised (e.g. malformed stored hash)"
+).set_function(lambda: password_hasher.failed)
+Counter(
+    "pinge_password_hash_rejected_total", "Password hash operations rejected with 503 (queue full)"
+).set_function(lambda: password_hasher.rejected)
+
+Counter(
+    "pinge_typing_events_total", "typing_start/typing_stop frames by outcome", ["outcome"]
+).set_function(lambda: {("relayed",): typing_relay.relayed, ("suppressed",): typing_relay.suppressed})
+
+Counter(
+    "pinge_rate_limit_rejected_total", "Requests and WebSocket frames rejected by a rate limit"
+).set_function(lambda: rate_limiter.rejected)
+
+
+def require_metrics_token(request: Request):
+    """Check the scraper's bearer token when metrics_token is set."""
+    if not settings.metrics_token:
+        return
+    expected = f"Bearer {settings.metrics_token}"
+    if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """Prometheus metrics of this worker, in the text exposition format (every series labelled with its pid)."""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
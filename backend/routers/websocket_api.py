@@ -1,64 +1,81 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
 from utilities.websocket_manager import manager
 from utilities.authentication_service import get_current_user
-from database.database import get_db
-from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
-from config import SECRET_KEY, ALGORITHM
-from database.models import UserRecords
+from utilities.principal_cache import principal_cache, AuthenticatedUser
+from utilities.ws_protocol import handle_client_frame
+from database.database import AsyncSessionLocal
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["WebSocket"])
 
-async def get_user_from_token(token: str, db: AsyncSession):
+# Close code for missing, invalid or revoked tokens
+AUTH_FAILED_CLOSE_CODE = 4003
+
+async def get_user_from_token(token: str) -> Optional[AuthenticatedUser]:
     """
     Validate token and get user for WebSocket connection.
-    Manual validation since WebSocket doesn't support Authorization header nicely in all clients.
+    Same checks as the REST API (signature, active session, active user), served
+    from the principal cache while the token stays valid.
     """
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-            
-        # Verify user exists
-        # In a real app we might want to cache this or simplify checks for WS performance
-        # For now, we trust the token signature + user_id presence
-        return user_id
-    except JWTError:
+        async with AsyncSessionLocal() as db:
+            return await get_current_user(token, db)
+    except HTTPException:
         return None
 
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket, 
-    token: str = Query(...)
+    token: str = Query(...),
+    last_seq: Optional[int] = Query(None, ge=0),
+    epoch: Optional[str] = Query(None)
 ):
     """
     WebSocket endpoint for real-time connection.
     Requires 'token' query parameter.
+
+    The first frame is a `session` event with the stream epoch and current seq;
+    every event after it carries a `seq`. To resume after a drop, reconnect with
+    `last_seq` and `epoch`: missed events are replayed, or a `resync` event
+    asks the client to refetch over HTTP.
+
+    Besides receiving events, clients can send commands over the socket
+    (send_direct, send_group, mark_read, typing_start, typing_stop, ack); see utilities/ws_protocol.py.
+    Any frame counts as a heartbeat: sockets silent for `presence_timeout`
+    seconds are closed.
     """
-    # Verify token
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-        if not user_id:
-            await websocket.close(code=4003)
-            return
-    except JWTError:
-        await websocket.close(code=4003)
+    user = await get_user_from_token(token)
+    if user is None:
+        await websocket.close(code=AUTH_FAILED_CLOSE_CODE)
         return
 
-    await manager.connect(websocket, user_id)
+    user_id = str(user.user_id)
+    connection = await manager.connect(websocket, user_id, last_seq=last_seq, epoch=epoch)
     
     try:
         while True:
-            # Wait for messages from the client
-            # Clients can send "ping" or status updates
-            data = await websocket.receive_json()
-            
-            # Handle client types if needed (e.g. "typing_start", "typing_stop")
-            # For now we just echo or log
+            raw = await websocket.receive_text()
+            connection.touch()
+
+            # Re-check the token on every command so logout takes effect on open sockets;
+            # a principal cache hit costs nothing
+            user = await get_user_from_token(token)
+            if user is None:
+                await manager.disconnect(websocket, user_id)
+                await websocket.close(code=AUTH_FAILED_CLOSE_CODE)
+                return
+
+            reply = await handle_client_frame(raw, user)
+            await manager.reply(connection, reply)
             
     except WebSocketDisconnect:
-        manager.disconnect(websocket, user_id)
+        await manager.disconnect(websocket, user_id)
     except Exception as e:
-        manager.disconnect(websocket, user_id)
+        logger.error(f"WebSocket error for {user_id}: {e}")
+        await manager.disconnect(websocket, user_id)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr
 from database.db_enum import GenderEnum
 from datetime import datetime
 from uuid import UUID
@@ -14,7 +14,7 @@ class RegisterUser(BaseModel):
 
 # =================== Response Schema ===================
 class UserResponse(BaseModel):
-    user_id: str
+    user_id: UUID
     username: str
     email: EmailStr
     gender: GenderEnum
@@ -23,12 +23,6 @@ class UserResponse(BaseModel):
 
     class Config:
         from_attributes = True
-
-    @field_validator('user_id', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
     
 class LoginResponse(BaseModel):
     access_token: str
@@ -2,6 +2,7 @@ from pydantic import BaseModel, field_validator
 from datetime import datetime
 from uuid import UUID
 from typing import List, Optional
+from database.db_enum import ConversationType
 
 class SendDirectMessage(BaseModel):
     receiver_id: str
@@ -16,9 +17,9 @@ class SendDirectMessage(BaseModel):
             raise ValueError('Invalid UUID format')
 
 class DirectMessageResponse(BaseModel):
-    message_id: str
-    sender_id: str
-    receiver_id: str
+    message_id: UUID
+    sender_id: UUID
+    receiver_id: UUID
     content: str
     is_read: bool
     sent_at: datetime
@@ -26,11 +27,10 @@ class DirectMessageResponse(BaseModel):
     class Config:
         from_attributes = True
 
-    @field_validator('message_id', 'sender_id', 'receiver_id', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
+class DirectMessagePage(BaseModel):
+    messages: List[DirectMessageResponse]
+    before_cursor: Optional[str]  # pass as ?before= to load older messages
+    after_cursor: Optional[str]   # pass as ?after= to load newer messages
 
 class CreateGroup(BaseModel):
     name: str
@@ -41,25 +41,19 @@ class SendGroupMessage(BaseModel):
     content: str
 
 class GroupResponse(BaseModel):
-    group_id: str
+    group_id: UUID
     name: str
     description: Optional[str]
-    created_by: str
+    created_by: UUID
     created_at: datetime
     
     class Config:
         from_attributes = True
 
-    @field_validator('group_id', 'created_by', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
-
 class GroupMessageResponse(BaseModel):
-    message_id: str
-    group_id: str
-    sender_id: str
+    message_id: UUID
+    group_id: UUID
+    sender_id: UUID
     sender_name: str
     content: str
     sent_at: datetime
@@ -67,35 +61,22 @@ class GroupMessageResponse(BaseModel):
     class Config:
         from_attributes = True
 
-    @field_validator('message_id', 'group_id', 'sender_id', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
+class GroupMessagePage(BaseModel):
+    messages: List[GroupMessageResponse]
+    before_cursor: Optional[str]  # pass as ?before= to load older messages
+    after_cursor: Optional[str]   # pass as ?after= to load newer messages
 
 class UnreadMessageCount(BaseModel):
-    contact_id: str
+    contact_id: UUID
     contact_name: str
     unread_count: int
-    last_message_at: Optional[datetime]
-
-    @field_validator('contact_id', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
+    last_message_at: Optional[datetime]  # last activity in the conversation, possibly the user's own message
 
 class GroupUnreadCount(BaseModel):
-    group_id: str
+    group_id: UUID
     group_name: str
     unread_count: int
-    last_message_at: Optional[datetime]
-
-    @field_validator('group_id', mode="before")
-    def uuid_to_str(cls, v):
-        if isinstance(v, UUID):
-            return str(v)
-        return v
+    last_message_at: Optional[datetime]  # last activity in the group, possibly the user's own message
 
 class UnreadSummary(BaseModel):
     total_unread: int
@@ -103,6 +84,34 @@ class UnreadSummary(BaseModel):
     groups_with_unread: List[GroupUnreadCount]
     total_group_unread: int
 
+class ConversationSummary(BaseModel):
+    conversation_type: ConversationType
+    conversation_id: UUID  # contact's user_id for Direct, group_id for Group
+    name: Optional[str]
+    unread_count: int
+    last_message_id: Optional[UUID]
+    last_sender_id: Optional[UUID]
+    last_message_preview: Optional[str]
+    last_message_at: datetime
+
+class ConversationPage(BaseModel):
+    conversations: List[ConversationSummary]
+    before_cursor: Optional[str]  # pass as ?before= to load older conversations
+
+class MessageSearchResult(BaseModel):
+    conversation_type: ConversationType
+    conversation_id: UUID  # contact's user_id for Direct, group_id for Group
+    message_id: UUID
+    sender_id: UUID
+    sender_name: str
+    content: str
+    sent_at: datetime
+    rank: float
+
+class MessageSearchPage(BaseModel):
+    results: List[MessageSearchResult]
+    next_cursor: Optional[str]  # pass as ?cursor= to load the next page
+
 class MarkAsReadRequest(BaseModel):
     message_ids: List[str]
     
@@ -159,7 +168,7 @@ class ChangeGroupRole(BaseModel):
         return v
 
 class GroupMemberResponse(BaseModel):
-    user_id: str
+    user_id: UUID
     username: str
     email: str
     role: str
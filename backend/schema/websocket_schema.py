@@ -0,0 +1,49 @@
+from pydantic import BaseModel, field_validator, model_validator
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
+from schema.message_schema import SendGroupMessage
+
+# =================== Client -> Server Frames ===================
+class ClientFrame(BaseModel):
+    type: Literal["send_direct", "send_group", "mark_read", "typing_start", "typing_stop", "ack"]
+    id: Optional[str] = None  # client correlation id, echoed in the reply
+    payload: Dict[str, Any] = {}
+
+class WsSendGroupMessage(SendGroupMessage):
+    group_id: str
+
+    @field_validator('group_id')
+    def validate_uuid(cls, v):
+        try:
+            UUID(v)
+            return v
+        except ValueError:
+            raise ValueError('Invalid UUID format')
+
+class WsMarkRead(BaseModel):
+    message_ids: Optional[List[str]] = None  # specific direct messages
+    contact_id: Optional[str] = None         # everything from a contact
+    group_id: Optional[str] = None           # a whole group
+
+    @model_validator(mode="after")
+    def exactly_one_target(self):
+        targets = [self.message_ids, self.contact_id, self.group_id]
+        if sum(target is not None for target in targets) != 1:
+            raise ValueError("Provide exactly one of 'message_ids', 'contact_id' or 'group_id'")
+        return self
+
+class WsTyping(BaseModel):
+    contact_id: Optional[str] = None  # direct conversation
+    group_id: Optional[str] = None    # group conversation
+
+    @model_validator(mode="after")
+    def exactly_one_target(self):
+        if (self.contact_id is None) == (self.group_id is None):
+            raise ValueError("Provide exactly one of 'contact_id' or 'group_id'")
+        for value in (self.contact_id, self.group_id):
+            if value is not None:
+                try:
+                    UUID(value)
+                except ValueError:
+                    raise ValueError('Invalid UUID format')
+        return self
@@ -0,0 +1,128 @@
+"""
+Test setup: the backend directory is importable and the settings the app
+requires at import time are provided, so tests run without a .env file.
+Tests that need Postgres use the `db` or `database_url` fixture and are
+skipped unless TEST_DATABASE_URL points at a scratch database migrated with
+`alembic upgrade head`.
+"""
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+import asyncio
+import json
+import os
+import sys
+
+import orjson
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("config", json.dumps({"DataBase": {
+    "username": "pinge", "password": "pinge", "ip_address": "localhost", "database_name": "pinge_test"
+}}))
+os.environ.setdefault("secret_key", "test-secret-key")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def database_url() -> str:
+    """asyncpg DSN of TEST_DATABASE_URL; skips the test when it is not set."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+@pytest.fixture
+async def db(database_url):
+    """AsyncSession on TEST_DATABASE_URL, inside a transaction rolled back afterwards."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    engine = create_async_engine(database_url.replace("postgresql://", "postgresql+asyncpg://", 1))
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            session = AsyncSession(bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint")
+            try:
+                yield session
+            finally:
+                await session.close()
+                await transaction.rollback()
+    finally:
+        await engine.dispose()
+
+
+async def insert_user(db, n: int):
+    """Insert a minimal user numbered `n` and return its id."""
+    from uuid import UUID
+    from sqlalchemy import text
+
+    user_id = UUID(f"7e570000-0000-4000-8000-{n:012d}")
+    await db.execute(text("""
+        INSERT INTO user_records (user_id, email, username, password, gender, country, is_active, created_at, updated_at)
+        VALUES (:user_id, :email, :username, 'x', 'Male', 'Testland', true, now(), now())
+    """), {"user_id": user_id, "email": f"test{n}@example.com", "username": f"test{n}"})
+    return user_id
+
+
+async def asgi_request(app, method: str, path: str, form: Optional[dict] = None,
+                       client: str = "127.0.0.1") -> Tuple[int, dict, bytes]:
+    """Call an ASGI app once, the way a server would; returns (status, headers, body)."""
+    body = urlencode(form).encode() if form is not None else b""
+    headers = [(b"host", b"test")]
+    if form is not None:
+        headers.append((b"content-type", b"application/x-www-form-urlencoded"))
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": headers,
+        "client": (client, 50000), "server": ("test", 80),
+    }
+    received = False
+    response = {"status": 0, "headers": {}}
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(chunks)
+
+
+class FakeWebSocket:
+    """Stands in for a WebSocket; frames written to it are queued, decoded."""
+    def __init__(self):
+        self.sent: asyncio.Queue = asyncio.Queue()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.sent.put_nowait(orjson.loads(message))
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def receive(self, count: int) -> list:
+        return [await asyncio.wait_for(self.sent.get(), timeout=1.0) for _ in range(count)]
+
+    async def nothing_more(self):
+        await asyncio.sleep(0.01)
+        assert self.sent.empty()
@@ -0,0 +1,41 @@
+from sqlalchemy import select
+import pytest
+
+from conftest import insert_user
+from database.db_enum import ConversationType
+from database.models import Conversation
+from utilities.conversation_service import decrement_direct_unread
+
+pytestmark = pytest.mark.anyio
+
+
+async def unread_counts(db, user_id):
+    result = await db.execute(
+        select(Conversation.conversation_id, Conversation.unread_count).where(Conversation.user_id == user_id)
+    )
+    return dict(result.all())
+
+
+async def test_decrement_direct_unread_subtracts_per_sender_and_clamps_at_zero(db):
+    me, alice, bob, carol = [await insert_user(db, n) for n in range(4)]
+    db.add_all([
+        Conversation(user_id=me, conversation_type=ConversationType.Direct, conversation_id=alice, unread_count=5),
+        Conversation(user_id=me, conversation_type=ConversationType.Direct, conversation_id=bob, unread_count=2),
+        Conversation(user_id=me, conversation_type=ConversationType.Direct, conversation_id=carol, unread_count=4),
+    ])
+    await db.flush()
+
+    # More read than counted (the counter drifted): clamped at zero, never negative
+    await decrement_direct_unread(db, me, {alice: 3, bob: 7})
+
+    assert await unread_counts(db, me) == {alice: 2, bob: 0, carol: 4}
+
+
+async def test_decrement_direct_unread_without_reads_is_a_no_op(db):
+    me, alice = [await insert_user(db, n) for n in range(2)]
+    db.add(Conversation(user_id=me, conversation_type=ConversationType.Direct, conversation_id=alice, unread_count=1))
+    await db.flush()
+
+    await decrement_direct_unread(db, me, {})
+
+    assert await unread_counts(db, me) == {alice: 1}
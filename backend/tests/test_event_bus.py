@@ -0,0 +1,103 @@
+import asyncio
+from uuid import uuid4
+
+import asyncpg
+import orjson
+import pytest
+
+from conftest import FakeWebSocket
+from utilities.event_bus import PG_NOTIFY_MAX_PAYLOAD, InProcessEventBus, PostgresEventBus
+from utilities.websocket_manager import ConnectionManager
+
+pytestmark = pytest.mark.anyio
+
+
+class Inbox:
+    """Handler collecting what a channel delivers."""
+    def __init__(self):
+        self.messages: asyncio.Queue = asyncio.Queue()
+
+    async def __call__(self, message: str):
+        self.messages.put_nowait(message)
+
+    async def next(self) -> str:
+        return await asyncio.wait_for(self.messages.get(), timeout=5.0)
+
+
+async def test_in_process_bus_routes_each_message_to_its_channel():
+    bus = InProcessEventBus()
+    first, second = Inbox(), Inbox()
+    await bus.subscribe("first", first)
+    await bus.subscribe("second", second)
+
+    await bus.publish_many([("first", "a"), ("second", "b"), ("nobody", "c"), ("first", "d")])
+
+    assert [await first.next(), await first.next()] == ["a", "d"]
+    assert await second.next() == "b"
+    await bus.unsubscribe("second")
+    await bus.publish("second", "e")
+    assert second.messages.empty()
+
+
+async def test_failing_handler_does_not_stop_delivery():
+    bus = InProcessEventBus()
+    inbox = Inbox()
+
+    async def broken(message):
+        raise RuntimeError("handler bug")
+
+    await bus.subscribe("broken", broken)
+    await bus.subscribe("fine", inbox)
+    await bus.publish_many([("broken", "a"), ("fine", "b")])
+    assert await inbox.next() == "b"
+
+
+@pytest.fixture
+async def postgres_buses(database_url):
+    """Two Postgres buses, as two workers would hold; spilled rows of the test are removed afterwards."""
+    buses = [PostgresEventBus(database_url, pool_size=2) for _ in range(2)]
+    for bus in buses:
+        await bus.start()
+    prefix = f"test:{uuid4().hex[:8]}:"
+    yield buses, prefix
+    for bus in buses:
+        await bus.stop()
+    conn = await asyncpg.connect(database_url)
+    try:
+        await conn.execute("DELETE FROM event_bus_payloads WHERE channel LIKE $1 || '%'", prefix)
+    finally:
+        await conn.close()
+
+
+async def test_postgres_bus_spills_oversized_payloads(postgres_buses, database_url):
+    (publisher, listener), prefix = postgres_buses
+    inbox = Inbox()
+    await listener.subscribe(prefix + "big", inbox)
+    small = "x" * 100
+    large = "é" * PG_NOTIFY_MAX_PAYLOAD  # over the limit in bytes, not in characters
+
+    await publisher.publish_many([(prefix + "big", small), (prefix + "big", large)])
+
+    assert {await inbox.next(), await inbox.next()} == {small, large}
+    conn = await asyncpg.connect(database_url)
+    try:
+        spilled = await conn.fetch("SELECT payload FROM event_bus_payloads WHERE channel = $1", prefix + "big")
+    finally:
+        await conn.close()
+    assert [row["payload"] for row in spilled] == [large]
+
+
+async def test_send_to_users_fans_out_across_workers(postgres_buses):
+    buses, prefix = postgres_buses
+    managers = [ConnectionManager(bus) for bus in buses]
+    sockets = {f"{prefix}u1": FakeWebSocket(), f"{prefix}u2": FakeWebSocket()}
+    for manager, (user_id, websocket) in zip(managers, sockets.items()):
+        await manager.connect(websocket, user_id)
+        await websocket.receive(1)
+
+    event = {"event": "new_message", "data": {"text": "hi"}}
+    await managers[0].send_to_users(event, list(sockets))
+
+    for websocket in sockets.values():
+        frame, = await websocket.receive(1)
+        assert frame == {"seq": 1, **event}
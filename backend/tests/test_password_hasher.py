@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+from utilities.password_hasher import PasswordHasher
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=4)
+    yield hasher
+    hasher.shutdown()
+
+
+async def test_hash_then_verify_counts_completed(hasher):
+    hashed = await hasher.hash("secret")
+    assert (await hasher.verify_and_update("secret", hashed))[0]
+    assert hasher.stats()["completed"] == 2
+    assert hasher.stats()["failed"] == 0
+
+
+async def test_errors_count_as_failed(hasher):
+    with pytest.raises(ValueError):
+        await hasher.verify_and_update("secret", "not a bcrypt hash")
+    assert hasher.stats()["failed"] == 1
+    assert hasher.stats()["queue_depth"] == 0
+
+
+async def test_cancelled_call_is_not_a_failure(hasher):
+    release = threading.Event()
+    task = asyncio.get_running_loop().create_task(hasher._run(release.wait))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    release.set()
+
+    assert hasher.stats() == {"queue_depth": 0, "workers": 1, "completed": 0, "failed": 0, "rejected": 0}
@@ -0,0 +1,77 @@
+from fastapi import HTTPException
+import pytest
+
+from conftest import asgi_request
+from main import app
+from routers import authentication_api
+from utilities.rate_limiter import MemoryRateLimitStore, RateLimit, RateLimiter, rate_limiter
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "owner@example.com"
+PASSWORD = "correct horse"
+
+
+@pytest.fixture
+def login_limit(monkeypatch):
+    """Two login attempts per minute, fresh buckets, and a login service that only checks the password."""
+    monkeypatch.setattr(rate_limiter, "store", MemoryRateLimitStore())
+    monkeypatch.setitem(rate_limiter.limits, "login", RateLimit.parse("2/minute"))
+
+    async def login_user_service(payload, db):
+        if payload["password"] != PASSWORD:
+            raise HTTPException(status_code=401, detail="Incorrect email or password")
+        return {"access_token": "token", "token_type": "bearer"}
+
+    monkeypatch.setattr(authentication_api, "login_user_service", login_user_service)
+
+
+async def login(password: str, client: str) -> int:
+    status, _, _ = await asgi_request(
+        app, "POST", "/authentication/login", form={"username": EMAIL, "password": password}, client=client
+    )
+    return status
+
+
+async def test_throttled_client_does_not_lock_out_the_account_owner(login_limit):
+    attacker, owner = "203.0.113.7", "198.51.100.20"
+    assert await login("guess 1", attacker) == 401
+    assert await login("guess 2", attacker) == 401
+    assert await login(PASSWORD, attacker) == 429
+
+    assert await login(PASSWORD, owner) == 200
+
+
+async def test_login_bucket_ignores_email_case_and_whitespace(login_limit):
+    client = "203.0.113.7"
+    for username in (EMAIL, f"  {EMAIL.upper()} "):
+        await asgi_request(app, "POST", "/authentication/login",
+                           form={"username": username, "password": "guess"}, client=client)
+    assert await login(PASSWORD, client) == 429
+
+
+class BrokenStore:
+    async def take(self, key, limit):
+        raise ConnectionError("limiter store unreachable")
+
+
+async def test_check_allows_until_the_bucket_is_empty():
+    limiter = RateLimiter(MemoryRateLimitStore(), {"send": RateLimit.parse("3/minute")})
+    for _ in range(3):
+        await limiter.check("send", "user-1")
+
+    with pytest.raises(HTTPException) as denied:
+        await limiter.check("send", "user-1")
+    assert denied.value.status_code == 429
+    assert 1 <= int(denied.value.headers["Retry-After"]) <= 20
+    assert limiter.rejected == 1
+
+    # Buckets are per identity
+    await limiter.check("send", "user-2")
+
+
+async def test_check_fails_open_when_the_store_is_down():
+    limiter = RateLimiter(BrokenStore(), {"send": RateLimit.parse("1/minute")})
+    for _ in range(3):
+        await limiter.check("send", "user-1")
+    assert limiter.rejected == 0
@@ -0,0 +1,99 @@
+import orjson
+import pytest
+
+from conftest import FakeWebSocket
+from utilities.event_bus import InProcessEventBus
+from utilities.websocket_manager import ConnectionManager, UserStream
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def manager():
+    manager = ConnectionManager(InProcessEventBus(), replay_buffer=3)
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+def event(n: int) -> dict:
+    return {"event": "new_message", "data": {"n": n}}
+
+
+def test_stream_returns_only_the_frames_after_last_seq():
+    stream = UserStream(size=3)
+    for n in range(1, 6):
+        stream.append(orjson.dumps(event(n)).decode())
+
+    assert [orjson.loads(frame)["seq"] for frame in stream.missed(2)] == [3, 4, 5]
+    assert [orjson.loads(frame)["data"]["n"] for frame in stream.missed(4)] == [5]
+    assert stream.missed(5) == []
+
+
+def test_stream_asks_for_resync_when_frames_are_gone():
+    stream = UserStream(size=3)
+    for n in range(1, 6):
+        stream.append(orjson.dumps(event(n)).decode())
+
+    assert stream.missed(1) is None  # seq 2 rolled out of the buffer
+    assert stream.missed(6) is None  # ahead of this stream: another epoch's numbering
+
+
+async def test_reconnect_replays_missed_events(manager):
+    first = FakeWebSocket()
+    await manager.connect(first, "u1")
+    session, = await first.receive(1)
+    epoch = session["data"]["epoch"]
+
+    await manager.send_personal_message(event(1), "u1")
+    await manager.send_personal_message({"event": "typing", "data": {}}, "u1", replay=False)
+    numbered, typing = await first.receive(2)
+    assert numbered["seq"] == 1
+    assert "seq" not in typing
+
+    await manager.disconnect(first, "u1")
+    await manager.send_personal_message(event(2), "u1")
+    await manager.send_personal_message(event(3), "u1")
+
+    second = FakeWebSocket()
+    await manager.connect(second, "u1", last_seq=1, epoch=epoch)
+    session, *replayed = await second.receive(3)
+    assert session["data"] == {"epoch": epoch, "seq": 3}
+    assert [(frame["seq"], frame["data"]["n"]) for frame in replayed] == [(2, 2), (3, 3)]
+    await second.nothing_more()
+
+
+async def test_reconnect_resyncs_on_another_epoch_or_overflow(manager):
+    first = FakeWebSocket()
+    await manager.connect(first, "u1")
+    session, = await first.receive(1)
+    epoch = session["data"]["epoch"]
+    await manager.disconnect(first, "u1")
+
+    stale = FakeWebSocket()
+    await manager.connect(stale, "u1", last_seq=0, epoch="other-worker")
+    assert [frame["event"] for frame in await stale.receive(2)] == ["session", "resync"]
+    await manager.disconnect(stale, "u1")
+
+    # More events than the buffer holds (3) while away
+    for n in range(1, 5):
+        await manager.send_personal_message(event(n), "u1")
+    behind = FakeWebSocket()
+    await manager.connect(behind, "u1", last_seq=0, epoch=epoch)
+    assert [frame["event"] for frame in await behind.receive(2)] == ["session", "resync"]
+    await behind.nothing_more()
+
+
+async def test_send_to_users_reaches_every_socket_of_every_user(manager):
+    sockets = {"u1": [FakeWebSocket(), FakeWebSocket()], "u2": [FakeWebSocket()], "u3": [FakeWebSocket()]}
+    for user_id, websockets in sockets.items():
+        for websocket in websockets:
+            await manager.connect(websocket, user_id)
+            await websocket.receive(1)
+
+    await manager.send_to_users(event(7), ["u1", "u2"])
+
+    for websocket in sockets["u1"] + sockets["u2"]:
+        frame, = await websocket.receive(1)
+        assert frame == {"seq": 1, **event(7)}
+    await sockets["u3"][0].nothing_more()
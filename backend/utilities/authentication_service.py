@@ -6,28 +6,21 @@ from database.database import get_db
 from schema.auth_schema import RegisterUser
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 from config import SECRET_KEY, ALGORITHM
+from utilities.principal_cache import principal_cache, AuthenticatedUser
+from utilities.password_hasher import password_hasher
 import logging
 from fastapi.security import OAuth2PasswordBearer
 
 logger = logging.getLogger(__name__)
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="authentication/login")
 
 
-def hash_password(password: str) -> str:
-    """Hash a plain text password"""
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def hash_password(password: str) -> str:
+    """Hash a plain text password (off the event loop)"""
+    return await password_hasher.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
@@ -56,17 +49,20 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> UserRecords:
+) -> AuthenticatedUser:
     """
     Dependency to get the current authenticated user from JWT token.
     Validates token and checks if session is still active.
     
+    Verified tokens are served from the principal cache, so a cache hit
+    costs no database round trip.
+    
     Args:
         token: JWT access token from Authorization header
         db: Database session
     
     Returns:
-        UserRecords object of authenticated user
+        AuthenticatedUser snapshot of the authenticated user
     
     Raises:
         HTTPException: If token is invalid or session is inactive
@@ -77,14 +73,18 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Check if token is empty or invalid format
+    if not token or not token.strip():
+        logger.warning("Empty or whitespace token received")
+        raise credentials_exception
+
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
         # Log token for debugging (first 20 chars only for security)
-        logger.debug(f"Received token: {token[:20] if token else 'None'}... (length: {len(token) if token else 0})")
-        
-        # Check if token is empty or invalid format
-        if not token or not token.strip():
-            logger.warning("Empty or whitespace token received")
-            raise credentials_exception
+        logger.debug(f"Received token: {token[:20]}... (length: {len(token)})")
             
         # Decode JWT token
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -94,33 +94,33 @@ async def get_current_user(
             logger.warning("Token missing 'sub' claim")
             raise credentials_exception
         
-        # Check if session exists and is active
+        # Fetch the active session and its user in one round trip
         result = await db.execute(
-            select(UserSession).where(
+            select(UserSession, UserRecords).join(
+                UserRecords, UserSession.user_id == UserRecords.user_id
+            ).where(
                 UserSession.access_token == token,
                 UserSession.is_active == True
             )
         )
-        session = result.scalar_one_or_none()
+        row = result.first()
         
-        if not session:
+        if not row:
             logger.warning(f"No active session found for token")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Session expired or invalid. Please login again."
             )
         
-        # Fetch user
-        user_result = await db.execute(
-            select(UserRecords).where(UserRecords.user_id == user_id)
-        )
-        user = user_result.scalar_one_or_none()
+        session, user = row
         
-        if not user or not user.is_active:
+        if str(user.user_id) != user_id or not user.is_active:
             logger.warning(f"User {user_id} not found or inactive")
             raise credentials_exception
         
-        return user
+        current_user = AuthenticatedUser.from_record(user)
+        principal_cache.put(token, current_user, token_exp=payload.get("exp"))
+        return current_user
         
     except JWTError as e:
         logger.error(f"JWT decode error: {e}")
@@ -128,8 +128,8 @@ async def get_current_user(
 
 
 async def get_current_active_user(
-    current_user: UserRecords = Depends(get_current_user)
-) -> UserRecords:
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
     """
     Dependency to ensure user is active.
     Can be extended for additional checks (email verified, etc.)
@@ -178,7 +178,7 @@ async def register_user_service(payload: RegisterUser, db: AsyncSession):
     new_user = UserRecords(
         email=payload.email,
         username=payload.username,
-        password=hash_password(payload.password),
+        password=await hash_password(payload.password),
         gender=payload.gender,
         country=payload.country
     )
@@ -215,7 +215,11 @@ async def login_user_service(payload: dict, db: AsyncSession):
     result = await db.execute(select(UserRecords).where(UserRecords.email == email))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(password, user.password):
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+
+    if not verified:
         logger.warning(f"Failed login attempt for email: {email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -229,6 +233,10 @@ async def login_user_service(payload: dict, db: AsyncSession):
             detail="Account is inactive. Please contact support."
         )
 
+    # Stored hash uses an outdated bcrypt cost: save the rehash with the new session
+    if new_hash:
+        user.password = new_hash
+
     # 2. Create JWT token payload
     token_data = {
         "sub": str(user.user_id),
@@ -291,6 +299,7 @@ async def logout_user_service(access_token: str, db: AsyncSession):
 
     session.is_active = False
     await db.commit()
+    await principal_cache.revoke(access_token)
     
     logger.info(f"User logged out: Session {session.session_id}")
     return {"message": "Logged out successfully"}
@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import FrozenSet
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import Contact
+from utilities.event_bus import event_bus, control_channel
+from config import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = control_channel("contact_invalidate")
+
+
+class ContactCache:
+    """
+    Bounded TTL/LRU cache mapping a user to the ids of their contacts.
+
+    Serves high-frequency contact lookups (typing indicators, presence
+    fan-out) from memory: one query loads all of a user's contacts, after
+    which they are served without touching the database. Services that add or
+    remove contacts call revoke() for both users after committing, which drops
+    the entries on every worker through the event bus; the TTL only bounds
+    staleness if an invalidation is lost.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._invalidations = 0
+
+    async def get_contacts(self, db: AsyncSession, user_id: UUID) -> FrozenSet[UUID]:
+        """Ids of the user's contacts."""
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, contacts = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return contacts
+            del self._entries[user_id]
+        self.misses += 1
+
+        invalidations = self._invalidations
+        result = await db.execute(select(Contact.contact_id).where(Contact.user_id == user_id))
+        contacts = frozenset(result.scalars())
+        # Don't cache a result that may predate an invalidation received while loading
+        if invalidations == self._invalidations:
+            self._entries[user_id] = (time.monotonic() + self.ttl, contacts)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return contacts
+
+    async def is_contact(self, db: AsyncSession, user_id: UUID, contact_id: UUID) -> bool:
+        return contact_id in await self.get_contacts(db, user_id)
+
+    def invalidate(self, user_id: UUID):
+        self._invalidations += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    async def attach(self):
+        """Listen for invalidations published by other workers."""
+        await event_bus.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    async def revoke(self, *user_ids: UUID):
+        """Drop users on this worker and on every other worker. Call after committing."""
+        for user_id in user_ids:
+            self.invalidate(user_id)
+        await event_bus.publish_many((INVALIDATION_CHANNEL, str(user_id)) for user_id in user_ids)
+
+    async def _on_invalidation(self, user_id: str):
+        self.invalidate(UUID(user_id))
+
+
+contact_cache = ContactCache(max_size=settings.contact_cache_size, ttl=settings.contact_cache_ttl)
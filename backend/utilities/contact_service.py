@@ -4,6 +4,8 @@ from sqlalchemy import select, or_, and_
 from database.models import UserRecords, ContactRequest, Contact
 from database.db_enum import ContactRequestStatus
 from schema.contact_schema import SendContactRequest
+from utilities.presence import presence_tracker
+from utilities.contact_cache import contact_cache
 from uuid import UUID
 import logging
 
@@ -96,7 +98,7 @@ async def get_pending_requests_service(current_user: UserRecords, db: AsyncSessi
     response = []
     for req, sender in requests:
         response.append({
-            "request_id": str(req.request_id),
+            "request_id": req.request_id,
             "sender_username": sender.username,
             "sender_email": sender.email,
             "receiver_username": current_user.username,
@@ -141,6 +143,7 @@ async def accept_contact_request_service(request_id: str, current_user: UserReco
     db.add(contact2)
     
     await db.commit()
+    await contact_cache.revoke(current_user.user_id, contact_request.sender_id)
     logger.info(f"Contact request accepted: {request_id}")
     return {"message": "Contact request accepted", "contact_id": str(contact_request.sender_id)}
 
@@ -173,7 +176,7 @@ async def reject_contact_request_service(request_id: str, current_user: UserReco
 
 async def get_contacts_service(current_user: UserRecords, db: AsyncSession):
     """
-    Get list of accepted contacts.
+    Get list of accepted contacts, with their presence (read from memory).
     """
     stmt = select(Contact, UserRecords).join(
         UserRecords, Contact.contact_id == UserRecords.user_id
@@ -183,16 +186,20 @@ async def get_contacts_service(current_user: UserRecords, db: AsyncSession):
     
     result = await db.execute(stmt)
     contacts = result.all()
+    presence = presence_tracker.lookup(str(contact_user.user_id) for _, contact_user in contacts)
     
     response = []
     for contact_rel, contact_user in contacts:
+        contact_presence = presence[str(contact_user.user_id)]
         response.append({
-            "contact_id": str(contact_user.user_id),
+            "contact_id": contact_user.user_id,
             "username": contact_user.username,
             "email": contact_user.email,
             "gender": contact_user.gender,
             "country": contact_user.country,
-            "connected_since": contact_rel.created_at
+            "connected_since": contact_rel.created_at,
+            "is_online": contact_presence["is_online"],
+            "last_seen": contact_presence["last_seen"]
         })
         
     return response
@@ -230,6 +237,7 @@ async def remove_contact_service(contact_id: str, current_user: UserRecords, db:
         await db.delete(reverse_record)
         
     await db.commit()
+    await contact_cache.revoke(current_user.user_id, contact_uuid)
     logger.info(f"Contact removed: {current_user.email} removed {contact_id}")
     
     return {"message": "Contact removed successfully"}
@@ -0,0 +1,285 @@
+from typing import Dict, Iterable, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, and_, desc, func, literal, cast, case, union_all, bindparam, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY, UUID as PG_UUID
+from database.models import UserRecords, GroupChat, GroupMember, Conversation
+from database.db_enum import ConversationType
+from utilities.pagination import fetch_keyset_page
+from uuid import UUID
+
+# Helpers maintaining the conversations table. They only execute (or build)
+# statements: the caller commits, so summaries change in the same transaction
+# as messages.
+
+# Characters of message content kept as the conversation preview
+PREVIEW_LENGTH = 100
+
+CONVERSATION_KEY = [Conversation.user_id, Conversation.conversation_type, Conversation.conversation_id]
+
+CONVERSATION_COLUMNS = [
+    "user_id", "conversation_type", "conversation_id", "unread_count",
+    "last_message_id", "last_sender_id", "last_message_preview", "last_message_at"
+]
+
+
+def upsert_last_message(rows):
+    """
+    INSERT rows (in CONVERSATION_COLUMNS order) into conversations; existing rows
+    add to their unread count and take the new last message.
+
+    Rows are inserted, and existing ones row-locked, in the order `rows` yields
+    them: callers order by user_id so concurrent sends to the same conversation
+    lock in the same order and wait on each other instead of deadlocking.
+    """
+    stmt = insert(Conversation).from_select(CONVERSATION_COLUMNS, rows)
+    return stmt.on_conflict_do_update(
+        index_elements=CONVERSATION_KEY,
+        set_={
+            "unread_count": Conversation.unread_count + stmt.excluded.unread_count,
+            "last_message_id": stmt.excluded.last_message_id,
+            "last_sender_id": stmt.excluded.last_sender_id,
+            "last_message_preview": stmt.excluded.last_message_preview,
+            "last_message_at": stmt.excluded.last_message_at
+        }
+    )
+
+
+def conversation_type_literal(value: ConversationType):
+    return cast(literal(value.value), Conversation.conversation_type.type)
+
+
+def record_direct_message(message):
+    """
+    Upsert recording a new direct message on both participants' conversation rows.
+    The receiver's unread count goes up by one.
+
+    Args:
+        message: CTE of the inserted message (message_id, sender_id, receiver_id, content, sent_at)
+    """
+    def side(user_id, other_id, unread):
+        values = [
+            user_id,
+            conversation_type_literal(ConversationType.Direct),
+            other_id,
+            cast(literal(unread), Integer),
+            message.c.message_id,
+            message.c.sender_id,
+            func.left(message.c.content, PREVIEW_LENGTH),
+            message.c.sent_at
+        ]
+        # Named after the target columns, so both sides line up once wrapped for ordering
+        return select(*(value.label(name) for value, name in zip(values, CONVERSATION_COLUMNS)))
+
+    sides = union_all(
+        side(message.c.receiver_id, message.c.sender_id, 1),
+        side(message.c.sender_id, message.c.receiver_id, 0).where(message.c.sender_id != message.c.receiver_id)
+    ).subquery("sides")
+    # A -> B and B -> A sends lock the same two rows: take them in user_id order
+    return upsert_last_message(select(sides).order_by(sides.c.user_id))
+
+
+def record_group_message(message):
+    """
+    Upsert recording a new group message on every member's conversation row.
+    Unread counts go up by one for everyone except the sender.
+
+    Writes (and row-locks until commit) one row per member, so a send costs
+    O(members) in the send transaction: a 10k-member group updates 10k rows.
+    Rows are ordered by user_id so concurrent sends to the same group lock
+    them in the same order and queue behind each other rather than deadlock.
+
+    Args:
+        message: CTE of the inserted message (message_id, group_id, sender_id, content, sent_at)
+    """
+    rows = select(
+        GroupMember.user_id,
+        conversation_type_literal(ConversationType.Group),
+        GroupMember.group_id,
+        cast(case((GroupMember.user_id == message.c.sender_id, 0), else_=1), Integer),
+        message.c.message_id,
+        message.c.sender_id,
+        func.left(message.c.content, PREVIEW_LENGTH),
+        message.c.sent_at
+    ).join(message, GroupMember.group_id == message.c.group_id).order_by(GroupMember.user_id)
+    return upsert_last_message(rows)
+
+
+async def add_group_conversations(db: AsyncSession, group_id: UUID, user_ids: Iterable[UUID]):
+    """
+    Give users who just joined a group its conversation row, dated to the join.
+    """
+    rows = [
+        {
+            "user_id": user_id,
+            "conversation_type": ConversationType.Group,
+            "conversation_id": group_id,
+            "unread_count": 0,
+            "last_message_at": func.now()
+        }
+        for user_id in user_ids
+    ]
+    if rows:
+        await db.execute(insert(Conversation).values(rows).on_conflict_do_nothing(index_elements=CONVERSATION_KEY))
+
+
+async def decrement_direct_unread(db: AsyncSession, user_id: UUID, read_per_sender: Dict[UUID, int]):
+    """
+    Subtract messages just marked as read, grouped by sender, in one statement:
+    UPDATE ... FROM unnest(sender ids, read counts), two array parameters
+    however many senders there are.
+    """
+    if not read_per_sender:
+        return
+    sender_ids = bindparam("sender_ids", list(read_per_sender), type_=ARRAY(PG_UUID(as_uuid=True)))
+    read_counts = bindparam("read_counts", list(read_per_sender.values()), type_=ARRAY(Integer))
+    read = select(
+        func.unnest(sender_ids).label("sender_id"),
+        func.unnest(read_counts).label("read_count")
+    ).subquery("read")
+    await db.execute(
+        update(Conversation).where(
+            Conversation.user_id == user_id,
+            Conversation.conversation_type == ConversationType.Direct,
+            Conversation.conversation_id == read.c.sender_id
+        ).values(unread_count=func.greatest(Conversation.unread_count - read.c.read_count, 0))
+    )
+
+
+async def lock_conversation(db: AsyncSession, user_id: UUID, conversation_type: ConversationType, conversation_id: UUID):
+    """
+    Row-lock a user's conversation until commit. Sends update the row with an
+    upsert, so one committing meanwhile waits and adds to the count afterwards
+    instead of being wiped by a reset made in the same transaction.
+    """
+    await db.execute(
+        select(Conversation.unread_count).where(
+            Conversation.user_id == user_id,
+            Conversation.conversation_type == conversation_type,
+            Conversation.conversation_id == conversation_id
+        ).with_for_update()
+    )
+
+
+async def clear_unread(db: AsyncSession, user_id: UUID, conversation_type: ConversationType, conversation_id: UUID):
+    """
+    Reset a conversation to zero unread for a user.
+    """
+    await db.execute(
+        update(Conversation).where(
+            Conversation.user_id == user_id,
+            Conversation.conversation_type == conversation_type,
+            Conversation.conversation_id == conversation_id,
+            Conversation.unread_count != 0
+        ).values(unread_count=0)
+    )
+
+
+async def delete_group_conversations(db: AsyncSession, group_id: UUID, user_ids: Iterable[UUID] = None):
+    """
+    Drop group conversation rows of users leaving a group (all members if user_ids is None).
+    """
+    stmt = delete(Conversation).where(
+        Conversation.conversation_type == ConversationType.Group,
+        Conversation.conversation_id == group_id
+    )
+    if user_ids is not None:
+        stmt = stmt.where(Conversation.user_id.in_(list(user_ids)))
+    await db.execute(stmt)
+
+
+def with_names(stmt):
+    """Join the contact's username or the group's name onto conversation rows."""
+    return stmt.outerjoin(
+        UserRecords, and_(
+            Conversation.conversation_type == ConversationType.Direct,
+            UserRecords.user_id == Conversation.conversation_id
+        )
+    ).outerjoin(
+        GroupChat, and_(
+            Conversation.conversation_type == ConversationType.Group,
+            GroupChat.group_id == Conversation.conversation_id
+        )
+    )
+
+
+async def get_unread_summary(db: AsyncSession, user_id: UUID) -> dict:
+    """
+    Unread counts per contact and per group, read from the conversations in one query.
+
+    last_message_at is the conversation's last activity, not the time of the
+    newest unread message: they differ when the user wrote the latest message.
+    """
+    stmt = with_names(
+        select(Conversation, UserRecords.username, GroupChat.name)
+    ).where(
+        Conversation.user_id == user_id,
+        Conversation.unread_count > 0
+    ).order_by(desc(Conversation.last_message_at))
+
+    result = await db.execute(stmt)
+
+    contacts_with_unread = []
+    groups_with_unread = []
+    total_unread = 0
+    total_group_unread = 0
+
+    for conversation, contact_name, group_name in result.all():
+        if conversation.conversation_type == ConversationType.Direct:
+            contacts_with_unread.append({
+                "contact_id": conversation.conversation_id,
+                "contact_name": contact_name,
+                "unread_count": conversation.unread_count,
+                "last_message_at": conversation.last_message_at
+            })
+            total_unread += conversation.unread_count
+        elif group_name is not None:
+            groups_with_unread.append({
+                "group_id": conversation.conversation_id,
+                "group_name": group_name,
+                "unread_count": conversation.unread_count,
+                "last_message_at": conversation.last_message_at
+            })
+            total_group_unread += conversation.unread_count
+
+    return {
+        "total_unread": total_unread,
+        "contacts_with_unread": contacts_with_unread,
+        "groups_with_unread": groups_with_unread,
+        "total_group_unread": total_group_unread
+    }
+
+
+async def get_conversations_service(current_user: UserRecords, db: AsyncSession, limit: int, before: Optional[str] = None):
+    """
+    The user's conversations, most recent activity first.
+
+    One range scan of ix_conversations_activity per page; pass before_cursor
+    from the response as `before` to load the next page.
+    """
+    stmt = with_names(
+        select(Conversation, UserRecords.username, GroupChat.name)
+    ).where(Conversation.user_id == current_user.user_id)
+
+    rows, before_cursor, _ = await fetch_keyset_page(
+        db, stmt,
+        Conversation.last_message_at, Conversation.conversation_id,
+        key=lambda row: (row[0].last_message_at, row[0].conversation_id),
+        limit=limit,
+        before=before,
+        scalars=False
+    )
+
+    conversations = []
+    for conversation, contact_name, group_name in rows:
+        conversations.append({
+            "conversation_type": conversation.conversation_type,
+            "conversation_id": conversation.conversation_id,
+            "name": contact_name if conversation.conversation_type == ConversationType.Direct else group_name,
+            "unread_count": conversation.unread_count,
+            "last_message_id": conversation.last_message_id,
+            "last_sender_id": conversation.last_sender_id,
+            "last_message_preview": conversation.last_message_preview,
+            "last_message_at": conversation.last_message_at
+        })
+
+    return {"conversations": conversations, "before_cursor": before_cursor}
@@ -0,0 +1,359 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from config import settings
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Handler invoked with the raw (already JSON encoded) payload of a channel
+MessageHandler = Callable[[str], Awaitable[None]]
+
+CHANNEL_PREFIX = "pinge:"
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+PG_NOTIFY_MAX_PAYLOAD = 7999
+
+# Marks a NOTIFY payload that is a reference to a row of event_bus_payloads.
+# No channel carries messages starting with this control character (frames
+# are JSON objects, control messages are ids).
+SPILL_MARKER = "\x1e"
+
+
+def user_channel(user_id: str) -> str:
+    """Channel carrying WebSocket events for a single user."""
+    return f"{CHANNEL_PREFIX}user:{user_id}"
+
+
+def control_channel(name: str) -> str:
+    """Channel shared by every worker (broadcasts, cache invalidations...)."""
+    return f"{CHANNEL_PREFIX}{name}"
+
+
+class EventBus(ABC):
+    """
+    Pub/sub backend used to route WebSocket events between workers.
+
+    Every worker subscribes only to the channels it has a local interest in
+    (e.g. the users it currently holds sockets for), so a publish reaches
+    exactly the workers that can deliver it.
+    One handler is registered per channel.
+    """
+    def __init__(self):
+        self._handlers: Dict[str, MessageHandler] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        self._handlers.clear()
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str):
+        ...
+
+    async def publish_many(self, items: Iterable[Tuple[str, str]]):
+        """Publish several (channel, message) pairs. Backends may batch them."""
+        for channel, message in items:
+            await self.publish(channel, message)
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str):
+        ...
+
+    def is_subscribed(self, channel: str) -> bool:
+        return channel in self._handlers
+
+    async def _dispatch(self, channel: str, message: str):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        try:
+            await handler(message)
+        except Exception as e:
+            logger.error(f"Event bus handler for {channel} failed: {e}")
+
+
+class InProcessEventBus(EventBus):
+    """
+    Single-process backend. Publishing calls the local handler directly.
+    Suitable for development or a single uvicorn worker.
+    """
+    async def publish(self, channel: str, message: str):
+        await self._dispatch(channel, message)
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        self._handlers[channel] = handler
+
+    async def unsubscribe(self, channel: str):
+        self._handlers.pop(channel, None)
+
+
+class PostgresEventBus(EventBus):
+    """
+    Postgres LISTEN/NOTIFY backend.
+
+    A dedicated connection holds the LISTENs of this worker and a small pool
+    is used for publishing, so no extra infrastructure is required.
+
+    Payloads above the NOTIFY size limit are spilled: the body is written to
+    the event_bus_payloads table and only a reference is notified, in the same
+    statement, so listeners fetch it once the insert is visible. Spilled rows
+    are kept `spill_retention` seconds (a listener may be briefly behind) and
+    pruned by publishers. A spilled message may reach a handler after a
+    smaller one published later on the same channel.
+    """
+    def __init__(self, dsn: str, pool_size: int = 4, reconnect_delay: float = 2.0,
+                 spill_retention: float = 300.0):
+        super().__init__()
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.reconnect_delay = reconnect_delay
+        self.spill_retention = spill_retention
+        self._listen_conn = None
+        self._pool = None
+        self._lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Notification handlers in flight; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self._last_prune = 0.0
+
+    async def start(self):
+        import asyncpg
+
+        self._closing = False
+        self._pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=self.pool_size)
+        await self._open_listen_connection()
+
+    async def stop(self):
+        self._closing = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._listen_conn is not None:
+            await self._listen_conn.close()
+            self._listen_conn = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        await super().stop()
+
+    async def _open_listen_connection(self):
+        import asyncpg
+
+        async with self._lock:
+            self._listen_conn = await asyncpg.connect(self.dsn)
+            self._listen_conn.add_termination_listener(self._on_terminated)
+            # Re-issue LISTEN for channels registered before a reconnect
+            for channel in self._handlers:
+                await self._listen_conn.add_listener(channel, self._on_notify)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        task = asyncio.get_running_loop().create_task(self._receive(channel, payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _receive(self, channel: str, payload: str):
+        if payload.startswith(SPILL_MARKER):
+            try:
+                async with self._pool.acquire() as conn:
+                    payload = await conn.fetchval(
+                        "SELECT payload FROM event_bus_payloads WHERE id = $1", int(payload[1:])
+                    )
+            except Exception as e:
+                logger.error(f"Event bus could not fetch spilled payload for {channel}: {e}")
+                return
+            if payload is None:
+                logger.error(f"Spilled event bus payload for {channel} expired before it was read")
+                return
+        await self._dispatch(channel, payload)
+
+    def _on_terminated(self, connection):
+        if self._closing:
+            return
+        logger.error("Event bus LISTEN connection lost, reconnecting")
+        self._listen_conn = None
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while not self._closing:
+            try:
+                await self._open_listen_connection()
+                logger.info("Event bus LISTEN connection re-established")
+                return
+            except Exception as e:
+                logger.error(f"Event bus reconnect failed: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+
+    async def publish(self, channel: str, message: str):
+        await self.publish_many([(channel, message)])
+
+    async def publish_many(self, items: Iterable[Tuple[str, str]]):
+        channels: List[str] = []
+        messages: List[str] = []
+        spilled_channels: List[str] = []
+        spilled_messages: List[str] = []
+        for channel, message in items:
+            if len(message.encode()) <= PG_NOTIFY_MAX_PAYLOAD:
+                channels.append(channel)
+                messages.append(message)
+            else:
+                spilled_channels.append(channel)
+                spilled_messages.append(message)
+        if not channels and not spilled_channels:
+            return
+        async with self._pool.acquire() as conn:
+            if channels:
+                # One round trip for the whole batch
+                await conn.execute(
+                    "SELECT pg_notify(c, m) FROM unnest($1::text[], $2::text[]) AS t(c, m)",
+                    channels,
+                    messages,
+                )
+            if spilled_channels:
+                await conn.execute(
+                    """
+                    WITH spilled AS (
+                        INSERT INTO event_bus_payloads (channel, payload)
+                        SELECT c, m FROM unnest($1::text[], $2::text[]) AS t(c, m)
+                        RETURNING id, channel
+                    )
+                    SELECT pg_notify(channel, $3 || id) FROM spilled
+                    """,
+                    spilled_channels,
+                    spilled_messages,
+                    SPILL_MARKER,
+                )
+                await self._prune_spilled(conn)
+
+    async def _prune_spilled(self, conn):
+        now = time.monotonic()
+        if now - self._last_prune < self.spill_retention / 2:
+            return
+        self._last_prune = now
+        await conn.execute(
+            "DELETE FROM event_bus_payloads WHERE created_at < now() - make_interval(secs => $1)",
+            self.spill_retention,
+        )
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        already = channel in self._handlers
+        self._handlers[channel] = handler
+        if already or self._listen_conn is None:
+            return
+        async with self._lock:
+            await self._listen_conn.add_listener(channel, self._on_notify)
+
+    async def unsubscribe(self, channel: str):
+        if self._handlers.pop(channel, None) is None or self._listen_conn is None:
+            return
+        async with self._lock:
+            await self._listen_conn.remove_listener(channel, self._on_notify)
+
+
+class RedisEventBus(EventBus):
+    """
+    Redis pub/sub backend.
+
+    Accepts any client exposing the `redis.asyncio.Redis` interface
+    (`publish`, `pubsub`, `aclose`), so a local stand-in can be injected.
+    """
+    def __init__(self, client=None, url: str = None, poll_timeout: float = 1.0):
+        super().__init__()
+        self.url = url
+        self.client = client
+        self.poll_timeout = poll_timeout
+        self._pubsub = None
+        self._reader_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.client is None:
+            import redis.asyncio as redis
+
+            self.client = redis.from_url(self.url)
+        self._pubsub = self.client.pubsub()
+        self._reader_task = asyncio.get_running_loop().create_task(self._reader())
+
+    async def stop(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await super().stop()
+
+    async def _reader(self):
+        while True:
+            try:
+                if not self._handlers:
+                    await asyncio.sleep(self.poll_timeout)
+                    continue
+                item = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=self.poll_timeout
+                )
+                if item is None or item.get("type") != "message":
+                    continue
+                channel, data = item["channel"], item["data"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if isinstance(data, bytes):
+                    data = data.decode()
+                await self._dispatch(channel, data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis event bus reader error: {e}")
+                await asyncio.sleep(self.poll_timeout)
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(channel, message)
+
+    async def publish_many(self, items: Iterable[Tuple[str, str]]):
+        async with self.client.pipeline(transaction=False) as pipe:
+            for channel, message in items:
+                pipe.publish(channel, message)
+            await pipe.execute()
+
+    async def subscribe(self, channel: str, handler: MessageHandler):
+        already = channel in self._handlers
+        self._handlers[channel] = handler
+        if not already:
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        if self._handlers.pop(channel, None) is not None:
+            await self._pubsub.unsubscribe(channel)
+
+
+def create_event_bus(backend: str = None) -> EventBus:
+    """
+    Build the event bus configured by the 'event_bus' setting.
+
+    Supported values: 'memory' (default), 'postgres', 'redis'.
+    """
+    backend = (backend or settings.event_bus).lower()
+
+    if backend == "memory":
+        return InProcessEventBus()
+
+    if backend == "postgres":
+        from database.database import DATABASE_URL
+
+        dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+        return PostgresEventBus(dsn)
+
+    if backend == "redis":
+        return RedisEventBus(url=settings.redis_url)
+
+    raise ValueError(f"Unknown event bus backend: {backend}")
+
+
+event_bus = create_event_bus()
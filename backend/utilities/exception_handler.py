@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import logging
 import traceback
 from config import environment
@@ -17,7 +17,7 @@ async def universal_exception_handler(request: Request, exc: Exception):
         exc: The exception that was raised
     
     Returns:
-        JSONResponse with error details
+        ORJSONResponse with error details
     """
     if isinstance(exc, HTTPException):
         # Log HTTP exceptions based on severity
@@ -31,9 +31,10 @@ async def universal_exception_handler(request: Request, exc: Exception):
                 f"HTTP {exc.status_code} on {request.method} {request.url.path}: {exc.detail}"
             )
         
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
-            content={"error": exc.detail}
+            content={"error": exc.detail},
+            headers=exc.headers  # e.g. Retry-After on 429
         )
     
     # Handle unexpected exceptions (500)
@@ -47,7 +48,7 @@ async def universal_exception_handler(request: Request, exc: Exception):
     
     # In development, return detailed error
     if environment.lower() == "dev":
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "error": "Internal server error",
@@ -57,7 +58,7 @@ async def universal_exception_handler(request: Request, exc: Exception):
         )
     
     # In production, return generic error
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error"}
     )
\ No newline at end of file
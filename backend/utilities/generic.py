@@ -1,10 +1,5 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 import re
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 
 def validate_password_complexity(password: str) -> bool:
     """
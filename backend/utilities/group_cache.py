@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.models import GroupMember
+from database.db_enum import GroupRole
+from utilities.event_bus import event_bus, control_channel
+from config import settings
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = control_channel("group_invalidate")
+
+# user_id -> role for every member of a group
+Members = Dict[UUID, GroupRole]
+
+
+class GroupMembershipCache:
+    """
+    Bounded TTL/LRU cache mapping a group to its members and their roles.
+
+    Membership and admin checks, and the recipient list of group fan-out, are
+    served from memory for hot groups. Services that change a group's members
+    or roles call revoke() after committing, which drops the entry on every
+    worker through the event bus; the TTL only bounds staleness if an
+    invalidation is lost.
+    """
+    def __init__(self, max_size: int = 5000, ttl: float = 300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[UUID, tuple]" = OrderedDict()
+        self._invalidations = 0
+
+    async def get_members(self, db: AsyncSession, group_id: UUID) -> Members:
+        """Members of a group with their roles (empty if the group does not exist)."""
+        entry = self._entries.get(group_id)
+        if entry is not None:
+            expires_at, members = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(group_id)
+                self.hits += 1
+                return members
+            del self._entries[group_id]
+        self.misses += 1
+
+        invalidations = self._invalidations
+        result = await db.execute(
+            select(GroupMember.user_id, GroupMember.role).where(GroupMember.group_id == group_id)
+        )
+        members = dict(result.all())
+        # Don't cache a result that may predate an invalidation received while loading
+        if invalidations == self._invalidations:
+            self._entries[group_id] = (time.monotonic() + self.ttl, members)
+            self._entries.move_to_end(group_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return members
+
+    async def role_of(self, db: AsyncSession, group_id: UUID, user_id: UUID) -> Optional[GroupRole]:
+        """The user's role in the group, or None if they are not a member."""
+        return (await self.get_members(db, group_id)).get(user_id)
+
+    async def is_admin(self, db: AsyncSession, group_id: UUID, user_id: UUID) -> bool:
+        return await self.role_of(db, group_id, user_id) == GroupRole.Admin
+
+    def invalidate(self, group_id: UUID):
+        self._invalidations += 1
+        self._entries.pop(group_id, None)
+
+    def clear(self):
+        self._invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    async def attach(self):
+        """Listen for invalidations published by other workers."""
+        await event_bus.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    async def revoke(self, group_id: UUID):
+        """Drop a group on this worker and on every other worker. Call after committing."""
+        self.invalidate(group_id)
+        await event_bus.publish(INVALIDATION_CHANNEL, str(group_id))
+
+    async def _on_invalidation(self, group_id: str):
+        self.invalidate(UUID(group_id))
+
+
+group_cache = GroupMembershipCache(max_size=settings.group_cache_size, ttl=settings.group_cache_ttl)
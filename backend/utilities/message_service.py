@@ -1,93 +1,213 @@
 from datetime import datetime
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_, desc, func
-from database.models import UserRecords, DirectMessage, GroupChat, GroupMember, GroupMessage
-from database.db_enum import GroupRole
+from sqlalchemy import select, update, delete, or_, and_, desc, func, literal, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert, UUID as PG_UUID
+from database.models import UserRecords, DirectMessage, GroupChat, GroupMember, GroupMessage, Conversation
+from database.db_enum import GroupRole, ConversationType
 from schema.message_schema import SendDirectMessage, CreateGroup, SendGroupMessage
 from utilities.websocket_manager import manager
+from utilities.pagination import fetch_keyset_page
+from utilities.group_cache import group_cache
+from utilities.metrics import Histogram
+from utilities.conversation_service import (
+    record_direct_message,
+    record_group_message,
+    add_group_conversations,
+    decrement_direct_unread,
+    lock_conversation,
+    clear_unread,
+    delete_group_conversations,
+    get_unread_summary
+)
+from typing import Optional
 from uuid import UUID
 import logging
 
 logger = logging.getLogger(__name__)
 
+group_fanout_recipients = Histogram(
+    "pinge_group_fanout_recipients", "Recipients of each group message fan-out",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+)
+group_fanout_duration = Histogram(
+    "pinge_group_fanout_duration_seconds", "Seconds spent publishing a group message to its recipients"
+)
+
 async def send_direct_message_service(payload: SendDirectMessage, current_user: UserRecords, db: AsyncSession):
     """
     Send a direct message to another user.
+
+    One statement checks the receiver exists, inserts the message, updates both
+    conversation rows and returns everything the response and the WebSocket
+    event need, including the receiver's new unread total.
     """
     try:
         receiver_uuid = UUID(payload.receiver_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid receiver ID")
-        
-    # Check if receiver exists
-    result = await db.execute(select(UserRecords).where(UserRecords.user_id == receiver_uuid))
-    receiver = result.scalar_one_or_none()
-    
-    if not receiver:
+
+    # Inserts nothing when the receiver does not exist
+    message = pg_insert(DirectMessage).from_select(
+        ["sender_id", "receiver_id", "content"],
+        select(
+            literal(current_user.user_id, PG_UUID(as_uuid=True)),
+            UserRecords.user_id,
+            literal(payload.content, String)
+        ).where(UserRecords.user_id == receiver_uuid)
+    ).returning(
+        DirectMessage.message_id, DirectMessage.sender_id, DirectMessage.receiver_id,
+        DirectMessage.content, DirectMessage.sent_at
+    ).cte("message")
+    conversation = record_direct_message(message).returning(
+        Conversation.user_id, Conversation.unread_count
+    ).cte("conversation")
+
+    # CTEs share one snapshot: add the receiver's other conversations as they were
+    # to the just-updated count of this one
+    other_unread = select(func.coalesce(func.sum(Conversation.unread_count), 0)).where(
+        Conversation.user_id == receiver_uuid,
+        Conversation.conversation_type == ConversationType.Direct,
+        Conversation.conversation_id != current_user.user_id
+    ).scalar_subquery()
+    this_unread = select(conversation.c.unread_count).where(
+        conversation.c.user_id == receiver_uuid
+    ).scalar_subquery()
+
+    result = await db.execute(select(
+        message.c.message_id,
+        message.c.sent_at,
+        (other_unread + this_unread).label("total_unread")
+    ))
+    row = result.one_or_none()
+
+    if row is None:
         raise HTTPException(status_code=404, detail="User not found")
-        
-    new_message = DirectMessage(
-        sender_id=current_user.user_id,
-        receiver_id=receiver_uuid,
-        content=payload.content
-    )
-    
-    db.add(new_message)
+
     await db.commit()
-    await db.refresh(new_message)
-    
-    # Get updated unread count for receiver
-    from sqlalchemy import func
-    unread_count_result = await db.execute(
-        select(func.count(DirectMessage.message_id)).where(
-            DirectMessage.receiver_id == receiver_uuid,
-            DirectMessage.is_read == False
-        )
-    )
-    total_unread = unread_count_result.scalar()
-    
+
     # Notify receiver via WebSocket
     ws_payload = {
         "event": "new_direct_message",
         "data": {
-            "message_id": str(new_message.message_id),
+            "message_id": str(row.message_id),
             "sender_id": str(current_user.user_id),
             "sender_name": current_user.username,
-            "content": new_message.content,
-            "sent_at": new_message.sent_at.isoformat(),
-            "total_unread": total_unread
+            "content": payload.content,
+            "sent_at": row.sent_at.isoformat(),
+            "total_unread": row.total_unread
         }
     }
     await manager.send_personal_message(ws_payload, str(receiver_uuid))
-    
-    return new_message
 
-async def get_direct_messages_service(contact_id: str, current_user: UserRecords, db: AsyncSession, limit: int = 50, offset: int = 0):
+    return {
+        "message_id": row.message_id,
+        "sender_id": current_user.user_id,
+        "receiver_id": receiver_uuid,
+        "content": payload.content,
+        "is_read": False,
+        "sent_at": row.sent_at
+    }
+
+async def get_direct_messages_service(
+    contact_id: str,
+    current_user: UserRecords,
+    db: AsyncSession,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    around: Optional[str] = None
+):
     """
-    Get chat history between current user and a contact.
+    Get chat history between current user and a contact, newest first.
+    Paginated with opaque cursors (before/after) or around a given message.
     """
     try:
         contact_uuid = UUID(contact_id)
+        around_uuid = UUID(around) if around else None
     except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid contact ID")
-        
-    # Fetch messages sent by either user to the other
-    stmt = select(DirectMessage).where(
-        or_(
-            and_(DirectMessage.sender_id == current_user.user_id, DirectMessage.receiver_id == contact_uuid),
-            and_(DirectMessage.sender_id == contact_uuid, DirectMessage.receiver_id == current_user.user_id)
+        raise HTTPException(status_code=400, detail="Invalid contact or message ID")
+
+    # The unordered user pair identifies the conversation in both directions
+    low, high = sorted((current_user.user_id, contact_uuid))
+    in_conversation = and_(
+        func.least(DirectMessage.sender_id, DirectMessage.receiver_id) == low,
+        func.greatest(DirectMessage.sender_id, DirectMessage.receiver_id) == high
+    )
+    stmt = select(DirectMessage).where(in_conversation)
+
+    anchor = None
+    if around_uuid:
+        anchor_result = await db.execute(
+            select(DirectMessage.sent_at, DirectMessage.message_id).where(
+                in_conversation,
+                DirectMessage.message_id == around_uuid
+            )
         )
-    ).order_by(desc(DirectMessage.sent_at)).limit(limit).offset(offset)
-    
-    result = await db.execute(stmt)
-    messages = result.scalars().all()
-    
-    # Return reversed list (oldest first) for chat UI usually, but API returns latest first by default query
-    # Let's return as queried (descending) or ascending? 
-    # Usually APIs return history most recent first for pagination, but UI displays oldest at top.
-    # We'll return as queried.
-    return messages
+        anchor = anchor_result.first()
+        if not anchor:
+            raise HTTPException(status_code=404, detail="Message not found")
+
+    messages, before_cursor, after_cursor = await fetch_keyset_page(
+        db, stmt, DirectMessage.sent_at, DirectMessage.message_id,
+        key=lambda msg: (msg.sent_at, msg.message_id),
+        limit=limit, before=before, after=after, around=anchor
+    )
+
+    return {"messages": messages, "before_cursor": before_cursor, "after_cursor": after_cursor}
+
+# Rows per multi-row INSERT, keeping each statement well under asyncpg's bind parameter limit
+MEMBER_INSERT_BATCH = 1000
+
+def parse_user_ids(user_ids: list):
+    """
+    Split requested user ids into unique UUIDs (in request order) and invalid strings.
+    """
+    uuids = []
+    invalid = []
+    seen = set()
+    for user_id in user_ids:
+        try:
+            user_uuid = UUID(user_id)
+        except ValueError:
+            invalid.append(user_id)
+            continue
+        if user_uuid not in seen:
+            seen.add(user_uuid)
+            uuids.append(user_uuid)
+    return uuids, invalid
+
+async def get_usernames(db: AsyncSession, user_uuids: list) -> dict:
+    """
+    Resolve existing users with one IN query. Returns {user_id: username}.
+    """
+    if not user_uuids:
+        return {}
+    result = await db.execute(
+        select(UserRecords.user_id, UserRecords.username).where(UserRecords.user_id.in_(user_uuids))
+    )
+    return dict(result.all())
+
+async def insert_group_members(db: AsyncSession, group_id: UUID, members: list) -> set:
+    """
+    Insert (user_id, role) pairs into a group with multi-row INSERT ... ON CONFLICT DO NOTHING,
+    and give each new member the group's conversation row.
+    Returns the user ids that were actually added.
+    """
+    added = set()
+    for start in range(0, len(members), MEMBER_INSERT_BATCH):
+        rows = [
+            {"group_id": group_id, "user_id": user_id, "role": role}
+            for user_id, role in members[start:start + MEMBER_INSERT_BATCH]
+        ]
+        stmt = pg_insert(GroupMember).values(rows).on_conflict_do_nothing(
+            index_elements=[GroupMember.group_id, GroupMember.user_id]
+        ).returning(GroupMember.user_id)
+        result = await db.execute(stmt)
+        inserted = result.scalars().all()
+        await add_group_conversations(db, group_id, inserted)
+        added.update(inserted)
+    return added
 
 async def create_group_service(payload: CreateGroup, current_user: UserRecords, db: AsyncSession):
     """
@@ -101,29 +221,12 @@ async def create_group_service(payload: CreateGroup, current_user: UserRecords,
     db.add(new_group)
     await db.flush() # flush to get group_id
     
-    # Add creator as admin
-    admin_member = GroupMember(
-        group_id=new_group.group_id,
-        user_id=current_user.user_id,
-        role=GroupRole.Admin
-    )
-    db.add(admin_member)
-    
-    # Add other members
-    for member_id in payload.members:
-        try:
-            user_uuid = UUID(member_id)
-            # Verify user exists
-            user_res = await db.execute(select(UserRecords).where(UserRecords.user_id == user_uuid))
-            if user_res.scalar_one_or_none():
-                member = GroupMember(
-                    group_id=new_group.group_id,
-                    user_id=user_uuid,
-                    role=GroupRole.Member
-                )
-                db.add(member)
-        except ValueError:
-            continue
+    # Creator joins as admin, other existing users as members
+    member_uuids, _ = parse_user_ids(payload.members)
+    existing_users = await get_usernames(db, [uid for uid in member_uuids if uid != current_user.user_id])
+    members = [(current_user.user_id, GroupRole.Admin)]
+    members += [(uid, GroupRole.Member) for uid in member_uuids if uid in existing_users]
+    await insert_group_members(db, new_group.group_id, members)
             
     await db.commit()
     await db.refresh(new_group)
@@ -140,100 +243,134 @@ async def get_user_groups_service(current_user: UserRecords, db: AsyncSession):
 async def send_group_message_service(group_id: str, payload: SendGroupMessage, current_user: UserRecords, db: AsyncSession):
     """
     Send a message to a group.
+
+    Membership and the members to notify come from the group cache; one
+    statement inserts the message (still only if the sender is a member)
+    and updates every member's conversation row.
     """
     try:
         group_uuid = UUID(group_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid group ID")
-        
-    # Check if user is member
-    member_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id
-    ))
-    if not member_check.scalar_one_or_none():
+
+    members = await group_cache.get_members(db, group_uuid)
+    if current_user.user_id not in members:
         raise HTTPException(status_code=403, detail="You are not a member of this group")
-        
-    new_message = GroupMessage(
-        group_id=group_uuid,
-        sender_id=current_user.user_id,
-        content=payload.content
+
+    # Inserts nothing when the sender is not a member
+    message = pg_insert(GroupMessage).from_select(
+        ["group_id", "sender_id", "content"],
+        select(
+            GroupMember.group_id,
+            GroupMember.user_id,
+            literal(payload.content, String)
+        ).where(
+            GroupMember.group_id == group_uuid,
+            GroupMember.user_id == current_user.user_id
+        )
+    ).returning(
+        GroupMessage.message_id, GroupMessage.group_id, GroupMessage.sender_id,
+        GroupMessage.content, GroupMessage.sent_at
+    ).cte("message")
+    conversation = record_group_message(message).cte("conversation")
+
+    result = await db.execute(
+        select(message.c.message_id, message.c.sent_at).add_cte(conversation)
     )
-    db.add(new_message)
+    row = result.one_or_none()
+
+    if row is None:
+        raise HTTPException(status_code=403, detail="You are not a member of this group")
+
     await db.commit()
-    await db.refresh(new_message)
-    
-    # Get all group members to notify
-    members_result = await db.execute(select(GroupMember).where(GroupMember.group_id == group_uuid))
-    members = members_result.scalars().all()
-    
+
     ws_payload = {
         "event": "new_group_message",
         "data": {
-            "message_id": str(new_message.message_id),
-            "group_id": str(new_message.group_id),
-            "sender_id": str(new_message.sender_id),
+            "message_id": str(row.message_id),
+            "group_id": str(group_uuid),
+            "sender_id": str(current_user.user_id),
             "sender_name": current_user.username,
-            "content": new_message.content,
-            "sent_at": new_message.sent_at.isoformat()
+            "content": payload.content,
+            "sent_at": row.sent_at.isoformat()
         }
     }
-    
-    for member in members:
-        # Don't send back to sender (optional, but usually sender UI updates optimistically)
-        # But for consistency let's send to everyone or exclude sender? 
-        # Plan didn't specify, but let's exclude sender from WS push to avoid duplicate if frontend handles it,
-        # or include if frontend relies on it. Safe bet: send to others.
-        if member.user_id != current_user.user_id:
-            await manager.send_personal_message(ws_payload, str(member.user_id))
-    
+
+    # Don't send back to sender (the sender UI updates optimistically).
+    # Fan-out only enqueues, so slow sockets don't hold up the response.
+    recipients = [str(user_id) for user_id in members if user_id != current_user.user_id]
+    group_fanout_recipients.observe(len(recipients))
+    with group_fanout_duration.time():
+        await manager.send_to_users(ws_payload, recipients)
+
     return {
-        "message_id": str(new_message.message_id),
-        "group_id": str(new_message.group_id),
-        "sender_id": str(new_message.sender_id),
+        "message_id": row.message_id,
+        "group_id": group_uuid,
+        "sender_id": current_user.user_id,
         "sender_name": current_user.username,
-        "content": new_message.content,
-        "sent_at": new_message.sent_at
+        "content": payload.content,
+        "sent_at": row.sent_at
     }
 
-async def get_group_messages_service(group_id: str, current_user: UserRecords, db: AsyncSession, limit: int = 50, offset: int = 0):
+async def get_group_messages_service(
+    group_id: str,
+    current_user: UserRecords,
+    db: AsyncSession,
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    around: Optional[str] = None
+):
     """
-    Get messages for a group.
+    Get messages for a group, newest first.
+    Paginated with opaque cursors (before/after) or around a given message.
     """
     try:
         group_uuid = UUID(group_id)
+        around_uuid = UUID(around) if around else None
     except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid group ID")
+        raise HTTPException(status_code=400, detail="Invalid group or message ID")
         
     # Check membership
-    member_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id
-    ))
-    if not member_check.scalar_one_or_none():
+    if await group_cache.role_of(db, group_uuid, current_user.user_id) is None:
         raise HTTPException(status_code=403, detail="You are not a member of this group")
+
+    anchor = None
+    if around_uuid:
+        anchor_result = await db.execute(
+            select(GroupMessage.sent_at, GroupMessage.message_id).where(
+                GroupMessage.group_id == group_uuid,
+                GroupMessage.message_id == around_uuid
+            )
+        )
+        anchor = anchor_result.first()
+        if not anchor:
+            raise HTTPException(status_code=404, detail="Message not found")
         
     stmt = select(GroupMessage, UserRecords.username).join(
         UserRecords, GroupMessage.sender_id == UserRecords.user_id
     ).where(
         GroupMessage.group_id == group_uuid
-    ).order_by(desc(GroupMessage.sent_at)).limit(limit).offset(offset)
+    )
     
-    result = await db.execute(stmt)
-    rows = result.all()
+    rows, before_cursor, after_cursor = await fetch_keyset_page(
+        db, stmt, GroupMessage.sent_at, GroupMessage.message_id,
+        key=lambda row: (row[0].sent_at, row[0].message_id),
+        limit=limit, before=before, after=after, around=anchor, scalars=False
+    )
     
     response = []
     for msg, username in rows:
         response.append({
-            "message_id": str(msg.message_id),
-            "group_id": str(msg.group_id),
-            "sender_id": str(msg.sender_id),
+            "message_id": msg.message_id,
+            "group_id": msg.group_id,
+            "sender_id": msg.sender_id,
             "sender_name": username,
             "content": msg.content,
             "sent_at": msg.sent_at
         })
         
-    return response
+    return {"messages": response, "before_cursor": before_cursor, "after_cursor": after_cursor}
 
 async def get_unread_messages_service(current_user: UserRecords, db: AsyncSession):
     """
@@ -252,10 +389,10 @@ async def get_unread_messages_service(current_user: UserRecords, db: AsyncSessio
     response = []
     for msg, sender_name in rows:
         response.append({
-            "message_id": str(msg.message_id),
-            "sender_id": str(msg.sender_id),
+            "message_id": msg.message_id,
+            "sender_id": msg.sender_id,
             "sender_name": sender_name,
-            "receiver_id": str(msg.receiver_id),
+            "receiver_id": msg.receiver_id,
             "content": msg.content,
             "is_read": msg.is_read,
             "sent_at": msg.sent_at
@@ -266,87 +403,29 @@ async def get_unread_messages_service(current_user: UserRecords, db: AsyncSessio
 async def get_unread_count_service(current_user: UserRecords, db: AsyncSession):
     """
     Get unread message count per contact, per group, and totals.
+    Served from the unread counters, which the send and mark-read paths maintain.
     """
-    from sqlalchemy import func
-
-    # Get unread count for direct messages grouped by sender
-    stmt = select(
-        DirectMessage.sender_id,
-        UserRecords.username,
-        func.count(DirectMessage.message_id).label('unread_count'),
-        func.max(DirectMessage.sent_at).label('last_message_at')
-    ).join(
-        UserRecords, DirectMessage.sender_id == UserRecords.user_id
-    ).where(
-        DirectMessage.receiver_id == current_user.user_id,
-        DirectMessage.is_read == False
-    ).group_by(
-        DirectMessage.sender_id, UserRecords.username
-    ).order_by(desc('last_message_at'))
+    return await get_unread_summary(db, current_user.user_id)
 
-    result = await db.execute(stmt)
-    rows = result.all()
-
-    contacts_with_unread = []
-    total_unread = 0
-
-    for sender_id, sender_name, count, last_msg_at in rows:
-        contacts_with_unread.append({
-            "contact_id": str(sender_id),
-            "contact_name": sender_name,
-            "unread_count": count,
-            "last_message_at": last_msg_at
-        })
-        total_unread += count
-
-    # Get unread count for group messages
-    # For each group user is member of, count messages sent after their last_read_at
-    groups_with_unread = []
-    total_group_unread = 0
-
-    # Get all groups user is member of with their last_read_at
-    member_stmt = select(GroupMember, GroupChat).join(
-        GroupChat, GroupMember.group_id == GroupChat.group_id
-    ).where(GroupMember.user_id == current_user.user_id)
-
-    member_result = await db.execute(member_stmt)
-    memberships = member_result.all()
-
-    for membership, group in memberships:
-        # Count messages in this group sent after last_read_at (excluding user's own messages)
-        unread_stmt = select(
-            func.count(GroupMessage.message_id).label('unread_count'),
-            func.max(GroupMessage.sent_at).label('last_message_at')
-        ).where(
-            GroupMessage.group_id == group.group_id,
-            GroupMessage.sent_at > membership.last_read_at,
-            GroupMessage.sender_id != current_user.user_id
-        )
-
-        unread_result = await db.execute(unread_stmt)
-        unread_row = unread_result.first()
-
-        unread_count = unread_row.unread_count or 0
-        last_msg_at = unread_row.last_message_at
-
-        if unread_count > 0:
-            groups_with_unread.append({
-                "group_id": str(group.group_id),
-                "group_name": group.name,
-                "unread_count": unread_count,
-                "last_message_at": last_msg_at
-            })
-            total_group_unread += unread_count
-
-    # Sort groups by last_message_at descending
-    groups_with_unread.sort(key=lambda x: x['last_message_at'] or datetime.min, reverse=True)
+async def notify_messages_read(reader_id: UUID, read_rows):
+    """
+    Tell the reader's devices and each sender which messages were just read.
+    One messages_read event per sender, covering every message read from them.
+    """
+    read_by_sender = {}
+    for message_id, sender_id in read_rows:
+        read_by_sender.setdefault(sender_id, []).append(str(message_id))
 
-    return {
-        "total_unread": total_unread,
-        "contacts_with_unread": contacts_with_unread,
-        "groups_with_unread": groups_with_unread,
-        "total_group_unread": total_group_unread
-    }
+    for sender_id, message_ids in read_by_sender.items():
+        ws_payload = {
+            "event": "messages_read",
+            "data": {
+                "reader_id": str(reader_id),
+                "sender_id": str(sender_id),
+                "message_ids": message_ids
+            }
+        }
+        await manager.send_to_users(ws_payload, [str(reader_id), str(sender_id)])
 
 async def mark_messages_as_read_service(message_ids: list, current_user: UserRecords, db: AsyncSession):
     """
@@ -359,26 +438,37 @@ async def mark_messages_as_read_service(message_ids: list, current_user: UserRec
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid message ID: {msg_id}")
     
-    # Update only messages received by current user
-    stmt = select(DirectMessage).where(
-        DirectMessage.message_id.in_(uuids),
-        DirectMessage.receiver_id == current_user.user_id
+    # Update only unread messages received by current user, in one statement
+    result = await db.execute(
+        update(DirectMessage).where(
+            DirectMessage.message_id.in_(uuids),
+            DirectMessage.receiver_id == current_user.user_id,
+            DirectMessage.is_read == False
+        ).values(is_read=True).returning(DirectMessage.message_id, DirectMessage.sender_id)
     )
+    read_rows = result.all()
+    
+    if not read_rows:
+        # Nothing changed: either the messages were already read or they are not ours
+        existing = await db.execute(
+            select(DirectMessage.message_id).where(
+                DirectMessage.message_id.in_(uuids),
+                DirectMessage.receiver_id == current_user.user_id
+            ).limit(1)
+        )
+        if existing.scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="No messages found to mark as read")
     
-    result = await db.execute(stmt)
-    messages = result.scalars().all()
-    
-    if not messages:
-        raise HTTPException(status_code=404, detail="No messages found to mark as read")
-    
-    marked_count = 0
-    for message in messages:
-        if not message.is_read:
-            message.is_read = True
-            marked_count += 1
+    read_per_sender = {}
+    for _, sender_id in read_rows:
+        read_per_sender[sender_id] = read_per_sender.get(sender_id, 0) + 1
     
+    await decrement_direct_unread(db, current_user.user_id, read_per_sender)
     await db.commit()
     
+    marked_count = len(read_rows)
+    await notify_messages_read(current_user.user_id, read_rows)
+    
     logger.info(f"User {current_user.user_id} marked {marked_count} messages as read")
     return {"message": f"Marked {marked_count} message(s) as read", "marked_count": marked_count}
 
@@ -391,23 +481,24 @@ async def mark_all_from_contact_as_read_service(contact_id: str, current_user: U
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid contact ID")
     
-    # Update all unread messages from this contact
-    stmt = select(DirectMessage).where(
-        DirectMessage.sender_id == contact_uuid,
-        DirectMessage.receiver_id == current_user.user_id,
-        DirectMessage.is_read == False
+    # Update all unread messages from this contact in one statement
+    result = await db.execute(
+        update(DirectMessage).where(
+            DirectMessage.sender_id == contact_uuid,
+            DirectMessage.receiver_id == current_user.user_id,
+            DirectMessage.is_read == False
+        ).values(is_read=True).returning(DirectMessage.message_id, DirectMessage.sender_id)
     )
+    read_rows = result.all()
+    marked_count = len(read_rows)
     
-    result = await db.execute(stmt)
-    messages = result.scalars().all()
-    
-    marked_count = 0
-    for message in messages:
-        message.is_read = True
-        marked_count += 1
-    
+    # Subtract exactly what this statement marked: a message sent meanwhile stays counted
+    if read_rows:
+        await decrement_direct_unread(db, current_user.user_id, {contact_uuid: marked_count})
     await db.commit()
     
+    await notify_messages_read(current_user.user_id, read_rows)
+    
     logger.info(f"User {current_user.user_id} marked {marked_count} messages from {contact_id} as read")
     return {"message": f"Marked {marked_count} message(s) as read", "marked_count": marked_count}
 
@@ -420,23 +511,20 @@ async def mark_group_as_read_service(group_id: str, current_user: UserRecords, d
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid group ID")
 
-    # Find user's membership in this group
-    member_result = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id
-    ))
-    membership = member_result.scalar_one_or_none()
-
-    if not membership:
+    # Check membership
+    if await group_cache.role_of(db, group_uuid, current_user.user_id) is None:
         raise HTTPException(status_code=404, detail="You are not a member of this group")
 
-    # Update last_read_at to current database time (use func.now() for consistency with sent_at)
-    from sqlalchemy import update
+    # Sends to the group wait on this lock, so none can land between the read marker and the reset.
+    # last_read_at is taken after the lock (clock_timestamp, not the transaction start), so it
+    # covers every message the reset counts as read.
+    await lock_conversation(db, current_user.user_id, ConversationType.Group, group_uuid)
     await db.execute(
         update(GroupMember)
-        .where(GroupMember.id == membership.id)
-        .values(last_read_at=func.now())
+        .where(GroupMember.group_id == group_uuid, GroupMember.user_id == current_user.user_id)
+        .values(last_read_at=func.clock_timestamp())
     )
+    await clear_unread(db, current_user.user_id, ConversationType.Group, group_uuid)
     await db.commit()
 
     logger.info(f"User {current_user.user_id} marked group {group_id} as read")
@@ -452,12 +540,8 @@ async def add_group_members_service(group_id: str, user_ids: list, current_user:
         raise HTTPException(status_code=400, detail="Invalid group ID")
     
     # Check if current user is admin
-    admin_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id,
-        GroupMember.role == GroupRole.Admin
-    ))
-    if not admin_check.scalar_one_or_none():
+    members = await group_cache.get_members(db, group_uuid)
+    if members.get(current_user.user_id) != GroupRole.Admin:
         raise HTTPException(status_code=403, detail="Only group admins can add members")
     
     # Verify group exists
@@ -465,43 +549,27 @@ async def add_group_members_service(group_id: str, user_ids: list, current_user:
     if not group_check.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Group not found")
     
+    user_uuids, invalid_users = parse_user_ids(user_ids)
+    
+    # Resolve requested users with one query; current members come from the cache
+    usernames = await get_usernames(db, user_uuids)
+    invalid_users += [str(uid) for uid in user_uuids if uid not in usernames]
+    
+    candidates = [uid for uid in user_uuids if uid in usernames and uid not in members]
+    added = await insert_group_members(db, group_uuid, [(uid, GroupRole.Member) for uid in candidates])
+    
+    # Anyone not inserted was already a member (possibly one who joined since the lookup)
     added_members = []
     already_members = []
-    invalid_users = []
-    
-    for user_id in user_ids:
-        try:
-            user_uuid = UUID(user_id)
-            
-            # Check if user exists
-            user_check = await db.execute(select(UserRecords).where(UserRecords.user_id == user_uuid))
-            user = user_check.scalar_one_or_none()
-            if not user:
-                invalid_users.append(user_id)
-                continue
-            
-            # Check if already a member
-            member_check = await db.execute(select(GroupMember).where(
-                GroupMember.group_id == group_uuid,
-                GroupMember.user_id == user_uuid
-            ))
-            if member_check.scalar_one_or_none():
-                already_members.append(user.username)
-                continue
-            
-            # Add as member
-            new_member = GroupMember(
-                group_id=group_uuid,
-                user_id=user_uuid,
-                role=GroupRole.Member
-            )
-            db.add(new_member)
-            added_members.append(user.username)
-            
-        except ValueError:
-            invalid_users.append(user_id)
+    for uid in user_uuids:
+        if uid in added:
+            added_members.append(usernames[uid])
+        elif uid in usernames:
+            already_members.append(usernames[uid])
     
     await db.commit()
+    if added:
+        await group_cache.revoke(group_uuid)
     
     return {
         "message": f"Added {len(added_members)} member(s) to the group",
@@ -521,30 +589,24 @@ async def remove_group_member_service(group_id: str, user_id: str, current_user:
         raise HTTPException(status_code=400, detail="Invalid ID format")
     
     # Check if current user is admin
-    admin_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id,
-        GroupMember.role == GroupRole.Admin
-    ))
-    if not admin_check.scalar_one_or_none():
+    members = await group_cache.get_members(db, group_uuid)
+    if members.get(current_user.user_id) != GroupRole.Admin:
         raise HTTPException(status_code=403, detail="Only group admins can remove members")
     
     # Don't allow removing yourself
     if target_user_uuid == current_user.user_id:
         raise HTTPException(status_code=400, detail="Cannot remove yourself. Use leave group endpoint instead")
     
-    # Find the member to remove
-    member_result = await db.execute(select(GroupMember).where(
+    if target_user_uuid not in members:
+        raise HTTPException(status_code=404, detail="Member not found in this group")
+    
+    await db.execute(delete(GroupMember).where(
         GroupMember.group_id == group_uuid,
         GroupMember.user_id == target_user_uuid
     ))
-    member = member_result.scalar_one_or_none()
-    
-    if not member:
-        raise HTTPException(status_code=404, detail="Member not found in this group")
-    
-    await db.delete(member)
+    await delete_group_conversations(db, group_uuid, [target_user_uuid])
     await db.commit()
+    await group_cache.revoke(group_uuid)
     
     logger.info(f"User {user_id} removed from group {group_id} by {current_user.user_id}")
     return {"message": "Member removed from group successfully"}
@@ -560,32 +622,27 @@ async def change_group_role_service(group_id: str, user_id: str, new_role: str,
         raise HTTPException(status_code=400, detail="Invalid ID format")
     
     # Check if current user is admin
-    admin_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id,
-        GroupMember.role == GroupRole.Admin
-    ))
-    if not admin_check.scalar_one_or_none():
+    members = await group_cache.get_members(db, group_uuid)
+    if members.get(current_user.user_id) != GroupRole.Admin:
         raise HTTPException(status_code=403, detail="Only group admins can change roles")
     
     # Find the member
-    member_result = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == target_user_uuid
-    ))
-    member = member_result.scalar_one_or_none()
-    
-    if not member:
+    current_role = members.get(target_user_uuid)
+    if current_role is None:
         raise HTTPException(status_code=404, detail="Member not found in this group")
     
     # Convert string to enum
     role_enum = GroupRole.Admin if new_role == "Admin" else GroupRole.Member
     
-    if member.role == role_enum:
+    if current_role == role_enum:
         raise HTTPException(status_code=400, detail=f"User is already a {new_role}")
     
-    member.role = role_enum
+    await db.execute(update(GroupMember).where(
+        GroupMember.group_id == group_uuid,
+        GroupMember.user_id == target_user_uuid
+    ).values(role=role_enum))
     await db.commit()
+    await group_cache.revoke(group_uuid)
     
     action = "promoted to admin" if role_enum == GroupRole.Admin else "demoted to member"
     logger.info(f"User {user_id} {action} in group {group_id} by {current_user.user_id}")
@@ -601,39 +658,32 @@ async def leave_group_service(group_id: str, current_user: UserRecords, db: Asyn
         raise HTTPException(status_code=400, detail="Invalid group ID")
     
     # Find user's membership
-    member_result = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id
-    ))
-    member = member_result.scalar_one_or_none()
+    members = await group_cache.get_members(db, group_uuid)
+    role = members.get(current_user.user_id)
     
-    if not member:
+    if role is None:
         raise HTTPException(status_code=404, detail="You are not a member of this group")
     
     # Check if user is admin
-    if member.role == GroupRole.Admin:
+    if role == GroupRole.Admin:
         # Count total admins
-        admin_count_result = await db.execute(select(GroupMember).where(
-            GroupMember.group_id == group_uuid,
-            GroupMember.role == GroupRole.Admin
-        ))
-        admin_count = len(admin_count_result.scalars().all())
+        admin_count = sum(1 for member_role in members.values() if member_role == GroupRole.Admin)
         
         if admin_count == 1:
             # Last admin - check if there are other members
-            member_count_result = await db.execute(select(GroupMember).where(
-                GroupMember.group_id == group_uuid
-            ))
-            total_members = len(member_count_result.scalars().all())
-            
-            if total_members > 1:
+            if len(members) > 1:
                 raise HTTPException(
                     status_code=400, 
                     detail="You are the last admin. Please promote another member to admin before leaving or delete the group"
                 )
     
-    await db.delete(member)
+    await db.execute(delete(GroupMember).where(
+        GroupMember.group_id == group_uuid,
+        GroupMember.user_id == current_user.user_id
+    ))
+    await delete_group_conversations(db, group_uuid, [current_user.user_id])
     await db.commit()
+    await group_cache.revoke(group_uuid)
     
     logger.info(f"User {current_user.user_id} left group {group_id}")
     return {"message": "Left group successfully"}
@@ -656,17 +706,14 @@ async def delete_group_service(group_id: str, current_user: UserRecords, db: Asy
     
     # Check if user is admin or creator
     if group.created_by != current_user.user_id:
-        admin_check = await db.execute(select(GroupMember).where(
-            GroupMember.group_id == group_uuid,
-            GroupMember.user_id == current_user.user_id,
-            GroupMember.role == GroupRole.Admin
-        ))
-        if not admin_check.scalar_one_or_none():
+        if not await group_cache.is_admin(db, group_uuid, current_user.user_id):
             raise HTTPException(status_code=403, detail="Only group creator or admins can delete the group")
     
     # Delete group (cascade will delete members and messages)
     await db.delete(group)
+    await delete_group_conversations(db, group_uuid)
     await db.commit()
+    await group_cache.revoke(group_uuid)
     
     logger.info(f"Group {group_id} deleted by {current_user.user_id}")
     return {"message": "Group deleted successfully"}
@@ -681,11 +728,7 @@ async def get_group_members_service(group_id: str, current_user: UserRecords, db
         raise HTTPException(status_code=400, detail="Invalid group ID")
     
     # Check if user is member
-    member_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id
-    ))
-    if not member_check.scalar_one_or_none():
+    if await group_cache.role_of(db, group_uuid, current_user.user_id) is None:
         raise HTTPException(status_code=403, detail="You are not a member of this group")
     
     # Get all members
@@ -699,7 +742,7 @@ async def get_group_members_service(group_id: str, current_user: UserRecords, db
     members = []
     for member, user in rows:
         members.append({
-            "user_id": str(user.user_id),
+            "user_id": user.user_id,
             "username": user.username,
             "email": user.email,
             "role": member.role.value,
@@ -718,12 +761,7 @@ async def update_group_info_service(group_id: str, name: str, description: str,
         raise HTTPException(status_code=400, detail="Invalid group ID")
     
     # Check if user is admin
-    admin_check = await db.execute(select(GroupMember).where(
-        GroupMember.group_id == group_uuid,
-        GroupMember.user_id == current_user.user_id,
-        GroupMember.role == GroupRole.Admin
-    ))
-    if not admin_check.scalar_one_or_none():
+    if not await group_cache.is_admin(db, group_uuid, current_user.user_id):
         raise HTTPException(status_code=403, detail="Only group admins can update group info")
     
     # Get group
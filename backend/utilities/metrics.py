@@ -0,0 +1,272 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import bisect
+import math
+import os
+import time
+
+# Minimal Prometheus instrumentation (text exposition format 0.0.4).
+#
+# Metrics are plain in-process objects: updating one is a dict lookup and an
+# addition, and the text is only built when /metrics is scraped. Every worker
+# process keeps and exposes its own values, so every series carries a `worker`
+# label (the pid): scrapes answered by different workers never mix, and
+# counters stay monotonic per series. Aggregate with sum without (worker).
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; suits request latencies from sub-millisecond cache hits to slow queries
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+# Constant (name, value) label pairs added to every sample of a scrape
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], const: Labels = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in const]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    if not pairs:
+        return ""
+    return "{" + ",".join(pairs) + "}"
+
+
+class Registry:
+    """
+    Holds every metric and renders them all for a scrape. With `per_worker`,
+    a worker="<pid>" label is added to every sample; the pid is read at render
+    time, so it is right even in processes forked after import.
+    """
+    def __init__(self, per_worker: bool = True):
+        self.per_worker = per_worker
+        self._metrics: Dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional["Metric"]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        const: Labels = (("worker", str(os.getpid())),) if self.per_worker else ()
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(const))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Metric(ABC):
+    """
+    A named metric with optional labels. Unlabelled metrics are updated
+    directly; labelled ones through `labels(*values)`, which returns the
+    child for that combination of label values.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Registry = registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        self._function: Optional[Callable] = None
+        registry.register(self)
+
+    def labels(self, *values) -> "Metric":
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def set_function(self, function: Callable) -> "Metric":
+        """
+        Read the value at scrape time instead of tracking it: `function` returns
+        a number, or for labelled metrics a {label values tuple: number} mapping.
+        """
+        self._function = function
+        return self
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels, use labels(...)")
+        return self.labels()
+
+    @abstractmethod
+    def _new_child(self):
+        ...
+
+    def _values(self) -> Iterable[Tuple[LabelValues, float]]:
+        if self._function is None:
+            return [(key, child.value) for key, child in self._children.items()]
+        value = self._function()
+        if isinstance(value, dict):
+            return [(tuple(str(part) for part in key), number) for key, number in value.items()]
+        return [((), value)]
+
+    def samples(self, const: Labels = ()) -> Iterable[str]:
+        for key, value in self._values():
+            yield f"{self.name}{_format_labels(self.labelnames, key, const)} {_format_value(value)}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    """Monotonic count of events, e.g. failed sends."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, e.g. open connections."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in the block (including time awaited in it)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observations in cumulative buckets, e.g. latencies.
+    Buckets are upper bounds; +Inf is added implicitly.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Registry = registry):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def set_function(self, function: Callable):
+        raise TypeError("Histograms can only be observed")
+
+    def samples(self, const: Labels = ()) -> Iterable[str]:
+        bucket_labels = self.labelnames + ("le",)
+        for key, child in self._children.items():
+            cumulative = 0
+            for upper_bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                labels = _format_labels(bucket_labels, key + (_format_value(upper_bound),), const)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, const)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+event_loop_lag = Histogram(
+    "pinge_event_loop_lag_seconds", "How late the event loop ran a timer, i.e. time it was blocked by other work",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+
+class EventLoopLagMonitor:
+    """
+    Sleeps `interval` seconds in a loop and records how much later than asked
+    it woke up. Lag grows when callbacks hog the loop (e.g. a large fan-out),
+    which delays every socket and request on the worker.
+    """
+    def __init__(self, histogram: Histogram, interval: float = 0.25):
+        self.histogram = histogram
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.histogram.observe(max(0.0, time.perf_counter() - start - self.interval))
+
+
+loop_lag_monitor = EventLoopLagMonitor(event_loop_lag)
@@ -1,31 +1,170 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utilities.metrics import Histogram
+from utilities.query_stats import QueryStats, current_query_stats, check_budget, server_timing
 import json
+import time
 
-class WrapSuccessResponseMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # Skip swagger UI & openapi routes
-        if request.url.path.startswith("/docs") or \
-           request.url.path.startswith("/redoc") or \
-           request.url.path.startswith("/openapi.json"):
-            return await call_next(request)
-        
-        # Skip OAuth2 token endpoint to maintain OAuth2 spec compatibility
-        if request.url.path == "/authentication/login":
-            return await call_next(request)
-
-        response = await call_next(request)
-
-        if response.status_code < 400:
-            body = [section async for section in response.body_iterator]
-            content = b"".join(body).decode()
-            try:
-                payload = json.loads(content)
-            except json.JSONDecodeError:
-                payload = content
-
-            return JSONResponse(
-                status_code=response.status_code,
-                content={"success": True, "data": payload},
-            )
-        return response
+# Paths whose responses are passed through untouched
+SKIP_PREFIXES = ("/docs", "/redoc", "/openapi.json")
+# OAuth2 token endpoint keeps the spec's response shape
+SKIP_PATHS = ("/authentication/login", "/metrics")
+
+ENVELOPE_PREFIX = b'{"success":true,"data":'
+ENVELOPE_SUFFIX = b'}'
+
+
+class WrapSuccessResponseMiddleware:
+    """
+    Wrap successful responses as {"success": true, "data": <body>}.
+
+    Pure ASGI middleware: a JSON body is already a valid JSON value, so the
+    envelope is spliced around the body bytes as they are sent instead of
+    buffering, parsing and re-encoding the payload. Streaming responses stay
+    streaming. Non-JSON bodies are buffered and wrapped as a JSON string.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        if path.startswith(SKIP_PREFIXES) or path in SKIP_PATHS:
+            return await self.app(scope, receive, send)
+
+        mode = None
+        start_message = None
+        buffered = []
+        first_chunk = True
+
+        async def send_wrapper(message: Message):
+            nonlocal mode, start_message, first_chunk
+
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                status = message["status"]
+                if status >= 400 or status in (204, 304):
+                    mode = "passthrough"
+                elif headers.get("content-type", "").startswith("application/json"):
+                    mode = "splice"
+                    if "content-length" in headers:
+                        length = int(headers["content-length"]) + len(ENVELOPE_PREFIX) + len(ENVELOPE_SUFFIX)
+                        headers["content-length"] = str(length)
+                else:
+                    # Length and type are only known once the body is wrapped
+                    mode = "buffer"
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body" or mode == "passthrough":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if mode == "splice":
+                if first_chunk:
+                    body = ENVELOPE_PREFIX + body
+                    first_chunk = False
+                if not more_body:
+                    body += ENVELOPE_SUFFIX
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            buffered.append(body)
+            if more_body:
+                return
+            content = b"".join(buffered).decode()
+            wrapped = json.dumps(
+                {"success": True, "data": content},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode()
+            headers = MutableHeaders(scope=start_message)
+            headers["content-type"] = "application/json"
+            headers["content-length"] = str(len(wrapped))
+            await send(start_message)
+            await send({"type": "http.response.body", "body": wrapped})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+request_duration = Histogram(
+    "pinge_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"]
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record every HTTP request's latency in a histogram labelled by method,
+    route template (e.g. /messages/groups/{group_id}/messages, never the raw
+    path, to keep label cardinality bounded) and response status.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            request_duration.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status
+            ).observe(time.perf_counter() - start)
+
+
+class QueryAccountingMiddleware:
+    """
+    Count the SQL statements and database time of every HTTP request.
+
+    The counts are collected by the engine events of utilities.query_stats
+    and reported as X-DB-Query-Count and Server-Timing response headers. When
+    the response starts, the route's statement budget is checked and repeated
+    statement shapes (likely N+1 loops) are logged.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                if route is not None:
+                    check_budget(f"{scope['method']} {route.path}", stats)
+                MutableHeaders(scope=message).update(server_timing(stats))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
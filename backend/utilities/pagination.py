@@ -0,0 +1,123 @@
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+import base64
+
+
+def encode_cursor(sent_at: datetime, message_id: UUID) -> str:
+    """
+    Build an opaque cursor from a message's (sent_at, message_id) position.
+    """
+    raw = f"{sent_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Parse a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sent_at, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(sent_at), UUID(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def encode_ranked_cursor(rank: float, sent_at: datetime, message_id: UUID) -> str:
+    """
+    Cursor for results ordered by (rank, sent_at, message_id), e.g. search relevance.
+    """
+    raw = f"{rank!r}|{sent_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_ranked_cursor(cursor: str) -> Tuple[float, datetime, UUID]:
+    """
+    Parse a cursor produced by encode_ranked_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, sent_at, message_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return float(rank), datetime.fromisoformat(sent_at), UUID(message_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    stmt,
+    sent_at_col,
+    id_col,
+    key: Callable,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    around: Optional[Tuple[datetime, UUID]] = None,
+    scalars: bool = True,
+):
+    """
+    Page through a message query by its (sent_at, message_id) position.
+
+    Every page is an index range scan bounded by LIMIT, however deep it is,
+    and pages do not shift when new messages arrive.
+
+    Args:
+        db: Database session
+        stmt: Select already filtered to one conversation
+        sent_at_col, id_col: Ordering columns
+        key: Returns (sent_at, message_id) of a result row
+        limit: Page size
+        before: Cursor - return messages older than it
+        after: Cursor - return messages newer than it
+        around: Position - return the message there plus older and newer ones
+        scalars: Whether rows are single ORM entities
+
+    Returns:
+        (rows newest first, before_cursor, after_cursor). A cursor is None
+        when there is nothing more in that direction.
+    """
+    position = tuple_(sent_at_col, id_col)
+
+    async def older(bound, inclusive, size):
+        query = stmt
+        if bound is not None:
+            query = query.where(position <= tuple_(*bound) if inclusive else position < tuple_(*bound))
+        query = query.order_by(sent_at_col.desc(), id_col.desc()).limit(size + 1)
+        result = await db.execute(query)
+        rows = list(result.scalars().all() if scalars else result.all())
+        return rows[:size], len(rows) > size
+
+    async def newer(bound, size):
+        query = stmt.where(position > tuple_(*bound))
+        query = query.order_by(sent_at_col.asc(), id_col.asc()).limit(size + 1)
+        result = await db.execute(query)
+        rows = list(result.scalars().all() if scalars else result.all())
+        return list(reversed(rows[:size])), len(rows) > size
+
+    def cursor_of(row):
+        return encode_cursor(*key(row))
+
+    if around is not None:
+        older_rows, has_older = await older(around, True, limit - limit // 2)
+        newer_rows, has_newer = await newer(around, limit // 2)
+        rows = newer_rows + older_rows
+    elif after is not None:
+        rows, has_newer = await newer(decode_cursor(after), limit)
+        has_older = True
+    else:
+        rows, has_older = await older(decode_cursor(before) if before else None, False, limit)
+        has_newer = before is not None
+
+    before_cursor = cursor_of(rows[-1]) if rows and has_older else None
+    after_cursor = cursor_of(rows[0]) if rows and has_newer else None
+    return rows, before_cursor, after_cursor
@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+from config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, bounded thread pool.
+
+    bcrypt is deliberately slow (tens to hundreds of milliseconds per call) and
+    releases the GIL while it works, so hashing on worker threads keeps the
+    event loop - and every WebSocket on this worker - responsive during a login
+    storm. At most `max_pending` operations may be queued or running; beyond
+    that requests fail fast with 503 instead of piling up.
+
+    The configured cost is pinned as both the minimum and the maximum, so a
+    stored hash with any other cost is reported by verify_and_update and
+    rehashed on the next successful login.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # Created lazily so importing the module does not start threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning(f"Password hashing queue full ({self.pending} pending), rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly"
+            )
+        self.pending += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        except Exception:
+            # A cancelled call (client went away) is neither completed nor failed
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        self.completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a plain text password"""
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a plain password against a hashed password.
+
+        Returns:
+            (verified, new_hash) - new_hash is set when the stored hash uses a
+            different cost and should be replaced
+        """
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def stats(self) -> dict:
+        """Queue depth and counters, for monitoring."""
+        return {
+            "queue_depth": self.pending,
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        """Stop the worker threads once queued operations finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    rounds=settings.bcrypt_rounds,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
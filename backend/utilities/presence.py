@@ -0,0 +1,206 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+from config import settings
+from database.database import AsyncSessionLocal
+from utilities.contact_cache import contact_cache
+from utilities.event_bus import EventBus, event_bus, control_channel
+from utilities.websocket_manager import ConnectionManager, manager
+import asyncio
+import logging
+import orjson
+import time
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_CHANNEL = control_channel("presence")
+
+# Users listed per announcement, keeping it under the Postgres NOTIFY payload limit
+ANNOUNCE_BATCH = 150
+
+
+class PresenceTracker:
+    """
+    Cluster-wide view of who is online, kept in memory on every worker.
+
+    A worker announces a user when it accepts their first socket, withdraws
+    them when the last one closes, and re-announces every user it holds each
+    `heartbeat_interval` seconds. A user is online while some worker announced
+    them within `timeout` seconds, so the users of a crashed worker expire on
+    their own. Lookups never touch the database.
+
+    Going offline is debounced: user_offline is only sent once a user has had
+    no socket anywhere for `debounce` seconds, and a reconnect within that
+    window sends nothing at all. Presence events go to the user's contacts only.
+
+    last_seen is kept for `last_seen_retention` seconds after a user goes
+    offline, then forgotten by the heartbeat, so memory follows recently
+    active users rather than everyone who ever connected.
+    """
+    def __init__(self, manager: ConnectionManager, bus: EventBus,
+                 heartbeat_interval: float = 25.0, timeout: float = 60.0, debounce: float = 10.0,
+                 last_seen_retention: float = 86400.0):
+        self.manager = manager
+        self.bus = bus
+        self.heartbeat_interval = heartbeat_interval
+        self.timeout = timeout
+        self.debounce = debounce
+        self.last_seen_retention = last_seen_retention
+        self.worker_id = uuid4().hex
+        self.seen_at: Dict[str, float] = {}         # user_id -> monotonic time of the last announcement
+        self.last_seen: Dict[str, datetime] = {}    # user_id -> wall clock time the user was last online
+        self.pending_offline: Dict[str, asyncio.Task] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.bus.subscribe(PRESENCE_CHANNEL, self._on_announcement)
+        self.manager.listeners.append(self)
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat_loop())
+
+    async def stop(self):
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        for task in self.pending_offline.values():
+            task.cancel()
+        self.pending_offline.clear()
+        if self in self.manager.listeners:
+            self.manager.listeners.remove(self)
+
+    # =================== Lookups ===================
+
+    def is_online(self, user_id: str) -> bool:
+        return user_id in self.manager.active_connections or self._announced(user_id)
+
+    def _announced(self, user_id: str) -> bool:
+        seen = self.seen_at.get(user_id)
+        return seen is not None and time.monotonic() - seen < self.timeout
+
+    def lookup(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Presence of several users, from memory: {user_id: {"is_online", "last_seen"}}.
+        """
+        return {
+            user_id: {"is_online": self.is_online(user_id), "last_seen": self.last_seen.get(user_id)}
+            for user_id in user_ids
+        }
+
+    # =================== Local socket transitions ===================
+
+    async def user_connected(self, user_id: str):
+        """Called by the connection manager when this worker gets a user's first socket."""
+        pending = self.pending_offline.pop(user_id, None)
+        if pending is not None:
+            pending.cancel()
+        # Still online elsewhere, or back within the debounce window: nobody is told
+        was_online = pending is not None or self._announced(user_id)
+        self._mark_seen(user_id)
+        await self._announce("online", [user_id])
+        if not was_online:
+            await self._notify_contacts(user_id, {"event": "user_online", "data": {"user_id": user_id}})
+
+    async def user_disconnected(self, user_id: str):
+        """Called by the connection manager when this worker closes a user's last socket."""
+        self._mark_seen(user_id)
+        await self._announce("offline", [user_id])
+        previous = self.pending_offline.pop(user_id, None)
+        if previous is not None:
+            previous.cancel()
+        self.pending_offline[user_id] = asyncio.get_running_loop().create_task(
+            self._expire(user_id, time.monotonic())
+        )
+
+    async def _expire(self, user_id: str, disconnected_at: float):
+        await asyncio.sleep(self.debounce)
+        self.pending_offline.pop(user_id, None)
+        if user_id in self.manager.active_connections:
+            return
+        if self.seen_at.get(user_id, 0) > disconnected_at:
+            return  # another worker re-announced the user meanwhile
+        await self._announce("gone", [user_id])
+        self._drop(user_id)
+        await self._notify_contacts(user_id, {
+            "event": "user_offline",
+            "data": {"user_id": user_id, "last_seen": self.last_seen.get(user_id)}
+        })
+
+    # =================== Cross-worker announcements ===================
+
+    def _mark_seen(self, user_id: str):
+        self.seen_at[user_id] = time.monotonic()
+        self.last_seen[user_id] = datetime.utcnow()
+
+    def _drop(self, user_id: str):
+        self.seen_at.pop(user_id, None)
+
+    async def _announce(self, op: str, user_ids: List[str]):
+        for start in range(0, len(user_ids), ANNOUNCE_BATCH):
+            batch = user_ids[start:start + ANNOUNCE_BATCH]
+            await self.bus.publish(PRESENCE_CHANNEL, orjson.dumps(
+                {"op": op, "worker": self.worker_id, "users": batch}
+            ).decode())
+
+    async def _on_announcement(self, raw: str):
+        message = orjson.loads(raw)
+        if message["worker"] == self.worker_id:
+            return
+        op, user_ids = message["op"], message["users"]
+        if op == "online":
+            for user_id in user_ids:
+                self._mark_seen(user_id)
+            return
+        # The user left another worker: if they still have a socket here, say so
+        # right away so the other worker's debounce timer does not report them offline
+        held = [user_id for user_id in user_ids if user_id in self.manager.active_connections]
+        if held:
+            await self._announce("online", held)
+        if op == "gone":
+            for user_id in user_ids:
+                if user_id not in self.manager.active_connections:
+                    self._drop(user_id)
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                # Sockets that missed their heartbeats are gone, even if TCP has not noticed yet
+                await self.manager.close_idle(self.timeout)
+                held = list(self.manager.active_connections)
+                for user_id in held:
+                    self._mark_seen(user_id)
+                await self._announce("online", held)
+                # Forget users whose worker stopped announcing them (crashed or partitioned)
+                now = time.monotonic()
+                for user_id, seen in list(self.seen_at.items()):
+                    if now - seen >= self.timeout and user_id not in self.manager.active_connections:
+                        self._drop(user_id)
+                self._forget_last_seen()
+            except Exception as e:
+                logger.error(f"Presence heartbeat failed: {e}")
+
+    def _forget_last_seen(self):
+        """Drop last_seen of users offline for longer than last_seen_retention."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.last_seen_retention)
+        for user_id, seen in list(self.last_seen.items()):
+            if seen < cutoff and user_id not in self.seen_at:
+                del self.last_seen[user_id]
+
+    async def _notify_contacts(self, user_id: str, event: dict):
+        try:
+            # The session only checks out a connection when the cache misses
+            async with AsyncSessionLocal() as db:
+                contacts = await contact_cache.get_contacts(db, UUID(user_id))
+            contact_ids = [str(contact_id) for contact_id in contacts]
+            if contact_ids:
+                await self.manager.send_to_users(event, contact_ids, replay=False)
+        except Exception as e:
+            logger.error(f"Failed to send presence of {user_id} to contacts: {e}")
+
+
+presence_tracker = PresenceTracker(
+    manager,
+    event_bus,
+    heartbeat_interval=settings.presence_heartbeat_interval,
+    timeout=settings.presence_timeout,
+    debounce=settings.presence_debounce,
+    last_seen_retention=settings.presence_last_seen_retention,
+)
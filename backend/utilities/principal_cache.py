@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from utilities.event_bus import event_bus, control_channel
+from config import settings
+import hashlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = control_channel("auth_invalidate")
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """
+    Lightweight, immutable snapshot of an authenticated user.
+    Exposes the same attributes handlers read from UserRecords.
+    """
+    user_id: UUID
+    email: str
+    username: str
+    gender: object
+    country: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_record(cls, user) -> "AuthenticatedUser":
+        return cls(
+            user_id=user.user_id,
+            email=user.email,
+            username=user.username,
+            gender=user.gender,
+            country=user.country,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+def token_key(token: str) -> str:
+    """Cache key for a token. Raw tokens are never kept in memory or sent over the bus."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Bounded TTL/LRU cache mapping a verified access token to its user snapshot.
+
+    Only tokens with an active session are cached. An entry never outlives the
+    token's own expiry, and logout removes it on every worker through the
+    event bus.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        key = token_key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: AuthenticatedUser, token_exp: Optional[float] = None):
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        key = token_key(token)
+        self._entries[key] = (time.monotonic() + ttl, user)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        self._entries.pop(token_key(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    async def attach(self):
+        """Listen for invalidations published by other workers."""
+        await event_bus.subscribe(INVALIDATION_CHANNEL, self._on_invalidation)
+
+    async def revoke(self, token: str):
+        """Drop a token on this worker and on every other worker."""
+        self.invalidate(token)
+        await event_bus.publish(INVALIDATION_CHANNEL, token_key(token))
+
+    async def _on_invalidation(self, key: str):
+        self._entries.pop(key, None)
+
+
+principal_cache = PrincipalCache(max_size=settings.auth_cache_size, ttl=settings.auth_cache_ttl)
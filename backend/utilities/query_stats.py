@@ -0,0 +1,108 @@
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from config import settings
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Statements shown in repeated-shape warnings are cut to this length
+SHAPE_PREVIEW = 200
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request ran more statements than its route's budget (query_budget_mode='raise')."""
+
+
+class QueryStats:
+    """
+    Statements executed on behalf of one request: how many, how long they
+    took, and how often each statement shape ran. A shape is the SQL text
+    with whitespace collapsed; bound values never appear in it, so the same
+    query run in a loop with different parameters is one shape.
+    """
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes executed at least `threshold` times, most frequent first: likely N+1 loops."""
+        return [(shape, runs) for shape, runs in self.shapes.most_common() if runs >= threshold]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def _shape(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def instrument_engine(engine: AsyncEngine):
+    """
+    Count every statement run on `engine` into the QueryStats of the current
+    request, if any. Outside a request (startup, background tasks) nothing is
+    recorded.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if current_query_stats.get() is not None:
+            conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is None:
+            return
+        starts = conn.info.get("query_start")
+        if starts:
+            stats.record(_shape(statement), time.perf_counter() - starts.pop())
+
+
+def route_budget(route: str) -> int:
+    """Statement budget of a route ("METHOD /path/template"), falling back to query_budget."""
+    return settings.query_budgets.get(route, settings.query_budget)
+
+
+def check_budget(route: str, stats: QueryStats):
+    """
+    Log the request's statement count and DB time, warn about repeated statement
+    shapes, and enforce the route's budget according to query_budget_mode:
+    'warn' logs a warning, 'raise' raises QueryBudgetExceeded (for test runs),
+    'off' only logs.
+    """
+    logger.info(f"route=\"{route}\" queries={stats.count} db_ms={stats.duration * 1000:.1f}")
+
+    for shape, runs in stats.repeated(settings.query_repeat_threshold):
+        logger.warning(
+            f"route=\"{route}\" repeated_query runs={runs} statement=\"{shape[:SHAPE_PREVIEW]}\""
+        )
+
+    budget = route_budget(route)
+    if settings.query_budget_mode == "off" or stats.count <= budget:
+        return
+    message = f"route=\"{route}\" queries={stats.count} exceeds budget={budget}"
+    if settings.query_budget_mode == "raise":
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def server_timing(stats: QueryStats) -> Dict[str, str]:
+    """Response headers reporting the request's database work."""
+    return {
+        "x-db-query-count": str(stats.count),
+        "server-timing": f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+    }
@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, status
+from config import settings
+from utilities.authentication_service import get_current_active_user
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "pinge:rl:"
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket: holds up to `capacity` tokens (the allowed burst) and
+    refills at `rate` tokens per second. Each request takes one token.
+    """
+    capacity: int
+    rate: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse "<count>/<second|minute|hour>", e.g. "60/minute"."""
+        count, _, period = spec.partition("/")
+        if period not in PERIODS:
+            raise ValueError(f"Invalid rate limit '{spec}': period must be one of {', '.join(PERIODS)}")
+        return cls(capacity=int(count), rate=int(count) / PERIODS[period])
+
+
+class MemoryRateLimitStore:
+    """
+    Buckets kept in this process. Every worker counts separately, so use it
+    for development or a single worker. The least recently used buckets are
+    dropped past `max_keys` (a dropped bucket simply starts full again).
+    """
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+        if tokens >= 1:
+            retry_after = 0.0
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Refill and take a token atomically in Redis, in one round trip.
+# Returns the seconds to wait before retrying (0 when the token was granted).
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Buckets shared by every worker, updated by a server-side script (Redis
+    clock, so workers' clocks don't matter). Keys expire once a bucket would
+    be full again.
+
+    Accepts any client exposing the `redis.asyncio.Redis` interface
+    (`register_script`), so a local stand-in can be injected.
+    """
+    def __init__(self, client=None, url: str = None):
+        self.url = url
+        self.client = client
+        self._script = None
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        if self._script is None:
+            if self.client is None:
+                import redis.asyncio as redis
+
+                self.client = redis.from_url(self.url)
+            self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        result = await self._script(keys=[key], args=[limit.capacity, limit.rate])
+        return float(result.decode() if isinstance(result, bytes) else result)
+
+
+def login_identity(ip_address: Optional[str], email: str) -> str:
+    """
+    Login bucket of one client trying one account. Keyed on both: an account
+    key alone would let anyone who knows the email lock its owner out, and an
+    IP key alone would make users behind one NAT share their attempts.
+    """
+    return f"{ip_address or 'unknown'}|{email.strip().lower()}"
+
+
+class RateLimiter:
+    """
+    Per-user token buckets for the hot paths, keyed by authenticated user id
+    (or client IP and account email for login, see login_identity) rather than
+    by IP alone, so users behind one NAT don't share a budget.
+    """
+    def __init__(self, store, limits: Dict[str, RateLimit]):
+        self.store = store
+        self.limits = limits
+        self.rejected = 0
+
+    async def check(self, name: str, identity: str):
+        """
+        Take a token from the `name` bucket of `identity`.
+
+        Raises:
+            HTTPException: 429 with Retry-After when the bucket is empty
+        """
+        try:
+            retry_after = await self.store.take(f"{KEY_PREFIX}{name}:{identity}", self.limits[name])
+        except Exception as e:
+            # Fail open: an unreachable limiter store must not take the API down
+            logger.error(f"Rate limiter store failed: {e}")
+            return
+        if retry_after > 0:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    def limit(self, name: str):
+        """Route dependency applying the `name` limit to the current user."""
+        async def dependency(current_user=Depends(get_current_active_user)):
+            await self.check(name, str(current_user.user_id))
+        return dependency
+
+    def stats(self) -> dict:
+        return {"rejected": self.rejected}
+
+
+def create_rate_limit_store(backend: str = None):
+    """
+    Build the store configured by the 'rate_limit_backend' setting ('memory' or 'redis').
+    """
+    backend = (backend or settings.rate_limit_backend).lower()
+    if backend == "memory":
+        return MemoryRateLimitStore()
+    if backend == "redis":
+        return RedisRateLimitStore(url=settings.redis_url)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+rate_limiter = RateLimiter(
+    create_rate_limit_store(),
+    {
+        "send": RateLimit.parse(settings.rate_limit_send),
+        "login": RateLimit.parse(settings.rate_limit_login),
+        "ws_frame": RateLimit.parse(settings.rate_limit_ws_frames),
+    },
+)
@@ -0,0 +1,152 @@
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, literal, cast, and_, tuple_, union_all, Float
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from database.models import UserRecords, Conversation, DirectMessage, GroupMember, GroupMessage, SEARCH_CONFIG
+from database.db_enum import ConversationType
+from utilities.conversation_service import conversation_type_literal
+from utilities.group_cache import group_cache
+from utilities.pagination import encode_cursor, decode_cursor, encode_ranked_cursor, decode_ranked_cursor
+from uuid import UUID
+import re
+
+# Words of the search text used in the query; the rest is ignored
+MAX_SEARCH_TERMS = 8
+
+
+def build_tsquery(text: str):
+    """
+    Turn free text into a tsquery matching messages that contain every word,
+    the last one also as a prefix of longer words (search as you type).
+    Only word characters reach to_tsquery, so user input cannot inject operators.
+    """
+    terms = re.findall(r"\w+", text.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search text must contain at least one word")
+    expression = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+    return func.to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), expression)
+
+
+async def search_messages_service(
+    current_user: UserRecords,
+    db: AsyncSession,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    order: str = "relevance",
+    conversation_type: Optional[ConversationType] = None,
+    contact_id: Optional[str] = None,
+    group_id: Optional[str] = None
+):
+    """
+    Full-text search over the caller's direct messages and group messages.
+
+    Candidates are restricted to the caller's conversations (optionally one
+    type, contact or group) before search_vector is matched: direct messages
+    through the caller's conversation rows and the pair index, group messages
+    through their memberships.
+    Results are ordered by ts_rank_cd (order="relevance") or newest first
+    (order="recent") and paginated by keyset: pass next_cursor as `cursor`.
+    """
+    try:
+        contact_uuid = UUID(contact_id) if contact_id else None
+        group_uuid = UUID(group_id) if group_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid contact or group ID")
+    if contact_uuid and group_uuid:
+        raise HTTPException(status_code=400, detail="Use only one of 'contact_id' or 'group_id'")
+    if contact_uuid:
+        conversation_type = ConversationType.Direct
+    if group_uuid:
+        conversation_type = ConversationType.Group
+        if await group_cache.role_of(db, group_uuid, current_user.user_id) is None:
+            raise HTTPException(status_code=403, detail="You are not a member of this group")
+
+    query = build_tsquery(q)
+    me = current_user.user_id
+    branches = []
+
+    if conversation_type in (None, ConversationType.Direct):
+        # Candidates come from the caller's direct conversations, each probing
+        # ix_direct_messages_pair_keyset through the (least, greatest) pair
+        # expression, so a common word never scans the whole corpus's matches
+        direct = select(
+            conversation_type_literal(ConversationType.Direct).label("conversation_type"),
+            Conversation.conversation_id,
+            DirectMessage.message_id,
+            DirectMessage.sender_id,
+            DirectMessage.content,
+            DirectMessage.sent_at,
+            func.ts_rank_cd(DirectMessage.search_vector, query).label("rank")
+        ).select_from(Conversation).join(DirectMessage, and_(
+            func.least(DirectMessage.sender_id, DirectMessage.receiver_id) == func.least(me, Conversation.conversation_id),
+            func.greatest(DirectMessage.sender_id, DirectMessage.receiver_id) == func.greatest(me, Conversation.conversation_id)
+        )).where(
+            Conversation.user_id == me,
+            Conversation.conversation_type == ConversationType.Direct,
+            DirectMessage.search_vector.bool_op("@@")(query)
+        )
+        if contact_uuid:
+            direct = direct.where(Conversation.conversation_id == contact_uuid)
+        branches.append(direct)
+
+    if conversation_type in (None, ConversationType.Group):
+        group = select(
+            conversation_type_literal(ConversationType.Group).label("conversation_type"),
+            GroupMessage.group_id.label("conversation_id"),
+            GroupMessage.message_id,
+            GroupMessage.sender_id,
+            GroupMessage.content,
+            GroupMessage.sent_at,
+            func.ts_rank_cd(GroupMessage.search_vector, query).label("rank")
+        ).where(GroupMessage.search_vector.bool_op("@@")(query))
+        if group_uuid:
+            group = group.where(GroupMessage.group_id == group_uuid)
+        else:
+            group = group.where(GroupMessage.group_id.in_(
+                select(GroupMember.group_id).where(GroupMember.user_id == me)
+            ))
+        branches.append(group)
+
+    hits = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("hits")
+
+    if order == "relevance":
+        ordering = [hits.c.rank.desc(), hits.c.sent_at.desc(), hits.c.message_id.desc()]
+        position = tuple_(hits.c.rank, hits.c.sent_at, hits.c.message_id)
+        bound = decode_ranked_cursor(cursor) if cursor else None
+        if bound is not None:
+            bound = (cast(literal(bound[0]), Float), bound[1], bound[2])
+    else:
+        ordering = [hits.c.sent_at.desc(), hits.c.message_id.desc()]
+        position = tuple_(hits.c.sent_at, hits.c.message_id)
+        bound = decode_cursor(cursor) if cursor else None
+
+    stmt = select(hits, UserRecords.username).join(UserRecords, UserRecords.user_id == hits.c.sender_id)
+    if bound is not None:
+        stmt = stmt.where(position < tuple_(*bound))
+    result = await db.execute(stmt.order_by(*ordering).limit(limit + 1))
+    rows = result.all()
+
+    results: List[dict] = []
+    for row in rows[:limit]:
+        results.append({
+            "conversation_type": row.conversation_type,
+            "conversation_id": row.conversation_id,
+            "message_id": row.message_id,
+            "sender_id": row.sender_id,
+            "sender_name": row.username,
+            "content": row.content,
+            "sent_at": row.sent_at,
+            "rank": row.rank
+        })
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        if order == "relevance":
+            next_cursor = encode_ranked_cursor(last.rank, last.sent_at, last.message_id)
+        else:
+            next_cursor = encode_cursor(last.sent_at, last.message_id)
+
+    return {"results": results, "next_cursor": next_cursor}
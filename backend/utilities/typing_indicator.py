@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from fastapi import HTTPException, status
+from config import settings
+from database.database import AsyncSessionLocal
+from utilities.contact_cache import contact_cache
+from utilities.group_cache import group_cache
+from utilities.websocket_manager import ConnectionManager, manager
+from utilities.presence import PresenceTracker, presence_tracker
+import time
+
+# (sender_id, "direct" | "group", contact or group id)
+TypingKey = Tuple[str, str, str]
+
+
+class TypingRelay:
+    """
+    Relays typing indicators to the other participants of a conversation.
+
+    A sender's typing_start is relayed at most once per `throttle` seconds per
+    conversation, however fast the client sends it, and only to participants
+    who are online. Every relayed event carries `expires_in`: clients clear the
+    indicator themselves if no refresh or typing_stop follows, and the server
+    forgets the state after the same delay. typing_stop is only relayed when a
+    start was, so idle conversations never fan out anything.
+    """
+    def __init__(self, manager: ConnectionManager, presence: PresenceTracker,
+                 throttle: float = 3.0, timeout: float = 6.0):
+        self.manager = manager
+        self.presence = presence
+        self.throttle = throttle
+        self.timeout = timeout
+        self.relayed = 0
+        self.suppressed = 0
+        self._started: Dict[TypingKey, float] = {}  # last relayed typing_start (monotonic)
+        self._last_prune = time.monotonic()
+
+    async def start(self, user, contact_id: Optional[str], group_id: Optional[str]) -> bool:
+        """Relay typing_start unless one was relayed recently. Returns whether it was relayed."""
+        key = self._key(user, contact_id, group_id)
+        now = time.monotonic()
+        self._prune(now)
+        started = self._started.get(key)
+        if started is not None and now - started < self.throttle:
+            self.suppressed += 1
+            return False
+        recipients = await self._recipients(user, contact_id, group_id)
+        self._started[key] = now
+        await self._relay(user, group_id, recipients, is_typing=True)
+        return True
+
+    async def stop(self, user, contact_id: Optional[str], group_id: Optional[str]) -> bool:
+        """Relay typing_stop if participants currently see the user typing."""
+        key = self._key(user, contact_id, group_id)
+        started = self._started.pop(key, None)
+        if started is None or time.monotonic() - started >= self.timeout:
+            self.suppressed += 1
+            return False
+        recipients = await self._recipients(user, contact_id, group_id)
+        await self._relay(user, group_id, recipients, is_typing=False)
+        return True
+
+    def _key(self, user, contact_id: Optional[str], group_id: Optional[str]) -> TypingKey:
+        if group_id is not None:
+            return (str(user.user_id), "group", group_id)
+        return (str(user.user_id), "direct", contact_id)
+
+    def _prune(self, now: float):
+        # Expired entries are dropped in one sweep at most every `timeout` seconds
+        if now - self._last_prune < self.timeout:
+            return
+        self._last_prune = now
+        for key, started in list(self._started.items()):
+            if now - started >= self.timeout:
+                del self._started[key]
+
+    async def _recipients(self, user, contact_id: Optional[str], group_id: Optional[str]) -> List[str]:
+        async with AsyncSessionLocal() as db:
+            if group_id is not None:
+                members = await group_cache.get_members(db, UUID(group_id))
+                if user.user_id not in members:
+                    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a member of this group")
+                candidates = [str(member_id) for member_id in members if member_id != user.user_id]
+            else:
+                if not await contact_cache.is_contact(db, user.user_id, UUID(contact_id)):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+                candidates = [contact_id]
+        # Nobody offline needs to know someone is typing
+        return [user_id for user_id in candidates if self.presence.is_online(user_id)]
+
+    async def _relay(self, user, group_id: Optional[str], recipients: List[str], is_typing: bool):
+        if not recipients:
+            return
+        self.relayed += 1
+        await self.manager.send_to_users({
+            "event": "user_typing",
+            "data": {
+                "user_id": str(user.user_id),
+                "username": user.username,
+                "group_id": group_id,
+                "is_typing": is_typing,
+                "expires_in": self.timeout if is_typing else 0
+            }
+        }, recipients, replay=False)
+
+    def stats(self) -> dict:
+        return {"active": len(self._started), "relayed": self.relayed, "suppressed": self.suppressed}
+
+
+typing_relay = TypingRelay(
+    manager,
+    presence_tracker,
+    throttle=settings.typing_throttle,
+    timeout=settings.typing_timeout,
+)
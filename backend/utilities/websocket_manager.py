@@ -1,55 +1,369 @@
-from typing import Dict, List
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import uuid4
 from fastapi import WebSocket
+from config import settings
+from utilities.event_bus import EventBus, event_bus, user_channel, control_channel
+from utilities.metrics import Counter
+import asyncio
 import logging
-import json
+import orjson
+import time
 
 logger = logging.getLogger(__name__)
 
+BROADCAST_CHANNEL = control_channel("broadcast")
+
+# Close code sent to clients evicted for not draining their queue ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Close code sent to clients that stopped sending heartbeats ("Going Away")
+IDLE_CLOSE_CODE = 1001
+
+# reason: "error" (write raised), "dropped" (queue full) or "evicted" (slow consumer closed)
+ws_send_failures = Counter(
+    "pinge_ws_send_failures_total", "WebSocket messages that could not be delivered to a socket", ["reason"]
+)
+
+# An event is either a dict, or a frame already encoded with encode_event()
+Event = Union[dict, str, bytes]
+
+
+def encode_event(message: dict) -> str:
+    """
+    Encode an event into a text frame, once, so it can be written to any number of sockets.
+    """
+    return orjson.dumps(message).decode()
+
+
+def as_frame(message: Event) -> str:
+    if isinstance(message, str):
+        return message
+    if isinstance(message, bytes):
+        return message.decode()
+    return encode_event(message)
+
+
+# Prefix of bus messages carrying an ephemeral frame (not numbered or replayed).
+# Frames are JSON objects, so they never start with it.
+EPHEMERAL_MARK = "~"
+
+
+def bus_message(frame: str, replay: bool) -> str:
+    return frame if replay else EPHEMERAL_MARK + frame
+
+
+def with_seq(frame: str, seq: int) -> str:
+    # Splice the sequence number in as the first key instead of re-encoding the event
+    return f'{{"seq":{seq},{frame[1:]}'
+
+
+class UserStream:
+    """
+    Sequence numbers and a bounded replay buffer for one user's events on this worker.
+
+    Every event delivered to the user gets the next `seq` and is kept in the
+    ring buffer, so a client reconnecting with the last seq it saw gets only
+    what it missed. `epoch` identifies this buffer: after a worker restart, or
+    when a client lands on another worker, epochs differ and the client must
+    resync over HTTP instead.
+
+    Ephemeral events (typing, presence) bypass the stream: they would push
+    real messages out of the buffer and are stale by the time they replay.
+    """
+    def __init__(self, size: int):
+        self.epoch = uuid4().hex[:12]
+        self.seq = 0
+        self.buffer: Deque[Tuple[int, str]] = deque(maxlen=size)
+        self.idle_since: Optional[float] = None  # set while the user has no socket here
+
+    def append(self, frame: str) -> str:
+        self.seq += 1
+        framed = with_seq(frame, self.seq)
+        self.buffer.append((self.seq, framed))
+        return framed
+
+    def missed(self, last_seq: int) -> Optional[List[str]]:
+        """Frames after last_seq, or None when some of them already rolled out of the buffer."""
+        if last_seq > self.seq:
+            return None
+        if last_seq < self.seq and (not self.buffer or self.buffer[0][0] > last_seq + 1):
+            return None
+        return [framed for seq, framed in self.buffer if seq > last_seq]
+
+
+class ClientConnection:
+    """
+    A single WebSocket with its own bounded outbound queue and writer task.
+
+    Producers only enqueue, so a slow socket never blocks delivery to the
+    others. When the queue stays full for longer than `evict_after` seconds
+    the connection reports itself as a slow consumer and gets evicted.
+    """
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int, evict_after: float):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.evict_after = evict_after
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.full_since: Optional[float] = None
+        self.last_received = time.monotonic()
+        self.writer: Optional[asyncio.Task] = None
+        self.on_failure = None
+
+    def start(self, on_failure):
+        self.on_failure = on_failure
+        self.writer = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def touch(self):
+        """Record that the client sent a frame (any frame counts as a heartbeat)."""
+        self.last_received = time.monotonic()
+
+    def enqueue(self, message: str) -> bool:
+        """
+        Queue a message without waiting.
+        Returns False once the queue has been full for too long.
+        """
+        try:
+            self.queue.put_nowait(message)
+            self.full_since = None
+            return True
+        except asyncio.QueueFull:
+            now = time.monotonic()
+            if self.full_since is None:
+                self.full_since = now
+            logger.warning(f"Send queue full for {self.user_id}, dropping message")
+            ws_send_failures.labels("dropped").inc()
+            return now - self.full_since < self.evict_after
+
+    async def _write_loop(self):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except Exception as e:
+                logger.error(f"Failed to send WebSocket message to {self.user_id}: {e}")
+                ws_send_failures.labels("error").inc()
+                await self.on_failure(self)
+                return
+
+    async def close(self, code: int = 1000):
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=1.0)
+        except Exception:
+            pass
+
+
 class ConnectionManager:
     """
     Manages active WebSocket connections.
     Maps user_ids to their active WebSocket connections (allows multi-device).
+
+    Sockets are local to the worker process, so every send goes through the
+    event bus. A worker subscribes to a user's channel while it holds at least
+    one socket for that user and delivers whatever arrives on it.
+
+    Each user's events are numbered and buffered (see UserStream). The channel
+    stays subscribed for `replay_retention` seconds after the last socket
+    closes, so a client that reconnects within that time replays what it
+    missed from memory.
+
+    Listeners (e.g. presence tracking) are told when this worker gets a user's
+    first socket and loses their last one.
     """
-    def __init__(self):
-        self.active_connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, bus: EventBus, max_queue: int = 256, evict_after: float = 5.0,
+                 replay_buffer: int = 100, replay_retention: float = 120.0):
+        self.bus = bus
+        self.max_queue = max_queue
+        self.evict_after = evict_after
+        self.replay_buffer = replay_buffer
+        self.replay_retention = replay_retention
+        self.active_connections: Dict[str, List[ClientConnection]] = {}
+        self.streams: Dict[str, UserStream] = {}
+        self.listeners: List = []
+        self._expiry_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        await self.bus.start()
+        await self.bus.subscribe(BROADCAST_CHANNEL, self._deliver_broadcast)
+        self._expiry_task = asyncio.get_running_loop().create_task(self._expire_streams_loop())
 
-    async def connect(self, websocket: WebSocket, user_id: str):
+    async def stop(self):
+        if self._expiry_task:
+            self._expiry_task.cancel()
+        for connections in list(self.active_connections.values()):
+            for connection in connections:
+                if connection.writer:
+                    connection.writer.cancel()
+        await self.bus.stop()
+
+    async def connect(self, websocket: WebSocket, user_id: str,
+                      last_seq: Optional[int] = None, epoch: Optional[str] = None):
+        """
+        Register a socket. A client resuming a session passes the epoch and the
+        last seq it received: missed events are replayed from the buffer, or a
+        resync event tells it to refetch over HTTP.
+        """
         await websocket.accept()
-        if user_id not in self.active_connections:
+        connection = ClientConnection(websocket, user_id, self.max_queue, self.evict_after)
+        connection.start(self._evict)
+
+        stream = self.streams.get(user_id)
+        if stream is None:
+            stream = self.streams[user_id] = UserStream(self.replay_buffer)
+        stream.idle_since = None
+        # Queued before the socket is registered, so replayed frames come before new ones
+        connection.enqueue(encode_event({"event": "session", "data": {"epoch": stream.epoch, "seq": stream.seq}}))
+        if last_seq is not None:
+            missed = stream.missed(last_seq) if epoch == stream.epoch else None
+            if missed is None:
+                connection.enqueue(encode_event({"event": "resync", "data": {}}))
+            else:
+                for frame in missed:
+                    connection.enqueue(frame)
+
+        first_socket = user_id not in self.active_connections
+        if first_socket:
             self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        self.active_connections[user_id].append(connection)
+        if not self.bus.is_subscribed(user_channel(user_id)):
+            await self.bus.subscribe(user_channel(user_id), lambda message: self._deliver_local(user_id, message))
         logger.info(f"User {user_id} connected via WebSocket")
+        if first_socket:
+            await self._notify_listeners("user_connected", user_id)
+        return connection
 
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        if user_id in self.active_connections:
-            if websocket in self.active_connections[user_id]:
-                self.active_connections[user_id].remove(websocket)
-            if not self.active_connections[user_id]:
-                del self.active_connections[user_id]
+    async def disconnect(self, websocket: WebSocket, user_id: str):
+        for connection in self.active_connections.get(user_id, []):
+            if connection.websocket is websocket:
+                await self._remove(connection)
+                break
         logger.info(f"User {user_id} disconnected")
 
-    async def send_personal_message(self, message: dict, user_id: str):
+    async def _remove(self, connection: ClientConnection):
+        user_id = connection.user_id
+        connections = self.active_connections.get(user_id)
+        if connections is None or connection not in connections:
+            return
+        connections.remove(connection)
+        if connection.writer and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        if not connections:
+            del self.active_connections[user_id]
+            # Keep buffering for a while so a reconnect can resume
+            stream = self.streams.get(user_id)
+            if stream is not None:
+                stream.idle_since = time.monotonic()
+            await self._notify_listeners("user_disconnected", user_id)
+
+    async def _notify_listeners(self, hook: str, user_id: str):
+        for listener in self.listeners:
+            try:
+                await getattr(listener, hook)(user_id)
+            except Exception as e:
+                logger.error(f"WebSocket listener {hook} failed for {user_id}: {e}")
+
+    async def _expire_streams_loop(self):
+        while True:
+            await asyncio.sleep(min(self.replay_retention, 30.0))
+            try:
+                await self.expire_streams()
+            except Exception as e:
+                logger.error(f"Replay buffer expiry failed: {e}")
+
+    async def expire_streams(self):
         """
-        Send a message to a specific user (to all their active devices).
+        Drop the replay buffers (and channel subscriptions) of users gone for longer than replay_retention.
         """
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    logger.error(f"Failed to send WebSocket message to {user_id}: {e}")
+        now = time.monotonic()
+        for user_id, stream in list(self.streams.items()):
+            if stream.idle_since is not None and now - stream.idle_since >= self.replay_retention:
+                del self.streams[user_id]
+                await self.bus.unsubscribe(user_channel(user_id))
 
-    async def broadcast(self, message: dict, exclude_user: str = None):
+    async def _evict(self, connection: ClientConnection, code: int = 1011):
+        await self._remove(connection)
+        await connection.close(code=code)
+
+    async def close_idle(self, timeout: float):
         """
-        Broadcast message to all connected users.
+        Close sockets that have not sent a frame for `timeout` seconds.
+        """
+        now = time.monotonic()
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                if now - connection.last_received > timeout:
+                    logger.info(f"Closing idle WebSocket for {connection.user_id}")
+                    await self._evict(connection, code=IDLE_CLOSE_CODE)
+
+    async def reply(self, connection: ClientConnection, message: Event):
         """
-        for user_id, connections in self.active_connections.items():
+        Queue a message for one specific socket, e.g. the answer to a frame it sent.
+        """
+        if not connection.enqueue(as_frame(message)):
+            await self._evict_slow(connection)
+
+    async def _evict_slow(self, connection: ClientConnection):
+        logger.warning(f"Evicting slow WebSocket consumer for {connection.user_id}")
+        ws_send_failures.labels("evicted").inc()
+        await self._evict(connection, code=SLOW_CONSUMER_CLOSE_CODE)
+
+    async def _deliver_local(self, user_id: str, message: str):
+        """
+        Number and buffer an encoded event (unless it is ephemeral), then enqueue
+        it on every socket this worker holds for the user.
+        """
+        stream = self.streams.get(user_id)
+        if stream is None:
+            return
+        if message.startswith(EPHEMERAL_MARK):
+            framed = message[len(EPHEMERAL_MARK):]
+        else:
+            framed = stream.append(message)
+        for connection in list(self.active_connections.get(user_id, [])):
+            if not connection.enqueue(framed):
+                await self._evict_slow(connection)
+
+    async def _deliver_broadcast(self, envelope: str):
+        # Envelope is "<excluded user id>\n<frame>", so the frame is never re-parsed
+        exclude_user, frame = envelope.split("\n", 1)
+        for user_id in list(self.streams):
             if user_id == exclude_user:
                 continue
-            for connection in connections:
-                try:
-                    await connection.send_json(message)
-                except Exception:
-                    pass
+            await self._deliver_local(user_id, frame)
+
+    async def send_personal_message(self, message: Event, user_id: str, replay: bool = True):
+        """
+        Send a message to a specific user (to all their active devices, on any worker).
+        Returns once the message is queued, not when it is written.
+        With replay=False the event gets no seq and is not kept for reconnecting clients.
+        """
+        await self.bus.publish(user_channel(user_id), bus_message(as_frame(message), replay))
+
+    async def send_to_users(self, message: Event, user_ids: Iterable[str], replay: bool = True):
+        """
+        Fan a message out to several users with a single bus publish batch.
+        The event is encoded once and the same frame is written to every socket.
+        With replay=False the event gets no seq and is not kept for reconnecting clients.
+        """
+        frame = bus_message(as_frame(message), replay)
+        await self.bus.publish_many((user_channel(user_id), frame) for user_id in user_ids)
+
+    def connection_count(self) -> int:
+        """Open sockets on this worker."""
+        return sum(len(connections) for connections in self.active_connections.values())
+
+    async def broadcast(self, message: Event, exclude_user: str = None):
+        """
+        Broadcast message to all connected users.
+        """
+        await self.bus.publish(BROADCAST_CHANNEL, f"{exclude_user or ''}\n{as_frame(message)}")
 
-manager = ConnectionManager()
+manager = ConnectionManager(
+    event_bus,
+    max_queue=settings.ws_send_queue_size,
+    evict_after=settings.ws_slow_consumer_timeout,
+    replay_buffer=settings.ws_replay_buffer_size,
+    replay_retention=settings.ws_replay_retention,
+)
@@ -0,0 +1,127 @@
+from typing import Any, Awaitable, Callable, Dict
+from fastapi import HTTPException
+from pydantic import ValidationError
+from database.database import AsyncSessionLocal
+from schema.message_schema import SendDirectMessage
+from schema.websocket_schema import ClientFrame, WsSendGroupMessage, WsMarkRead, WsTyping
+from utilities.principal_cache import AuthenticatedUser
+from utilities.message_service import (
+    send_direct_message_service,
+    send_group_message_service,
+    mark_messages_as_read_service,
+    mark_all_from_contact_as_read_service,
+    mark_group_as_read_service
+)
+from utilities.typing_indicator import typing_relay
+from utilities.rate_limiter import rate_limiter
+import logging
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# Client -> server protocol on /ws.
+#
+# Every client frame is {"type": ..., "id": ..., "payload": {...}} and is
+# answered with either
+#     {"event": "ack", "id": <id>, "data": <same result as the REST endpoint>}
+#     {"event": "error", "id": <id>, "data": {"status": <http status>, "detail": ...}}
+# Frames run through the same service layer as the REST API, as the identity
+# authenticated on the socket, one database session per frame. Every frame
+# takes a token from the user's ws_frame bucket, and sends also share the
+# "send" bucket with the REST endpoints; over the limit the reply is a 429
+# error frame.
+
+Handler = Callable[[dict, AuthenticatedUser], Awaitable[Any]]
+
+
+async def handle_send_direct(payload: dict, user: AuthenticatedUser):
+    message = SendDirectMessage(**payload)
+    await rate_limiter.check("send", str(user.user_id))
+    async with AsyncSessionLocal() as db:
+        return await send_direct_message_service(message, user, db)
+
+
+async def handle_send_group(payload: dict, user: AuthenticatedUser):
+    message = WsSendGroupMessage(**payload)
+    await rate_limiter.check("send", str(user.user_id))
+    async with AsyncSessionLocal() as db:
+        return await send_group_message_service(message.group_id, message, user, db)
+
+
+async def handle_mark_read(payload: dict, user: AuthenticatedUser):
+    target = WsMarkRead(**payload)
+    async with AsyncSessionLocal() as db:
+        if target.message_ids is not None:
+            return await mark_messages_as_read_service(target.message_ids, user, db)
+        if target.contact_id is not None:
+            return await mark_all_from_contact_as_read_service(target.contact_id, user, db)
+        return await mark_group_as_read_service(target.group_id, user, db)
+
+
+async def handle_typing_start(payload: dict, user: AuthenticatedUser):
+    target = WsTyping(**payload)
+    return {"relayed": await typing_relay.start(user, target.contact_id, target.group_id)}
+
+
+async def handle_typing_stop(payload: dict, user: AuthenticatedUser):
+    target = WsTyping(**payload)
+    return {"relayed": await typing_relay.stop(user, target.contact_id, target.group_id)}
+
+
+async def handle_ack(payload: dict, user: AuthenticatedUser):
+    # Keepalive / round-trip probe: answered without touching the database
+    return None
+
+
+HANDLERS: Dict[str, Handler] = {
+    "send_direct": handle_send_direct,
+    "send_group": handle_send_group,
+    "mark_read": handle_mark_read,
+    "typing_start": handle_typing_start,
+    "typing_stop": handle_typing_stop,
+    "ack": handle_ack,
+}
+
+
+def error_frame(frame_id, status: int, detail) -> dict:
+    return {"event": "error", "id": frame_id, "data": {"status": status, "detail": detail}}
+
+
+def validation_detail(exc: ValidationError) -> list:
+    return [{"loc": list(error["loc"]), "msg": error["msg"]} for error in exc.errors()]
+
+
+async def handle_client_frame(raw: str, user: AuthenticatedUser) -> dict:
+    """
+    Run one client frame and build the reply frame for it.
+    Never raises for bad input or failed commands: those become error frames.
+    """
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return error_frame(None, 400, "Frames must be JSON objects")
+
+    frame_id = data.get("id") if isinstance(data.get("id"), str) else None
+    try:
+        await rate_limiter.check("ws_frame", str(user.user_id))
+    except HTTPException as e:
+        return error_frame(frame_id, e.status_code, e.detail)
+
+    try:
+        frame = ClientFrame(**data)
+    except ValidationError as e:
+        return error_frame(frame_id, 422, validation_detail(e))
+
+    try:
+        result = await HANDLERS[frame.type](frame.payload, user)
+    except ValidationError as e:
+        return error_frame(frame.id, 422, validation_detail(e))
+    except HTTPException as e:
+        return error_frame(frame.id, e.status_code, e.detail)
+    except Exception as e:
+        logger.error(f"WebSocket {frame.type} from {user.user_id} failed: {e}")
+        return error_frame(frame.id, 500, "Internal server error")
+
+    return {"event": "ack", "id": frame.id, "data": result}
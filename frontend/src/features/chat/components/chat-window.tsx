@@ -56,7 +56,7 @@ function ChatWindow({ onBack }: ChatWindowProps) {
   const messages = useMemo(() => {
     if (!messagesQuery.data?.pages) return [];
     // API returns newest first, reverse for display (oldest at top, newest at bottom)
-    return messagesQuery.data.pages.flat().reverse();
+    return messagesQuery.data.pages.flatMap((page) => page.messages).reverse();
   }, [messagesQuery.data?.pages]);
 
   // Convert to format expected by MessageList
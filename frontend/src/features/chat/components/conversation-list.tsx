@@ -170,7 +170,7 @@ function ConversationList({ onSelect }: ConversationListProps) {
                     lastMessage={unread ? `${unread.unread_count} new messages` : undefined}
                     lastMessageTime={unread?.last_message_at || undefined}
                     unreadCount={unread?.unread_count || 0}
-                    isOnline={false}
+                    isOnline={contact.is_online}
                     isActive={activeContactId === contact.contact_id}
                     onClick={() => handleSelectContact(contact.contact_id)}
                   />
@@ -3,7 +3,7 @@ import { useMutation, useQueryClient, useInfiniteQuery, useQuery } from '@tansta
 import { QUERY_KEYS } from '@/lib/constants';
 import { wsManager } from '@/services/websocket/manager';
 import { chatService } from './services';
-import type { DirectMessage } from './types';
+import type { DirectMessage, DirectMessagePage } from './types';
 
 // WebSocket event type from backend
 interface NewDirectMessageEvent {
@@ -18,23 +18,27 @@ interface NewDirectMessageEvent {
   };
 }
 
+interface MessagesReadEvent {
+  event: string;
+  data: {
+    reader_id: string;
+    sender_id: string;
+    message_ids: string[];
+  };
+}
+
 /**
  * Hook for fetching direct messages with pagination
  */
 export function useDirectMessages(contactId: string | null) {
   return useInfiniteQuery({
     queryKey: contactId ? QUERY_KEYS.MESSAGES.DIRECT(contactId) : ['messages', 'direct', null],
-    queryFn: async ({ pageParam = 0 }) => {
-      if (!contactId) return [];
+    queryFn: async ({ pageParam }): Promise<DirectMessagePage> => {
+      if (!contactId) return { messages: [], before_cursor: null, after_cursor: null };
       return chatService.getDirectMessages(contactId, 50, pageParam);
     },
-    initialPageParam: 0,
-    getNextPageParam: (lastPage, allPages) => {
-      if (lastPage.length === 50) {
-        return allPages.length * 50;
-      }
-      return undefined;
-    },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.before_cursor ?? undefined,
     enabled: !!contactId,
     staleTime: 30 * 1000,
   });
@@ -63,11 +67,11 @@ export function useSendDirectMessage() {
       // Update the messages cache - add to BEGINNING of first page (API returns newest first)
       // After reversing for display, this will appear at the bottom (newest)
       const queryKey = QUERY_KEYS.MESSAGES.DIRECT(newMessage.receiver_id);
-      queryClient.setQueryData(queryKey, (oldData: { pages: DirectMessage[][]; pageParams: number[] } | undefined) => {
-        if (!oldData) return { pages: [[newMessage]], pageParams: [0] };
+      queryClient.setQueryData(queryKey, (oldData: { pages: DirectMessagePage[]; pageParams: (string | undefined)[] } | undefined) => {
+        if (!oldData) return { pages: [{ messages: [newMessage], before_cursor: null, after_cursor: null }], pageParams: [undefined] };
         return {
           ...oldData,
-          pages: [[newMessage, ...oldData.pages[0]], ...oldData.pages.slice(1)],
+          pages: [{ ...oldData.pages[0], messages: [newMessage, ...oldData.pages[0].messages] }, ...oldData.pages.slice(1)],
         };
       });
 
@@ -130,11 +134,11 @@ export function useMessageSubscription(_activeContactId?: string | null) {
 
       // Update messages cache for this contact
       const queryKey = QUERY_KEYS.MESSAGES.DIRECT(data.sender_id);
-      queryClient.setQueryData(queryKey, (oldData: { pages: DirectMessage[][]; pageParams: number[] } | undefined) => {
-        if (!oldData) return { pages: [[newMessage]], pageParams: [0] };
+      queryClient.setQueryData(queryKey, (oldData: { pages: DirectMessagePage[]; pageParams: (string | undefined)[] } | undefined) => {
+        if (!oldData) return { pages: [{ messages: [newMessage], before_cursor: null, after_cursor: null }], pageParams: [undefined] };
 
         // Check if message already exists (prevent duplicates)
-        const allMessages = oldData.pages.flat();
+        const allMessages = oldData.pages.flatMap((page) => page.messages);
         if (allMessages.some(msg => msg.message_id === newMessage.message_id)) {
           return oldData; // Don't add duplicate
         }
@@ -142,7 +146,7 @@ export function useMessageSubscription(_activeContactId?: string | null) {
         // Add to beginning (newest first in API order)
         return {
           ...oldData,
-          pages: [[newMessage, ...oldData.pages[0]], ...oldData.pages.slice(1)],
+          pages: [{ ...oldData.pages[0], messages: [newMessage, ...oldData.pages[0].messages] }, ...oldData.pages.slice(1)],
         };
       });
 
@@ -152,9 +156,38 @@ export function useMessageSubscription(_activeContactId?: string | null) {
     [queryClient]
   );
 
+  // Read receipts: sent to the reader's devices and to the sender
+  const handleMessagesRead = useCallback(
+    (event: MessagesReadEvent) => {
+      if (event.event !== 'messages_read') return;
+
+      const { reader_id, sender_id, message_ids } = event.data;
+      const readIds = new Set(message_ids);
+
+      // The conversation is cached under the other party's id; the key for our own id does not exist
+      for (const contactId of [reader_id, sender_id]) {
+        queryClient.setQueryData(QUERY_KEYS.MESSAGES.DIRECT(contactId), (oldData: { pages: DirectMessagePage[]; pageParams: (string | undefined)[] } | undefined) => {
+          if (!oldData) return oldData;
+          return {
+            ...oldData,
+            pages: oldData.pages.map((page) => ({
+              ...page,
+              messages: page.messages.map((msg) => (readIds.has(msg.message_id) ? { ...msg, is_read: true } : msg)),
+            })),
+          };
+        });
+      }
+    },
+    [queryClient]
+  );
+
   useEffect(() => {
     // Subscribe to all incoming WebSocket messages
     const unsubscribe = wsManager.subscribe('new_direct_message', handleNewMessage as (data: unknown) => void);
-    return unsubscribe;
-  }, [handleNewMessage]);
+    const unsubRead = wsManager.subscribe('messages_read', handleMessagesRead as (data: unknown) => void);
+    return () => {
+      unsubscribe();
+      unsubRead();
+    };
+  }, [handleNewMessage, handleMessagesRead]);
 }
@@ -1,17 +1,18 @@
 import { apiClient } from '@/services/api/client';
 import { API_ENDPOINTS } from '@/lib/constants';
-import type { DirectMessage, SendDirectMessagePayload, UnreadSummary } from './types';
+import type { DirectMessage, DirectMessagePage, SendDirectMessagePayload, UnreadSummary } from './types';
 
 /**
  * Chat/Messages API service functions
  */
 export const chatService = {
   /**
-   * Get direct messages with a contact
+   * Get direct messages with a contact, older than the `before` cursor if given
    */
-  async getDirectMessages(contactId: string, limit = 50, offset = 0): Promise<DirectMessage[]> {
-    const response = await apiClient.get<DirectMessage[]>(
-      `${API_ENDPOINTS.MESSAGES.GET_DIRECT(contactId)}?limit=${limit}&offset=${offset}`
+  async getDirectMessages(contactId: string, limit = 50, before?: string): Promise<DirectMessagePage> {
+    const cursor = before ? `&before=${encodeURIComponent(before)}` : '';
+    const response = await apiClient.get<DirectMessagePage>(
+      `${API_ENDPOINTS.MESSAGES.GET_DIRECT(contactId)}?limit=${limit}${cursor}`
     );
     return response.data;
   },
@@ -14,6 +14,15 @@ export interface DirectMessage {
   sent_at: string;
 }
 
+/**
+ * Page of direct message history (newest first)
+ */
+export interface DirectMessagePage {
+  messages: DirectMessage[];
+  before_cursor: string | null;
+  after_cursor: string | null;
+}
+
 /**
  * Message type for UI components (normalized format)
  */
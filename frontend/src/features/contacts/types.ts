@@ -17,6 +17,8 @@ export interface Contact {
   gender: Gender;
   country: string;
   connected_since: string;
+  is_online: boolean;
+  last_seen: string | null;
 }
 
 /**
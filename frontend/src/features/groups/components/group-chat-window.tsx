@@ -65,7 +65,7 @@ function GroupChatWindow({ onBack }: GroupChatWindowProps) {
   // Flatten paginated messages and reverse for chronological order
   const messages = useMemo(() => {
     if (!messagesQuery.data?.pages) return [];
-    return messagesQuery.data.pages.flat().reverse();
+    return messagesQuery.data.pages.flatMap((page) => page.messages).reverse();
   }, [messagesQuery.data?.pages]);
 
   // Handle sending message
@@ -4,7 +4,7 @@ import { toast } from 'sonner';
 import { QUERY_KEYS } from '@/lib/constants';
 import { wsManager } from '@/services/websocket/manager';
 import { groupsService } from './services';
-import type { Group, GroupMessage } from './types';
+import type { Group, GroupMessage, GroupMessagePage } from './types';
 
 // WebSocket event type from backend
 interface NewGroupMessageEvent {
@@ -36,17 +36,12 @@ export function useGroups() {
 export function useGroupMessages(groupId: string | null) {
   return useInfiniteQuery({
     queryKey: groupId ? QUERY_KEYS.GROUPS.MESSAGES(groupId) : ['groups', 'messages', null],
-    queryFn: async ({ pageParam = 0 }) => {
-      if (!groupId) return [];
+    queryFn: async ({ pageParam }): Promise<GroupMessagePage> => {
+      if (!groupId) return { messages: [], before_cursor: null, after_cursor: null };
       return groupsService.getGroupMessages(groupId, 50, pageParam);
     },
-    initialPageParam: 0,
-    getNextPageParam: (lastPage, allPages) => {
-      if (lastPage.length === 50) {
-        return allPages.length * 50;
-      }
-      return undefined;
-    },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.before_cursor ?? undefined,
     enabled: !!groupId,
     staleTime: 30 * 1000,
   });
@@ -95,18 +90,18 @@ export function useSendGroupMessage(groupId: string) {
     onSuccess: (newMessage) => {
       // Update the cache with the new message
       const queryKey = QUERY_KEYS.GROUPS.MESSAGES(newMessage.group_id);
-      queryClient.setQueryData(queryKey, (oldData: { pages: GroupMessage[][]; pageParams: number[] } | undefined) => {
-        if (!oldData) return { pages: [[newMessage]], pageParams: [0] };
+      queryClient.setQueryData(queryKey, (oldData: { pages: GroupMessagePage[]; pageParams: (string | undefined)[] } | undefined) => {
+        if (!oldData) return { pages: [{ messages: [newMessage], before_cursor: null, after_cursor: null }], pageParams: [undefined] };
 
         // Check if message already exists (prevent duplicates)
-        const allMessages = oldData.pages.flat();
+        const allMessages = oldData.pages.flatMap((page) => page.messages);
         if (allMessages.some(msg => msg.message_id === newMessage.message_id)) {
           return oldData;
         }
 
         return {
           ...oldData,
-          pages: [[newMessage, ...oldData.pages[0]], ...oldData.pages.slice(1)],
+          pages: [{ ...oldData.pages[0], messages: [newMessage, ...oldData.pages[0].messages] }, ...oldData.pages.slice(1)],
         };
       });
     },
@@ -213,11 +208,11 @@ export function useGroupMessageSubscription() {
 
       // Update messages cache for this group
       const queryKey = QUERY_KEYS.GROUPS.MESSAGES(data.group_id);
-      queryClient.setQueryData(queryKey, (oldData: { pages: GroupMessage[][]; pageParams: number[] } | undefined) => {
-        if (!oldData) return { pages: [[newMessage]], pageParams: [0] };
+      queryClient.setQueryData(queryKey, (oldData: { pages: GroupMessagePage[]; pageParams: (string | undefined)[] } | undefined) => {
+        if (!oldData) return { pages: [{ messages: [newMessage], before_cursor: null, after_cursor: null }], pageParams: [undefined] };
 
         // Check if message already exists (prevent duplicates)
-        const allMessages = oldData.pages.flat();
+        const allMessages = oldData.pages.flatMap((page) => page.messages);
         if (allMessages.some(msg => msg.message_id === newMessage.message_id)) {
           return oldData;
         }
@@ -225,7 +220,7 @@ export function useGroupMessageSubscription() {
         // Add to beginning (newest first in API order)
         return {
           ...oldData,
-          pages: [[newMessage, ...oldData.pages[0]], ...oldData.pages.slice(1)],
+          pages: [{ ...oldData.pages[0], messages: [newMessage, ...oldData.pages[0].messages] }, ...oldData.pages.slice(1)],
         };
       });
     },
@@ -3,6 +3,7 @@ import { API_ENDPOINTS } from '@/lib/constants';
 import type {
   Group,
   GroupMessage,
+  GroupMessagePage,
   GroupMember,
   CreateGroupRequest,
   UpdateGroupRequest,
@@ -53,11 +54,12 @@ export const groupsService = {
   },
 
   /**
-   * Get messages for a group
+   * Get messages for a group, older than the `before` cursor if given
    */
-  async getGroupMessages(groupId: string, limit = 50, offset = 0): Promise<GroupMessage[]> {
-    const response = await apiClient.get<GroupMessage[]>(
-      `${API_ENDPOINTS.GROUPS.MESSAGES(groupId)}?limit=${limit}&offset=${offset}`
+  async getGroupMessages(groupId: string, limit = 50, before?: string): Promise<GroupMessagePage> {
+    const cursor = before ? `&before=${encodeURIComponent(before)}` : '';
+    const response = await apiClient.get<GroupMessagePage>(
+      `${API_ENDPOINTS.GROUPS.MESSAGES(groupId)}?limit=${limit}${cursor}`
     );
     return response.data;
   },
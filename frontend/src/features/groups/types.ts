@@ -25,6 +25,15 @@ export interface GroupMessage {
   sent_at: string;
 }
 
+/**
+ * Page of group message history (newest first)
+ */
+export interface GroupMessagePage {
+  messages: GroupMessage[];
+  before_cursor: string | null;
+  after_cursor: string | null;
+}
+
 /**
  * Group member response from backend
  */
@@ -1,7 +1,8 @@
 import { useEffect, useCallback } from 'react';
 import { useQueryClient } from '@tanstack/react-query';
-import { QUERY_KEYS } from '@/lib/constants';
+import { QUERY_KEYS, WS_EVENTS } from '@/lib/constants';
 import { wsManager } from '@/services/websocket/manager';
+import type { Contact } from '@/features/contacts/types';
 
 /**
  * Global WebSocket subscriptions for real-time updates
@@ -21,6 +22,38 @@ export function useGlobalSubscriptions() {
     [queryClient]
   );
 
+  // Handle read receipts - messages read on another device or by a contact
+  const handleMessagesRead = useCallback(
+    (event: { event: string; data: unknown }) => {
+      if (event.event !== 'messages_read') return;
+
+      queryClient.invalidateQueries({ queryKey: QUERY_KEYS.MESSAGES.UNREAD_COUNT });
+    },
+    [queryClient]
+  );
+
+  // Handle contacts going online/offline - patch the cached contact list in place
+  const handlePresence = useCallback(
+    (event: { event: string; data: { user_id: string; last_seen?: string | null } }) => {
+      if (event.event !== WS_EVENTS.USER_ONLINE && event.event !== WS_EVENTS.USER_OFFLINE) return;
+
+      const isOnline = event.event === WS_EVENTS.USER_ONLINE;
+      queryClient.setQueryData<Contact[]>(QUERY_KEYS.CONTACTS.LIST, (contacts) =>
+        contacts?.map((contact) =>
+          contact.contact_id === event.data.user_id
+            ? { ...contact, is_online: isOnline, last_seen: event.data.last_seen ?? contact.last_seen }
+            : contact
+        )
+      );
+    },
+    [queryClient]
+  );
+
+  // Events were missed and could not be replayed - refetch everything
+  const handleResync = useCallback(() => {
+    queryClient.invalidateQueries();
+  }, [queryClient]);
+
   // Handle new group messages
   const handleNewGroupMessage = useCallback(
     (event: { event: string; data: { group_id: string } }) => {
@@ -57,15 +90,23 @@ export function useGlobalSubscriptions() {
   useEffect(() => {
     // Subscribe to all relevant events
     const unsubMessage = wsManager.subscribe('new_direct_message', handleNewMessage as (data: unknown) => void);
+    const unsubMessagesRead = wsManager.subscribe('messages_read', handleMessagesRead as (data: unknown) => void);
     const unsubGroupMessage = wsManager.subscribe('new_group_message', handleNewGroupMessage as (data: unknown) => void);
     const unsubContactRequest = wsManager.subscribe('new_contact_request', handleContactRequest as (data: unknown) => void);
     const unsubContactAccepted = wsManager.subscribe('contact_request_accepted', handleContactRequest as (data: unknown) => void);
+    const unsubUserOnline = wsManager.subscribe(WS_EVENTS.USER_ONLINE, handlePresence as (data: unknown) => void);
+    const unsubUserOffline = wsManager.subscribe(WS_EVENTS.USER_OFFLINE, handlePresence as (data: unknown) => void);
+    const unsubResync = wsManager.subscribe(WS_EVENTS.RESYNC, handleResync);
 
     return () => {
       unsubMessage();
+      unsubMessagesRead();
       unsubGroupMessage();
       unsubContactRequest();
       unsubContactAccepted();
+      unsubUserOnline();
+      unsubUserOffline();
+      unsubResync();
     };
-  }, [handleNewMessage, handleNewGroupMessage, handleContactRequest]);
+  }, [handleNewMessage, handleMessagesRead, handleNewGroupMessage, handleContactRequest, handlePresence, handleResync]);
 }
@@ -73,12 +73,14 @@ export const QUERY_KEYS = {
 // WebSocket event types
 export const WS_EVENTS = {
   NEW_MESSAGE: 'new_message',
-  MESSAGE_READ: 'message_read',
+  MESSAGE_READ: 'messages_read',
   USER_TYPING: 'user_typing',
   USER_ONLINE: 'user_online',
   USER_OFFLINE: 'user_offline',
   GROUP_MESSAGE: 'group_message',
   GROUP_UPDATE: 'group_update',
+  SESSION: 'session',
+  RESYNC: 'resync',
 } as const;
 
 // Local storage keys
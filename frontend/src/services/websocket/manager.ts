@@ -4,6 +4,7 @@ type MessageHandler = (data: unknown) => void;
 interface WSMessage {
   event: string;
   data: unknown;
+  seq?: number; // per-user sequence number, used to resume after a reconnect
 }
 
 /**
@@ -16,7 +17,11 @@ class WebSocketManager {
   private reconnectAttempts = 0;
   private maxReconnects = 5;
   private reconnectDelay = 2000;
+  private heartbeatInterval = 25000; // must stay below the server's presence_timeout
+  private heartbeatTimer: ReturnType<typeof setInterval> | null = null;
   private token: string | null = null;
+  private epoch: string | null = null;
+  private lastSeq: number | null = null;
 
   /**
    * Connect to WebSocket server
@@ -31,7 +36,11 @@ class WebSocketManager {
     const wsUrl = import.meta.env.VITE_WS_URL || 'ws://localhost:8000';
 
     try {
-      this.socket = new WebSocket(`${wsUrl}/ws?token=${token}`);
+      // Resume the event stream where it stopped; the server replays missed events or sends 'resync'
+      const resume = this.epoch !== null && this.lastSeq !== null
+        ? `&epoch=${this.epoch}&last_seq=${this.lastSeq}`
+        : '';
+      this.socket = new WebSocket(`${wsUrl}/ws?token=${token}${resume}`);
       this.setupEventHandlers();
     } catch (error) {
       console.error('[WS] Connection error:', error);
@@ -48,11 +57,13 @@ class WebSocketManager {
     this.socket.onopen = () => {
       console.log('[WS] Connected');
       this.reconnectAttempts = 0;
+      this.startHeartbeat();
     };
 
     this.socket.onmessage = (wsEvent) => {
       try {
         const message: WSMessage = JSON.parse(wsEvent.data);
+        this.trackSequence(message);
         // Emit with event type, passing the full message (event + data)
         this.emit(message.event, message);
       } catch (error) {
@@ -62,6 +73,7 @@ class WebSocketManager {
 
     this.socket.onclose = (event) => {
       console.log('[WS] Disconnected:', event.code, event.reason);
+      this.stopHeartbeat();
       this.scheduleReconnect();
     };
 
@@ -70,6 +82,37 @@ class WebSocketManager {
     };
   }
 
+  /**
+   * Remember the stream position so a reconnect only replays what was missed
+   */
+  private trackSequence(message: WSMessage): void {
+    if (message.event === 'session') {
+      const session = message.data as { epoch: string; seq: number };
+      if (session.epoch !== this.epoch) {
+        this.epoch = session.epoch;
+        this.lastSeq = session.seq;
+      }
+    } else if (message.seq !== undefined) {
+      this.lastSeq = message.seq;
+    }
+  }
+
+  /**
+   * Send a keepalive frame periodically; the server closes silent sockets
+   * and reports their user offline
+   */
+  private startHeartbeat(): void {
+    this.stopHeartbeat();
+    this.heartbeatTimer = setInterval(() => this.send('ack', {}), this.heartbeatInterval);
+  }
+
+  private stopHeartbeat(): void {
+    if (this.heartbeatTimer) {
+      clearInterval(this.heartbeatTimer);
+      this.heartbeatTimer = null;
+    }
+  }
+
   /**
    * Schedule reconnection with exponential backoff
    */
@@ -139,7 +182,10 @@ class WebSocketManager {
    */
   disconnect(): void {
     this.token = null;
+    this.epoch = null;
+    this.lastSeq = null;
     this.reconnectAttempts = this.maxReconnects; // Prevent reconnection
+    this.stopHeartbeat();
 
     if (this.socket) {
       this.socket.close();